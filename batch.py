@@ -0,0 +1,1047 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from calculations.calculations import polynomial_fit, temperature_grid
+from calculations.calculator import RPFRCalculator, RPFRError
+from extractions.scanner import LogRecord
+from extractions.sources import source_exists, source_path
+from file_io import trace
+from file_io.output import output_file, write_coefficients, write_pair_output
+
+# columns of the consolidated results table
+RESULT_COLUMNS = [
+    "light",
+    "heavy",
+    "linear",
+    "output",
+    "status",
+    "reason",
+    "warnings",
+    "element",
+    "light_isotope",
+    "heavy_isotope",
+    "temperature",
+    "num_freq",
+    "ratio",
+    "Q_heavy",
+    "Q_light",
+    "beta",
+    "beta_bm",
+    "beta_lower",
+    "beta_upper",
+]
+# temperature grid (start, stop, step in K) of the polynomial fits if no grid is given
+FIT_GRID = (273.15, 1773.15, 10.0)
+# largest residual of a polynomial fit relative to 1000*lnB, fits with more are given more coefficients
+FIT_TOLERANCE = 0.01
+# largest number of coefficients of a polynomial fit, a to h
+MAX_FIT_DEGREE = 8
+
+
+def read_manifest(filename):
+    """
+    Reads a manifest of light / heavy isotopologue pairs from a CSV or JSON file.
+
+    CSV files need a header with the columns `light`, `heavy`, `linear` and optionally `output`.
+    JSON files hold a list of objects with the same keys.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the manifest file
+
+    Returns:
+    --------
+    rows: list
+        list of dictionaries, one per pair
+    """
+    with open(filename, "rt", newline="") as file:
+        if filename.lower().endswith(".json"):
+            rows = json.load(file)
+        else:
+            rows = list(csv.DictReader(file))
+
+    for i, row in enumerate(rows):
+        for key in ("light", "heavy", "linear"):
+            if not row.get(key):
+                raise ValueError(
+                    "Manifest row %i is missing the '%s' column." % (i + 1, key)
+                )
+        row.setdefault("output", "")
+    return rows
+
+
+def compute_pair(
+    row,
+    unconverged="continue",
+    tail=False,
+    cache=False,
+    screen=None,
+    reference=None,
+    temperatures=None,
+    records=None,
+):
+    """
+    Calculates the reduced partition function ratio of one light / heavy pair without prompting the user.
+
+    Parameters:
+    -----------
+    row: dict
+        manifest row with the keys `light`, `heavy`, `linear` and `output`
+    unconverged: str
+        policy for log files without a converged item convergence table,
+        "continue" records a warning, "fail" marks the pair as failed
+    tail: bool
+        only parse the last frequency section of each log file - see `scan_log()`
+    cache: bool
+        reuse parsed log files from the on-disk cache - see `cached_scan_log()`
+    screen: float
+        if given, pairs whose Bigeleisen-Mayer upper bound of 1000*lnB is below this value are marked as
+        "screened" without calculating the exact RPFR - see `bigeleisen_mayer()`
+    reference: RPFRResult
+        the light isotope of the row extracted by `RPFRCalculator.reference()`, to reuse instead of
+        reading the light isotope log file
+    temperatures: ndarray
+        optional temperature grid in K, the RPFR at each temperature is added as the column `beta_<T>`
+    records: dict
+        LogRecord of the log files already read and parsed by `prefetch_batch()`, used instead of reading
+        the log files
+
+    Returns:
+    --------
+    result: dict
+        row of the results table, with `status` "ok", "screened" or "failed" and the failure `reason`.
+        Calculated rows also hold the frequency arrays `light_freq` and `heavy_freq`, which are not written
+        to the results file.
+    """
+    result = dict.fromkeys(RESULT_COLUMNS, "")
+    result.update(
+        light=row["light"],
+        heavy=row["heavy"],
+        linear=row["linear"],
+        output=row.get("output") or "",
+        status="failed",
+    )
+
+    # checking the linear variable and the filenames
+    if row["linear"] not in ("y", "n"):
+        result["reason"] = "linear must be 'y' or 'n'"
+        return result
+    records = records or {}
+    for key in ("light", "heavy") if reference is None else ("heavy",):
+        if row[key] not in records and not source_exists(row[key]):
+            result["reason"] = "%s isotope file %s does not exist" % (key, row[key])
+            return result
+
+    # the calculation is silent, warnings and failures are recorded in the results table
+    calculator = RPFRCalculator(
+        linear=row["linear"] == "y",
+        tail=tail,
+        cache=cache,
+        unconverged=unconverged,
+        missing_frequencies="fail",
+        contributions=False,
+        screen_below=screen,
+    )
+    try:
+        calculated = calculator.calculate(
+            reference or records.get(row["light"], row["light"]),
+            records.get(row["heavy"], row["heavy"]),
+            temperatures,
+        )
+    except RPFRError as e:
+        result["reason"] = " ".join(str(e).split())
+        return result
+
+    result.update(
+        status="ok",
+        warnings="; ".join(calculated.warnings),
+        element=calculated.element or "",
+        light_isotope=calculated.light_isotope or "",
+        heavy_isotope=calculated.heavy_isotope or "",
+        temperature=calculated.temperature,
+        num_freq=len(calculated.light_freq),
+    )
+    result.update(
+        beta_bm=calculated.beta_bm,
+        beta_lower=calculated.beta_lower,
+        beta_upper=calculated.beta_upper,
+    )
+    if calculated.screened:
+        result["status"] = "screened"
+        return result
+    result.update(
+        ratio=float(calculated.ratio),
+        Q_heavy=float(calculated.Q_heavy),
+        Q_light=float(calculated.Q_light),
+        beta=float(calculated.beta),
+        light_freq=calculated.light_freq,
+        heavy_freq=calculated.heavy_freq,
+    )
+    if temperatures is not None:
+        result.update(
+            zip(temperature_columns(temperatures), map(float, calculated.beta_curve))
+        )
+
+    # per pair output file, if requested in the manifest
+    if result["output"]:
+        with trace.span("write", file=result["output"]):
+            output_file(result["output"])
+            write_pair_output(result["output"], result)
+    return result
+
+
+def temperature_columns(temperatures):
+    """
+    Returns the names of the results table columns of the RPFR over a temperature grid, e.g. "beta_298.15".
+    """
+    return ["beta_%s" % float(temperature) for temperature in temperatures]
+
+
+def _compute_pair_safe(
+    row,
+    unconverged,
+    tail,
+    cache,
+    screen,
+    reference=None,
+    temperatures=None,
+    records=None,
+    traced=False,
+):
+    """
+    Calls `compute_pair()`, recording unexpected errors as the failure reason instead of stopping the batch.
+    If `traced`, the trace of a worker process is returned in the "trace" key - see `_merge_traces()`.
+    """
+    with trace.collect(traced) as tracer, trace.span(
+        "pair", light=row.get("light"), heavy=row.get("heavy")
+    ):
+        try:
+            result = compute_pair(
+                row, unconverged, tail, cache, screen, reference, temperatures, records
+            )
+        except Exception as e:
+            result = dict.fromkeys(RESULT_COLUMNS, "")
+            result.update(
+                {
+                    key: row.get(key, "")
+                    for key in ("light", "heavy", "linear", "output")
+                }
+            )
+            result.update(status="failed", reason="%s: %s" % (type(e).__name__, e))
+    if tracer is not None:
+        result["trace"] = tracer.export()
+    return result
+
+
+def _merge_traces(results):
+    """
+    Adds the traces of the worker processes to the trace of this process, removing them from the results.
+    """
+    for result in results:
+        exported = result.pop("trace", None)
+        if exported is not None:
+            trace.merge(exported)
+    return results
+
+
+def run_batch(
+    rows,
+    workers=None,
+    unconverged="continue",
+    tail=False,
+    cache=False,
+    screen=None,
+    temperatures=None,
+):
+    """
+    Calculates the reduced partition function ratio of every pair in a manifest across a pool of processes.
+
+    Parameters:
+    -----------
+    rows: list
+        manifest rows from `read_manifest()`
+    workers: int
+        number of worker processes, defaults to the number of CPUs. 1 runs every pair in this process.
+    unconverged: str
+        policy for log files without a converged item convergence table - see `compute_pair()`
+    tail: bool
+        only parse the last frequency section of each log file - see `scan_log()`
+    cache: bool
+        reuse parsed log files from the on-disk cache - see `cached_scan_log()`
+    screen: float
+        screening threshold of 1000*lnB - see `compute_pair()`
+    temperatures: ndarray
+        optional temperature grid in K - see `compute_pair()`
+
+    Returns:
+    --------
+    results: list
+        one results table row per manifest row, in manifest order
+    """
+    n = len(rows)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, n))
+    args = (rows, [unconverged] * n, [tail] * n, [cache] * n, [screen] * n)
+    args += ([None] * n, [temperatures] * n)
+    if workers == 1:
+        return list(map(_compute_pair_safe, *args))
+
+    # several pairs are sent to a worker at once to reduce inter process communication
+    chunksize = max(1, n // (workers * 4))
+    compute = partial(_compute_pair_safe, traced=trace.tracing())
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return _merge_traces(list(executor.map(compute, *args, chunksize=chunksize)))
+
+
+def prefetch_batch(
+    rows,
+    reads,
+    buffer,
+    workers=None,
+    unconverged="continue",
+    screen=None,
+    temperatures=None,
+):
+    """
+    Calculates the reduced partition function ratio of every pair in a manifest while its log files are read
+    and parsed, for log files on a network filesystem - see `prefetch_logs()`. Each pair is sent to the pool as
+    soon as both of its log files are parsed, so reading overlaps with parsing and calculating. The same pool
+    parses the log files and calculates the pairs, and each record is dropped once the last pair using it
+    has been calculated.
+
+    Parameters:
+    -----------
+    rows: list
+        manifest rows from `read_manifest()`
+    reads: int
+        largest number of log files read at the same time
+    buffer: int
+        largest number of bytes held between reading and parsing
+    workers: int
+        number of worker processes, defaults to the number of CPUs. 1 parses and calculates in a thread
+        of this process
+    unconverged: str
+        policy for log files without a converged item convergence table - see `compute_pair()`
+    screen: float
+        screening threshold of 1000*lnB - see `compute_pair()`
+    temperatures: ndarray
+        optional temperature grid in K - see `compute_pair()`
+
+    Returns:
+    --------
+    results: list
+        one results table row per manifest row, in manifest order
+    stats: PrefetchStats
+        timings of reading and parsing the log files - see `PrefetchStats.report()`
+    """
+    # imported here as prefetching is optional
+    from extractions.prefetch import PrefetchStats, prefetch_logs_async
+
+    # pairs waiting for each log file, the log files each pair still waits for and the pairs using each log file
+    waiting = {}
+    missing = []
+    uses = {}
+    for i, row in enumerate(rows):
+        files = dict.fromkeys((row["light"], row["heavy"]))
+        missing.append(len(files))
+        for filename in files:
+            waiting.setdefault(filename, []).append(i)
+            uses[filename] = uses.get(filename, 0) + 1
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(waiting)))
+
+    # parsed records still used by a pair, None for log files that could not be read or parsed
+    records = {}
+    results = [None] * len(rows)
+    stats = PrefetchStats()
+    compute = partial(_compute_pair_safe, traced=trace.tracing() and workers > 1)
+
+    async def calculate(executor, i):
+        row = rows[i]
+        files = list(dict.fromkeys((row["light"], row["heavy"])))
+        # only the records of the pair are sent to the worker, missing log files are reported by `compute_pair()`
+        pair_records = {f: records[f] for f in files if records[f] is not None}
+        results[i] = await asyncio.get_running_loop().run_in_executor(
+            executor,
+            compute,
+            row,
+            unconverged,
+            False,
+            False,
+            screen,
+            None,
+            temperatures,
+            pair_records,
+        )
+        for filename in files:
+            uses[filename] -= 1
+            if uses[filename] == 0:
+                del records[filename]
+
+    async def run(executor):
+        pairs = []
+
+        def on_record(filename, record):
+            records[filename] = record
+            stats.peak_records = max(stats.peak_records, len(records))
+            for i in waiting[filename]:
+                missing[i] -= 1
+                if missing[i] == 0:
+                    pairs.append(asyncio.ensure_future(calculate(executor, i)))
+
+        await prefetch_logs_async(
+            list(waiting), reads, buffer, executor, stats, on_record
+        )
+        await asyncio.gather(*pairs)
+
+    executor = ProcessPoolExecutor(workers) if workers > 1 else ThreadPoolExecutor(1)
+    try:
+        with trace.span("prefetch", files=len(waiting)):
+            asyncio.run(run(executor))
+    finally:
+        executor.shutdown()
+    return _merge_traces(results), stats
+
+
+def file_state(filename, previous=None):
+    """
+    Returns the size, modification time and SHA-256 hash of a file, to tell if it changed since a previous run.
+    The hash is only calculated if the size or modification time changed.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the file
+    previous: dict
+        state of the file in the previous run
+
+    Returns:
+    --------
+    state: dict or None
+        `size`, `mtime_ns` and `sha256` of the file, None if it does not exist
+    """
+    try:
+        # tar archive members are checked by the size and modification time of the archive
+        stat = os.stat(source_path(filename))
+    except (OSError, TypeError):
+        return None
+    state = dict(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    if previous and all(previous[key] == state[key] for key in state):
+        state["sha256"] = previous["sha256"]
+    else:
+        # imported here as the cache is optional
+        from extractions.cache import file_hash
+
+        state["sha256"] = file_hash(filename)
+    return state
+
+
+def pair_key(row):
+    """
+    Returns the key of a manifest row in the state and results of `update_batch()`.
+    """
+    return "|".join(
+        row.get(key) or "" for key in ("light", "heavy", "linear", "output")
+    )
+
+
+def update_batch(
+    rows,
+    results_file,
+    state_file=None,
+    workers=None,
+    unconverged="continue",
+    tail=False,
+    cache=False,
+    screen=None,
+):
+    """
+    Brings a results table up to date with a manifest, make-style: only the pairs that are new, or whose log
+    files were added, changed or removed since the previous run, are calculated again.
+
+    The size, modification time and hash of every log file are kept in a JSON state file. A log file that
+    was touched or copied without changing its contents is not calculated again.
+
+    Parameters:
+    -----------
+    rows: list
+        manifest rows from `read_manifest()`
+    results_file: str
+        location of the results table, read for the pairs that are up to date and then rewritten
+    state_file: str
+        location of the state file, defaults to the results table location + ".state.json"
+    workers: int
+        number of worker processes - see `run_batch()`
+    unconverged: str
+        policy for log files without a converged item convergence table - see `compute_pair()`
+    tail: bool
+        only parse the last frequency section of each log file - see `scan_log()`
+    cache: bool
+        reuse parsed log files from the on-disk cache - see `cached_scan_log()`
+    screen: float
+        screening threshold of 1000*lnB - see `compute_pair()`
+
+    Returns:
+    --------
+    results: list
+        one results table row per manifest row, in manifest order
+    calculated: list
+        the rows that were calculated in this run, with the `light_hash` and `heavy_hash` of their log files,
+        which are not written to the results file
+    """
+    state_file = state_file or results_file + ".state.json"
+    options = dict(unconverged=unconverged, tail=tail, screen=screen)
+    state = {}
+    if os.path.isfile(state_file):
+        with open(state_file, "rt") as file:
+            state = json.load(file)
+    # every pair is calculated again if the options changed
+    pairs = state.get("pairs", {}) if state.get("options") == options else {}
+
+    previous = {}
+    if pairs and os.path.isfile(results_file):
+        with open(results_file, "rt", newline="") as file:
+            previous = {pair_key(row): row for row in csv.DictReader(file)}
+
+    # each log file is checked once, even if it is shared by many pairs, e.g. a fan-out manifest
+    known = {}
+    for row in rows:
+        old = pairs.get(pair_key(row)) or {}
+        for name in ("light", "heavy"):
+            if known.get(row[name]) is None:
+                known[row[name]] = old.get(name)
+    states = {filename: file_state(filename, known[filename]) for filename in known}
+
+    stale = []
+    files = {}
+    for row in rows:
+        key = pair_key(row)
+        old = pairs.get(key, {})
+        files[key] = {name: states[row[name]] for name in ("light", "heavy")}
+        # a file changed if it was added, removed or its contents are different
+        hashes = [
+            (state or {}).get("sha256")
+            for state in (files[key]["light"], files[key]["heavy"])
+        ]
+        old_hashes = [
+            (old.get(name) or {}).get("sha256") for name in ("light", "heavy")
+        ]
+        if key not in previous or not old or hashes != old_hashes:
+            stale.append(row)
+
+    calculated = (
+        run_batch(stale, workers, unconverged, tail, cache, screen) if stale else []
+    )
+    # the hashes are kept so the store does not read the log files again - see `ResultStore.add()`
+    for result in calculated:
+        for name in ("light", "heavy"):
+            result[name + "_hash"] = (files[pair_key(result)][name] or {}).get("sha256")
+    updated = {pair_key(result): result for result in calculated}
+    results = [updated.get(pair_key(row)) or previous[pair_key(row)] for row in rows]
+    write_results(results_file, results)
+
+    # the state is replaced in one step, so an interrupted run leaves the previous state
+    tmp = state_file + ".tmp"
+    with open(tmp, "wt") as file:
+        json.dump(dict(options=options, pairs=files), file, indent=1)
+    os.replace(tmp, state_file)
+    return results, calculated
+
+
+def add_to_store(filename, results):
+    """
+    Adds the calculated rows of a results table to an SQLite results database - see `ResultStore.add_rows()`.
+    """
+    # imported here as the store is optional
+    from file_io.store import ResultStore
+
+    with ResultStore(filename) as store:
+        store.add_rows(results)
+
+
+def watch(manifest, results_file, interval=10.0, store=None, **kwargs):
+    """
+    Polls a manifest and its log files, and brings the results table up to date with `update_batch()`
+    whenever pairs are added or log files change, until interrupted with Ctrl+C. A poll that cannot read the
+    manifest or results table is reported and tried again at the next interval.
+
+    Parameters:
+    -----------
+    manifest: str
+        location of the manifest file, read again at every poll
+    results_file: str
+        location of the results table
+    interval: float
+        seconds between polls
+    store: str
+        location of an SQLite results database to also add the calculated pairs to - see `ResultStore`
+    kwargs:
+        options of `update_batch()`
+    """
+    print("Watching %s every %s s, press Ctrl+C to stop." % (manifest, interval))
+    try:
+        while True:
+            # the manifest or results table may be mid-edit or briefly missing, try again at the next poll
+            try:
+                rows = read_manifest(manifest)
+                results, calculated = update_batch(rows, results_file, **kwargs)
+            except (ValueError, OSError) as e:
+                print(
+                    "%s: %s - trying again in %s s."
+                    % (time.strftime("%H:%M:%S"), e, interval)
+                )
+                time.sleep(interval)
+                continue
+            if calculated and store:
+                add_to_store(store, calculated)
+            if calculated:
+                failed = sum(result["status"] == "failed" for result in calculated)
+                print(
+                    "%s: %i of %i pairs calculated again, %i failed. Results written to %s"
+                    % (
+                        time.strftime("%H:%M:%S"),
+                        len(calculated),
+                        len(results),
+                        failed,
+                        results_file,
+                    )
+                )
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Stopped watching %s." % manifest)
+
+
+# light isotope extracted once by `fan_out()`, set in each worker process by `_init_fan_out()`
+_reference = None
+
+
+def _init_fan_out(reference):
+    """
+    Stores the light isotope reference in a worker process, so it is sent to each worker once.
+    """
+    global _reference
+    _reference = reference
+
+
+def _fan_out_pair(row, unconverged, tail, cache, screen, temperatures, traced=False):
+    """
+    Calls `_compute_pair_safe()` with the light isotope reference of the worker process.
+    """
+    return _compute_pair_safe(
+        row, unconverged, tail, cache, screen, _reference, temperatures, traced
+    )
+
+
+def fan_out(
+    light,
+    heavies,
+    linear,
+    workers=None,
+    unconverged="continue",
+    tail=False,
+    cache=False,
+    screen=None,
+    temperatures=None,
+):
+    """
+    Calculates the reduced partition function ratio of many heavy isotopologues against one light isotopologue,
+    e.g. 66Zn, 67Zn, 68Zn and 70Zn against 64Zn.
+
+    The light isotope log file is read, checked and its lnQ' calculated once, then the heavy isotope log files
+    are streamed through a pool of processes.
+
+    Parameters:
+    -----------
+    light: str
+        location of the light isotope log file
+    heavies: list
+        locations of the heavy isotope log files
+    linear: str
+        "y" if the molecule is linear, "n" if not
+    workers: int
+        number of worker processes, defaults to the number of CPUs. 1 runs every pair in this process.
+    unconverged: str
+        policy for log files without a converged item convergence table - see `compute_pair()`
+    tail: bool
+        only parse the last frequency section of each log file - see `scan_log()`
+    cache: bool
+        reuse parsed log files from the on-disk cache - see `cached_scan_log()`
+    screen: float
+        screening threshold of 1000*lnB - see `compute_pair()`
+    temperatures: ndarray
+        optional temperature grid in K - see `compute_pair()`
+
+    Returns:
+    --------
+    results: list
+        one results table row per heavy isotope log file, in the given order
+
+    Raises:
+    -------
+    RPFRError
+        if the light isotope log file cannot be used, e.g. no temperature or frequencies
+    FileNotFoundError
+        if the light isotope log file does not exist
+    """
+    if linear not in ("y", "n"):
+        raise RPFRError("linear must be 'y' or 'n'")
+    calculator = RPFRCalculator(
+        linear=linear == "y",
+        tail=tail,
+        cache=cache,
+        unconverged=unconverged,
+        missing_frequencies="fail",
+        contributions=False,
+    )
+    with trace.span("reference", file=light):
+        reference = calculator.reference(light, temperatures)
+    # the heavy isotopes only need the light isotope information, not its parsed log file
+    reference.light_record = LogRecord(reference.light_filename)
+    reference.light_record.temperature = reference.temperature
+
+    rows = [
+        dict(light=light, heavy=heavy, linear=linear, output="") for heavy in heavies
+    ]
+    n = len(rows)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, n))
+
+    args = (rows, [unconverged] * n, [tail] * n, [cache] * n, [screen] * n)
+    if workers == 1:
+        return [
+            _compute_pair_safe(*row_args, reference, temperatures)
+            for row_args in zip(*args)
+        ]
+
+    chunksize = max(1, n // (workers * 4))
+    compute = partial(_fan_out_pair, traced=trace.tracing())
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_fan_out, initargs=(reference,)
+    ) as executor:
+        return _merge_traces(
+            list(executor.map(compute, *args, [temperatures] * n, chunksize=chunksize))
+        )
+
+
+def write_results(filename, results, temperatures=None):
+    """
+    Writes the consolidated results table to a CSV file.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the results file
+    results: list
+        results table rows from `run_batch()` or `fan_out()`
+    temperatures: ndarray
+        temperature grid of the rows, if any - see `compute_pair()`
+    """
+    columns = RESULT_COLUMNS
+    if temperatures is not None:
+        columns = columns + temperature_columns(temperatures)
+    output_file(filename)
+    with trace.span("write", file=filename), open(filename, "w", newline="") as f:
+        writer = csv.DictWriter(
+            f, fieldnames=columns, restval="", extrasaction="ignore"
+        )
+        writer.writeheader()
+        for result in results:
+            # repr keeps full float precision
+            writer.writerow(
+                {
+                    key: repr(value) if isinstance(value, float) else value
+                    for key, value in result.items()
+                }
+            )
+
+
+def fit_results(
+    results,
+    temperatures,
+    degree=3,
+    tolerance=FIT_TOLERANCE,
+    max_degree=MAX_FIT_DEGREE,
+):
+    """
+    Fits 1000*lnB = a*x + b*x^2 + c*x^3 + ..., x = 10^6/T^2, to the RPFR over the temperature grid of every
+    calculated pair, all pairs at once - see `polynomial_fit()`. Pairs whose fit is off by more than
+    `tolerance` at any temperature, e.g. with C-H stretches over a wide grid, are fitted again with one more
+    coefficient, up to `max_degree`.
+
+    Parameters:
+    -----------
+    results: list
+        results table rows from `run_batch()` or `fan_out()`, calculated with `temperatures`
+    temperatures: ndarray
+        temperature grid of the rows in K
+    degree: int
+        number of coefficients of every fit
+    tolerance: float
+        largest residual of a fit relative to 1000*lnB
+    max_degree: int
+        largest number of coefficients
+
+    Returns:
+    --------
+    fits: list
+        one row per pair with the status "ok", with `max_relative`, the largest relative residual, and
+        `coefficients` padded with zeros to the same length - see `write_coefficients()`
+    """
+    calculated = [result for result in results if result["status"] == "ok"]
+    if not calculated:
+        return []
+    columns = temperature_columns(temperatures)
+    beta = np.array([[result[column] for column in columns] for result in calculated])
+    fitted = [None] * len(calculated)
+    remaining = np.arange(len(calculated))
+    for n in range(degree, max(degree, max_degree) + 1):
+        fit = polynomial_fit(temperatures, beta[remaining], n)
+        for j, i in enumerate(remaining):
+            fitted[i] = [value[j] for value in fit]
+        remaining = remaining[fit[3] > tolerance]
+        if len(remaining) == 0:
+            break
+    width = max(len(fit[0]) for fit in fitted)
+    return [
+        dict(
+            {key: result[key] for key in ("light", "heavy", "element")},
+            light_isotope=result["light_isotope"],
+            heavy_isotope=result["heavy_isotope"],
+            t_min=float(min(temperatures)),
+            t_max=float(max(temperatures)),
+            coefficients=np.pad(coefficients, (0, width - len(coefficients))),
+            rms=rms,
+            max_residual=max_residual,
+            max_relative=max_relative,
+        )
+        for result, (coefficients, rms, max_residual, max_relative) in zip(
+            calculated, fitted
+        )
+    ]
+
+
+def write_fit(filename, results, temperatures):
+    """
+    Fits the RPFR of every calculated pair over the temperature grid, writes the coefficient table and prints
+    the largest residuals, with a warning for each fit off by more than `FIT_TOLERANCE` - see `fit_results()`.
+    """
+    with trace.span("fit", pairs=len(results)):
+        fits = fit_results(results, temperatures)
+    with trace.span("write", file=filename):
+        write_coefficients(filename, fits)
+    if fits:
+        print(
+            "Polynomial fits of %i pairs over %.2f - %.2f K with up to %i coefficients written to %s, largest residual %.3g (%.3g%% of 1000*lnB)"
+            % (
+                len(fits),
+                min(temperatures),
+                max(temperatures),
+                len(fits[0]["coefficients"]),
+                filename,
+                max(fit["max_residual"] for fit in fits),
+                max(fit["max_relative"] for fit in fits) * 100,
+            )
+        )
+    for fit in fits:
+        if fit["max_relative"] > FIT_TOLERANCE:
+            print(
+                "WARNING - the fit of %s / %s is off by up to %.3g%% with %i coefficients, fit a narrower --temperatures range"
+                % (
+                    fit["light"],
+                    fit["heavy"],
+                    fit["max_relative"] * 100,
+                    len(fit["coefficients"]),
+                )
+            )
+
+
+if __name__ == "__main__":  # only execute this if this file is run as a script
+
+    parser = argparse.ArgumentParser(
+        description="Calculates the reduced partition function ratio for every light / heavy pair in a manifest."
+    )
+    parser.add_argument(
+        "manifest", help="CSV or JSON manifest with light, heavy, linear, output"
+    )
+    parser.add_argument("results", help="path to the consolidated results CSV file")
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--unconverged",
+        choices=["continue", "fail"],
+        default="continue",
+        help="what to do with log files without a converged item convergence table",
+    )
+    parser.add_argument(
+        "--tail",
+        action="store_true",
+        help="only parse the last frequency section of each log file",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="reuse parsed log files from the on-disk cache",
+    )
+    parser.add_argument(
+        "--screen",
+        type=float,
+        metavar="MIN_BETA",
+        default=None,
+        help="only calculate the exact RPFR of pairs whose Bigeleisen-Mayer upper bound of 1000*lnB is at least MIN_BETA",
+    )
+    parser.add_argument(
+        "--temperatures",
+        metavar="START:STOP:STEP",
+        help="also calculate the RPFR over a grid of temperatures in K, e.g. 273.15:1773.15:25",
+    )
+    parser.add_argument(
+        "--fit",
+        metavar="FILE",
+        help="fit 1000*lnB = a*x + b*x^2 + c*x^3 (x = 10^6/T^2), with more terms up to h*x^8 for pairs off by more than 1%%, to the RPFR of every pair over the --temperatures grid (default: 273.15:1773.15:10) and write the coefficients a-h to FILE",
+    )
+    parser.add_argument(
+        "--store",
+        metavar="DATABASE",
+        help="also add the calculated pairs to an SQLite results database (see file_io/store.py)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only calculate the pairs that are new or whose log files changed since the last run",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="time each stage of every pair and write a Chrome trace (chrome://tracing, ui.perfetto.dev) to FILE",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        metavar="READS",
+        default=None,
+        help="read up to READS log files at the same time while parsing them in WORKERS processes, for log files on a network filesystem (see extractions/prefetch.py)",
+    )
+    parser.add_argument(
+        "--buffer",
+        type=float,
+        metavar="MB",
+        default=256,
+        help="with --prefetch, MB of log files held in memory between reading and parsing (default: 256)",
+    )
+    parser.add_argument(
+        "--watch",
+        type=float,
+        metavar="SECONDS",
+        default=None,
+        help="keep the results up to date, checking the manifest and log files for changes every SECONDS",
+    )
+    args = parser.parse_args()
+
+    # temperature grid, one column of the results table per temperature
+    temperatures = None
+    if args.temperatures is not None:
+        try:
+            start, stop, step = map(float, args.temperatures.split(":"))
+            temperatures = temperature_grid(start, stop, step)
+        except ValueError:
+            parser.error(
+                "--temperatures must be given as START:STOP:STEP, e.g. 273.15:1773.15:25"
+            )
+    elif args.fit:
+        temperatures = temperature_grid(*FIT_GRID)
+    if temperatures is not None and (args.incremental or args.watch is not None):
+        parser.error(
+            "--temperatures and --fit cannot be used with --incremental or --watch"
+        )
+    if args.prefetch is not None:
+        if args.prefetch < 1 or args.buffer <= 0:
+            parser.error("--prefetch and --buffer must be positive")
+        if args.tail or args.cache or args.incremental or args.watch is not None:
+            parser.error(
+                "--prefetch cannot be used with --tail, --cache, --incremental or --watch"
+            )
+
+    options = dict(
+        workers=args.workers,
+        unconverged=args.unconverged,
+        tail=args.tail,
+        cache=args.cache,
+        screen=args.screen,
+    )
+    if args.trace:
+        trace.enable()
+    if args.watch is not None:
+        watch(args.manifest, args.results, args.watch, args.store, **options)
+        if args.trace:
+            trace.disable().write(args.trace)
+            print("Trace written to %s" % args.trace)
+        raise SystemExit(0)
+
+    rows = read_manifest(args.manifest)
+    if args.incremental:
+        results, calculated = update_batch(rows, args.results, **options)
+        print(
+            "%i of %i pairs are new or changed and were calculated."
+            % (len(calculated), len(rows))
+        )
+    else:
+        print("Calculating the RPFR of %i pairs..." % len(rows))
+        if args.prefetch is not None:
+            results, stats = prefetch_batch(
+                rows,
+                args.prefetch,
+                int(args.buffer * 1024**2),
+                args.workers,
+                args.unconverged,
+                args.screen,
+                temperatures,
+            )
+            print(stats.report())
+        else:
+            results = run_batch(rows, temperatures=temperatures, **options)
+        calculated = results
+        write_results(args.results, results, temperatures)
+        if args.fit:
+            write_fit(args.fit, results, temperatures)
+    if args.store:
+        add_to_store(args.store, calculated)
+
+    failed = [result for result in results if result["status"] == "failed"]
+    screened = [result for result in results if result["status"] == "screened"]
+    print(
+        "%i pairs calculated, %i screened out, %i failed. Results written to %s"
+        % (
+            len(results) - len(failed) - len(screened),
+            len(screened),
+            len(failed),
+            args.results,
+        )
+    )
+    for result in failed:
+        print(
+            "FAILED %s / %s: %s" % (result["light"], result["heavy"], result["reason"])
+        )
+    if args.trace:
+        tracer = trace.disable()
+        tracer.write(args.trace)
+        print("\n%s\nTrace written to %s" % (tracer.report(), args.trace))
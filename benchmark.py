@@ -0,0 +1,348 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from calculations.calculator import RPFRCalculator
+from extractions.scanner import scan_log
+from isotope_contribution.functions import get_atomic_number, sum_coord
+
+# the relative locations of the benchmark log files are relative to this script
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+# light / heavy log files of each benchmark case, from the smallest to the largest molecule
+BENCHMARK_CASES = [
+    ("C_1", "input_files/alkanes/C_1_12.LOG", "input_files/alkanes/C_1_13.LOG"),
+    ("C_2", "input_files/alkanes/C_2_12.LOG", "input_files/alkanes/C_2_13.LOG"),
+    ("C_4", "input_files/alkanes/C_4_12.LOG", "input_files/alkanes/C_4_13.LOG"),
+    ("C_8", "input_files/alkanes/C_8_12.LOG", "input_files/alkanes/C_8_13.LOG"),
+    (
+        "ZnCl4",
+        "tests/log_files/zinc/ZNCL4_B_64.LOG",
+        "tests/log_files/zinc/ZNCL4_B_66.LOG",
+    ),
+    (
+        "ZnSO4",
+        "input_files/ZNSO4_B_INNER1_64.LOG",
+        "input_files/ZNSO4_B_INNER1_66.LOG",
+    ),
+]
+# parse - scan both log files, sum_coord - isotope movement of both files,
+# rpfr - RPFR from the scanned records, total - RPFR from the log files
+STAGES = ["parse", "sum_coord", "rpfr", "total"]
+# version of the baseline file layout
+BASELINE_VERSION = 1
+# stages faster than this (s) are not checked for regressions, as their timings are mostly noise
+MIN_CHECKED_TIME = 1e-3
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in MB, None where it is not available (Windows).
+    """
+    try:
+        # imported here as the resource module only exists on Unix
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return rss / 1024**2 if sys.platform == "darwin" else rss / 1024
+
+
+def time_stage(function, repeats):
+    """
+    Times a function, and measures the peak memory it allocates in a separate run, so tracing does not
+    slow down the timed runs.
+
+    Parameters:
+    -----------
+    function: callable
+        stage to time, called without arguments
+    repeats: int
+        number of timed runs
+
+    Returns:
+    --------
+    timing: dict
+        `time` (fastest run), `median` (median run) in s and `peak_mb`, the peak memory allocated in MB
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return dict(
+        time=min(times), median=statistics.median(times), peak_mb=peak / 1024**2
+    )
+
+
+def run_case(light, heavy, repeats=5):
+    """
+    Benchmarks the stages of one light / heavy pair - see `STAGES`.
+
+    Parameters:
+    -----------
+    light, heavy: str
+        locations of the light / heavy isotope log files
+    repeats: int
+        number of timed runs of each stage
+
+    Returns:
+    --------
+    case: dict
+        `atoms`, `size_mb` (size of both files) and the timing of each stage from `time_stage()`, with
+        `mb_per_s` for parsing and `pairs_per_s` for the RPFR stages
+    """
+    calculator = RPFRCalculator(
+        linear=False, unconverged="continue", missing_frequencies="fail"
+    )
+    records = [scan_log(light), scan_log(heavy)]
+    atomic_number = get_atomic_number(records[0].element or records[1].element)
+    size_mb = (os.path.getsize(light) + os.path.getsize(heavy)) / 1024**2
+
+    case = dict(atoms=records[0].num_atoms, size_mb=size_mb)
+    case["parse"] = time_stage(lambda: (scan_log(light), scan_log(heavy)), repeats)
+    case["parse"]["mb_per_s"] = size_mb / case["parse"]["time"]
+    case["sum_coord"] = time_stage(
+        lambda: [sum_coord(record, atomic_number) for record in records], repeats
+    )
+    case["rpfr"] = time_stage(lambda: calculator.calculate(*records), repeats)
+    case["total"] = time_stage(lambda: calculator.calculate(light, heavy), repeats)
+    for stage in ("rpfr", "total"):
+        case[stage]["pairs_per_s"] = 1 / case[stage]["time"]
+    return case
+
+
+def scaling(cases, key):
+    """
+    Fits time = a * x^b to the fastest time of each stage, where x is the atom count or file size of each case.
+
+    Parameters:
+    -----------
+    cases: dict
+        results of `run_case()` by case name
+    key: str
+        "atoms" or "size_mb"
+
+    Returns:
+    --------
+    exponents: dict
+        exponent b of each stage, None with fewer than 2 cases
+    """
+    x = np.array([case[key] for case in cases.values()], dtype=float)
+    exponents = {}
+    for stage in STAGES:
+        y = np.array([case[stage]["time"] for case in cases.values()])
+        if len(x) < 2 or np.ptp(x) == 0:
+            exponents[stage] = None
+        else:
+            exponents[stage] = float(np.polyfit(np.log(x), np.log(y), 1)[0])
+    return exponents
+
+
+def run_benchmarks(cases=None, repeats=5):
+    """
+    Benchmarks every case - see `run_case()`.
+
+    Parameters:
+    -----------
+    cases: list
+        (name, light, heavy) of each case, defaults to `BENCHMARK_CASES`. Relative locations are found
+        from `BENCHMARK_DIR`
+    repeats: int
+        number of timed runs of each stage
+
+    Returns:
+    --------
+    report: dict
+        the results of each case, the scaling of each stage against atom count and file size, the peak
+        resident set size of the process in MB and the machine the benchmark ran on
+    """
+    results = {}
+    for name, light, heavy in cases or BENCHMARK_CASES:
+        results[name] = run_case(
+            os.path.join(BENCHMARK_DIR, light),
+            os.path.join(BENCHMARK_DIR, heavy),
+            repeats,
+        )
+    return dict(
+        version=BASELINE_VERSION,
+        python=platform.python_version(),
+        machine=platform.platform(),
+        repeats=repeats,
+        cases=results,
+        scaling=dict(atoms=scaling(results, "atoms"), size=scaling(results, "size_mb")),
+        peak_rss_mb=peak_rss(),
+    )
+
+
+def compare(report, baseline, threshold=0.25):
+    """
+    Compares the fastest time of each stage with a baseline report.
+
+    Parameters:
+    -----------
+    report: dict
+        report from `run_benchmarks()`
+    baseline: dict
+        earlier report, e.g. loaded from a baseline file
+    threshold: float
+        a stage has regressed if it is slower than the baseline by more than this fraction
+
+    Returns:
+    --------
+    regressions: list
+        (case, stage, baseline time, time) of every stage that regressed
+    """
+    regressions = []
+    for name, case in report["cases"].items():
+        old = baseline["cases"].get(name)
+        if old is None:
+            continue
+        for stage in STAGES:
+            before, after = old[stage]["time"], case[stage]["time"]
+            if after > before * (1 + threshold) and after > MIN_CHECKED_TIME:
+                regressions.append((name, stage, before, after))
+    return regressions
+
+
+def print_report(report):
+    """
+    Prints the results of `run_benchmarks()` as tables.
+    """
+    print(
+        "%-6s  %5s  %8s  %-9s  %10s  %10s  %9s  %s"
+        % (
+            "case",
+            "atoms",
+            "MB",
+            "stage",
+            "best (ms)",
+            "median",
+            "peak (MB)",
+            "throughput",
+        )
+    )
+    for name, case in report["cases"].items():
+        for stage in STAGES:
+            timing = case[stage]
+            if "mb_per_s" in timing:
+                throughput = "%.1f MB/s" % timing["mb_per_s"]
+            elif "pairs_per_s" in timing:
+                throughput = "%.1f pairs/s" % timing["pairs_per_s"]
+            else:
+                throughput = ""
+            print(
+                "%-6s  %5s  %8.3f  %-9s  %10.3f  %10.3f  %9.2f  %s"
+                % (
+                    name,
+                    case["atoms"],
+                    case["size_mb"],
+                    stage,
+                    timing["time"] * 1000,
+                    timing["median"] * 1000,
+                    timing["peak_mb"],
+                    throughput,
+                )
+            )
+    print("\nScaling exponent b of time ~ x^b:")
+    print("%-9s  %8s  %9s" % ("stage", "atoms", "file size"))
+    for stage in STAGES:
+        print(
+            "%-9s  %8s  %9s"
+            % tuple(
+                [stage]
+                + [
+                    "-" if b is None else "%.2f" % b
+                    for b in (
+                        report["scaling"]["atoms"][stage],
+                        report["scaling"]["size"][stage],
+                    )
+                ]
+            )
+        )
+    if report["peak_rss_mb"] is not None:
+        print("\nPeak resident set size: %.1f MB" % report["peak_rss_mb"])
+
+
+if __name__ == "__main__":  # only execute this if this file is run as a script
+
+    parser = argparse.ArgumentParser(
+        description="Benchmarks parsing, sum_coord and the RPFR calculation on the bundled alkane, ZnCl4 and ZnSO4 log files."
+    )
+    parser.add_argument(
+        "-n",
+        "--repeats",
+        type=int,
+        default=5,
+        help="number of timed runs of each stage, the fastest is reported (default: 5)",
+    )
+    parser.add_argument(
+        "--cases",
+        nargs="+",
+        choices=[case[0] for case in BENCHMARK_CASES],
+        help="only run these cases (default: every case)",
+    )
+    parser.add_argument("--save", help="write the results to this baseline JSON file")
+    parser.add_argument(
+        "--baseline", help="compare the results with this baseline JSON file"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="fail if a stage is slower than the baseline by more than this fraction (default: 0.25)",
+    )
+    args = parser.parse_args()
+
+    cases = [
+        case for case in BENCHMARK_CASES if not args.cases or case[0] in args.cases
+    ]
+    report = run_benchmarks(cases, max(1, args.repeats))
+    print_report(report)
+
+    if args.save:
+        with open(args.save, "wt") as file:
+            json.dump(report, file, indent=2)
+        print("\nBaseline written to %s" % args.save)
+
+    if args.baseline:
+        try:
+            with open(args.baseline, "rt") as file:
+                baseline = json.load(file)
+        except (OSError, ValueError) as e:
+            print(e)
+            print("Exiting...")
+            raise SystemExit(1)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(
+                "\n%i stages are more than %.0f%% slower than %s:"
+                % (len(regressions), args.threshold * 100, args.baseline)
+            )
+            for name, stage, before, after in regressions:
+                print(
+                    "%s %s: %.3f ms -> %.3f ms"
+                    % (name, stage, before * 1000, after * 1000)
+                )
+            print("Exiting...")
+            raise SystemExit(1)
+        print(
+            "\nNo stage is more than %.0f%% slower than %s"
+            % (args.threshold * 100, args.baseline)
+        )
@@ -1,13 +1,39 @@
 # Written by Devang Patel
 # GitHub username: acse-dp1820
 
+import logging
+
 import numpy as np
-import scipy.constants
+
+logger = logging.getLogger(__name__)
+# silent unless the application configures logging
+logger.addHandler(logging.NullHandler())
+
+# Exact SI values (2019 redefinition), the same as scipy.constants without importing scipy
+h = 6.62607015e-34  # Planck's constant
+# speed of light must be in cm/s as wavenumber is in cm-1
+c = 299792458.0 * 100
+k = 1.380649e-23  # Boltzmann constant
+# second radiation constant hc/k in cm K, u = c2 * frequency / T
+c2 = h * c / k
+# polynomial fits of 1000*lnB are in x = 10^6 / T^2
+FIT_X_SCALE = 1e6
+
+
+def _ln_mode_partition_functions(u):
+    """
+    Returns the contribution of each mode to lnQ, -u/2 - ln(1 - exp(-u)) with u = hcv/kT. The log term is
+    evaluated as ln(-expm1(-u)), the stable form of log1p(-exp(-u)), which neither underflows for high
+    frequencies / low temperatures nor loses precision for small u.
+    """
+    return -(u / 2) - np.log(-np.expm1(-u))
 
 
 def partition_function(array, temp):
     """
     Given an array of vibrational frequencies, the natural log of the vibrational partition function is calculated.
+    Imaginary (negative) and zero frequencies are not vibrations and are left out of the sum, as in
+    `ln_partition_functions()`.
 
     Calculations taken from: Blanchard, M., Balan, E. and Schauble, E.A., 2017. Reviews in Mineralogy and Geochemistry, 82(1), pp.27-63.
 
@@ -15,37 +41,64 @@ def partition_function(array, temp):
     ------
     array: ndarray
         1-dimensional numpy array of vibrational frequencies
+    temp: float or ndarray
+        temperature, or array of temperatures, in K
 
     Returns:
     -------
-    Q: float
-        natural log of the vibrational partition function
+    Q: float or ndarray
+        natural log of the vibrational partition function, with the same shape as temp
     """
 
-    # Constants imported from scipy.constants
-    h = scipy.constants.h  # Planck's constant
-    # speed of light must be in cm/s as wavenumber is in cm-1
-    c = scipy.constants.c * 100
-    k = scipy.constants.k  # Boltzmann constant
-    T = temp  # extracted from log file using extract_temp()
+    T = np.asarray(temp, dtype=float)  # extracted from log file using extract_temp()
 
     # check if inputs are numpy arrays and convert if not.
-    if not isinstance(array, np.ndarray):
-        np.asarray(array)
+    array = np.asarray(array, dtype=float)
+    array = array[array > 0]
+    # frequencies along the first axis, broadcast against the temperature axes
+    array = array.reshape(array.shape + (1,) * T.ndim)
 
     # conversion to exponent
-    u = (h * array * c) / (k * T)
+    u = (c2 * array) / T
 
     # calculates natural log of an individual frequency contribution to the partition function
-    Q_ = np.log(np.exp(-(u / 2)) / (1 - np.exp(-u)))
-    # sums all the contributions together, giving the final result.
-    Q = np.sum(Q_)
+    Q_ = _ln_mode_partition_functions(u)
+    # sums all the contributions together for each temperature, giving the final result.
+    Q = np.sum(Q_, axis=0)
     return Q
 
 
-def reduced_partition_function_ratio(light_freq, heavy_freq, temp):
+def temperature_grid(start, stop, step):
+    """
+    Creates an array of temperatures from start to stop (inclusive) with the given step.
+
+    Parameters:
+    -----------
+    start: float
+        first temperature in K
+    stop: float
+        last temperature in K
+    step: float
+        temperature step in K
+
+    Returns:
+    --------
+    temps: ndarray
+        1-dimensional array of temperatures
+    """
+    if step <= 0 or stop < start:
+        raise ValueError(
+            "The temperature grid needs start <= stop and a positive step."
+        )
+    # half a step is added to stop so that it is included despite floating point error
+    return np.arange(start, stop + step / 2, step)
+
+
+def reduced_partition_function_ratio(light_freq, heavy_freq, temp, Q_light=None):
     """
     Using the vibrational frequency lists of 2 singly substituted isotopologues, this function calculates the reduced partition function ratio between the 2.
+    Modes that are imaginary (negative) or zero in either isotopologue are left out, with a warning, as in
+    `reduced_partition_function_ratios()`.
 
     Calculations taken from: Blanchard, M., Balan, E. and Schauble, E.A., 2017. Reviews in Mineralogy and Geochemistry, 82(1), pp.27-63.
 
@@ -55,11 +108,24 @@ def reduced_partition_function_ratio(light_freq, heavy_freq, temp):
         vibrational frequencies of the light isotopologue
     heavy_freq: ndarray
         vibrational frequencies of the heavy isotopologue
+    temp: float or ndarray
+        temperature, or array of temperatures, in K
+    Q_light: float or ndarray
+        lnQ' of the light isotopologue at temp, if already calculated - e.g. when many heavy isotopologues
+        are compared with one light isotopologue
 
     Returns:
     --------
-    beta: float
+    beta: float or ndarray
         1000*lnB, where B is the reduced partition function ratio.
+    ratio: float or ndarray
+        ln(v/v')
+    Q_heavy: float or ndarray
+        lnQ, natural log of the heavy isotope's vibrational partition function
+    Q_light: float or ndarray
+        lnQ', natural log of the light isotope's vibrational partition function
+
+    All values have the same shape as temp.
     """
     # check lengths of arrays are the same.
     # The error would only occur if the 2 molecules are different.
@@ -68,30 +134,454 @@ def reduced_partition_function_ratio(light_freq, heavy_freq, temp):
     ), "Array lengths do not match - please ensure both your chosen log files optimise the same molecule!"
 
     # check if numpy array and convert if not.
-    if not isinstance(light_freq, np.ndarray):
-        np.asarray(light_freq)
-    if not isinstance(heavy_freq, np.ndarray):
-        np.asarray(heavy_freq)
+    light_freq = np.asarray(light_freq, dtype=float)
+    heavy_freq = np.asarray(heavy_freq, dtype=float)
+
+    # only modes that are real vibrations in both isotopologues are used
+    valid = (light_freq > 0) & (heavy_freq > 0)
+    if not valid.all():
+        logger.warning(
+            "%i imaginary or zero modes are left out of the reduced partition function ratio.",
+            np.count_nonzero(~valid),
+        )
+        # lnQ' given for the light isotope includes its modes that are invalid in the heavy isotope
+        if Q_light is not None and np.any(light_freq[~valid] > 0):
+            Q_light = None
+        light_freq, heavy_freq = light_freq[valid], heavy_freq[valid]
 
     # calculate ln of ratio of heavy / light frequencies
     ratio = np.log(np.divide(heavy_freq, light_freq))
     # check if length of ratio array is the same as the frequency arrays
     assert len(ratio) == len(light_freq) == len(heavy_freq)
 
-    # add the ratios together
-    ratio = np.sum(ratio)
+    # add the ratios together, the ratio does not depend on temperature
+    ratio = np.sum(ratio) + np.zeros(np.shape(temp))
 
     # calculate vibrational partition functions
-    Q_light = partition_function(light_freq, temp)
+    if Q_light is None:
+        Q_light = partition_function(light_freq, temp)
     Q_heavy = partition_function(heavy_freq, temp)
 
-    # print variables used to calculate RPFR
-    print("Primed variables (v', Q') refer to the light isotope.")
-    print("ln(v/v'): ", ratio)
-    print("lnQ: ", Q_heavy)
-    print("lnQ': ", Q_light)
+    # log variables used to calculate RPFR
+    logger.info("Primed variables (v', Q') refer to the light isotope.")
+    logger.info("ln(v/v'):  %s", ratio)
+    logger.info("lnQ:  %s", Q_heavy)
+    logger.info("lnQ':  %s", Q_light)
 
     # calculate RPFR, defined as 1000*ln(beta).
     beta = 1000 * (ratio + Q_heavy - Q_light)
-    print("1000*lnB: ", beta)
+    logger.info("1000*lnB:  %s", beta)
+    return beta, ratio, Q_heavy, Q_light
+
+
+def pad_frequencies(freq_sets):
+    """
+    Stacks frequency arrays of different lengths into a zero padded 2D matrix with a mask of the real modes.
+
+    Parameters:
+    -----------
+    freq_sets: list
+        list of 1D arrays of vibrational frequencies, one per molecule
+
+    Returns:
+    --------
+    freq: ndarray
+        2D array of frequencies, shape (number of molecules, largest number of frequencies)
+    mask: ndarray
+        2D boolean array, True where freq holds a frequency and False for padding
+    """
+    lengths = np.array([len(f) for f in freq_sets], dtype=int)
+    n_modes = lengths.max() if len(lengths) else 0
+    mask = np.arange(n_modes) < lengths[:, np.newaxis]
+    freq = np.zeros(mask.shape)
+    if mask.any():
+        freq[mask] = np.concatenate([np.asarray(f, dtype=float) for f in freq_sets])
+    return freq, mask
+
+
+def ln_partition_functions(freq, temps, mask=None, max_elements=2**22):
+    """
+    Calculates the natural log of the vibrational partition function of many molecules at many temperatures
+    in one vectorised pass.
+
+    Each mode contributes -u/2 - ln(1 - exp(-u)), with u = hcv/kT - see `_ln_mode_partition_functions()`.
+    Padding, imaginary (negative) and zero frequencies are not vibrations and are left out of the sum.
+
+    Parameters:
+    -----------
+    freq: ndarray
+        2D array of vibrational frequencies, shape (molecules, modes) - see `pad_frequencies()`.
+        A 1D array is treated as a single molecule.
+    temps: float or ndarray
+        temperature, or 1D array of temperatures, in K
+    mask: ndarray
+        2D boolean array, False for padded modes
+    max_elements: int
+        largest number of (molecule, mode, temperature) elements evaluated at once, to bound memory
+
+    Returns:
+    --------
+    Q: ndarray
+        2D array of natural logs of the vibrational partition functions, shape (molecules, temperatures)
+    """
+    freq = np.atleast_2d(np.asarray(freq, dtype=float))
+    temps = np.atleast_1d(np.asarray(temps, dtype=float))
+    valid = freq > 0
+    if mask is not None:
+        valid &= np.atleast_2d(mask)
+    # invalid modes are set to 1 cm-1 so they evaluate without warnings, and are then zeroed
+    freq = np.where(valid, freq, 1.0)
+
+    Q = np.empty((freq.shape[0], temps.size))
+    # molecules evaluated at once, keeping the (molecules, modes, temperatures) array below max_elements
+    step = max(1, max_elements // max(1, freq.shape[1] * temps.size))
+    for i in range(0, freq.shape[0], step):
+        # conversion to exponent, molecules x modes x temperatures
+        u = (c2 * freq[i : i + step, :, np.newaxis]) / temps
+        Q_ = _ln_mode_partition_functions(u)
+        Q[i : i + step] = np.sum(Q_, axis=1, where=valid[i : i + step, :, np.newaxis])
+    return Q
+
+
+def reduced_partition_function_ratios(light_freq, heavy_freq, temps, mask=None):
+    """
+    Calculates the reduced partition function ratio of many light / heavy pairs at many temperatures
+    in one vectorised pass - see `reduced_partition_function_ratio()` for a single pair. Modes that are imaginary
+    (negative) or zero in either isotopologue are left out, with a warning.
+
+    Parameters:
+    -----------
+    light_freq: ndarray
+        2D array of vibrational frequencies of the light isotopologues, shape (pairs, modes)
+    heavy_freq: ndarray
+        2D array of vibrational frequencies of the heavy isotopologues, shape (pairs, modes)
+    temps: float or ndarray
+        temperature, or 1D array of temperatures, in K
+    mask: ndarray
+        2D boolean array, False for padded modes
+
+    Returns:
+    --------
+    beta: ndarray
+        1000*lnB, shape (pairs, temperatures)
+    ratio: ndarray
+        ln(v/v'), shape (pairs,)
+    Q_heavy: ndarray
+        lnQ, shape (pairs, temperatures)
+    Q_light: ndarray
+        lnQ', shape (pairs, temperatures)
+    """
+    light_freq = np.atleast_2d(np.asarray(light_freq, dtype=float))
+    heavy_freq = np.atleast_2d(np.asarray(heavy_freq, dtype=float))
+    assert (
+        light_freq.shape == heavy_freq.shape
+    ), "Array shapes do not match - please ensure both frequency matrices hold the same molecules!"
+
+    # only modes that are real vibrations in both isotopologues are used
+    valid = (light_freq > 0) & (heavy_freq > 0)
+    if mask is not None:
+        valid &= np.atleast_2d(mask)
+        invalid = np.count_nonzero(np.atleast_2d(mask) & ~valid)
+    else:
+        invalid = np.count_nonzero(~valid)
+    if invalid:
+        logger.warning(
+            "%i imaginary or zero modes are left out of the reduced partition function ratios.",
+            invalid,
+        )
+
+    # ln of ratio of heavy / light frequencies, summed over the modes of each pair
+    ratio = np.sum(
+        np.log(np.where(valid, heavy_freq, 1.0) / np.where(valid, light_freq, 1.0)),
+        axis=1,
+    )
+    Q_light = ln_partition_functions(light_freq, temps, valid)
+    Q_heavy = ln_partition_functions(heavy_freq, temps, valid)
+
+    beta = 1000 * (ratio[:, np.newaxis] + Q_heavy - Q_light)
     return beta, ratio, Q_heavy, Q_light
+
+
+def _bigeleisen_mayer_g(u):
+    """
+    Bigeleisen-Mayer function G(u) = 1/2 - 1/u + 1/(e^u - 1), with its series u/12 - u^3/720 for small u.
+    """
+    u = np.asarray(u, dtype=float)
+    small = u < 1e-2
+    # ones in place of the small values avoid dividing by zero
+    safe = np.where(small, 1.0, u)
+    with np.errstate(over="ignore"):
+        g = 0.5 - 1 / safe + 1 / np.expm1(safe)
+    return np.where(small, u / 12 - u**3 / 720, g)
+
+
+def bigeleisen_mayer(light_freq, heavy_freq, temps, mask=None):
+    """
+    Screens many light / heavy pairs with the Bigeleisen-Mayer approximation of the reduced partition function ratio,
+    in closed form from the frequency shifts - see `reduced_partition_function_ratios()` for the exact values.
+
+    For every mode, ln(B) = integral of G(u) du from u to u', where u = hcv/kT of the heavy isotope and u' of the light
+    isotope. The Bigeleisen-Mayer approximation is G(u') (u' - u). G increases with u, so the exact value of each mode
+    lies between G(u) (u' - u) and G(u') (u' - u), which bounds the error of the approximation.
+
+    Parameters:
+    -----------
+    light_freq: ndarray
+        2D array of vibrational frequencies of the light isotopologues, shape (pairs, modes)
+    heavy_freq: ndarray
+        2D array of vibrational frequencies of the heavy isotopologues, shape (pairs, modes)
+    temps: float or ndarray
+        temperature, or 1D array of temperatures, in K
+    mask: ndarray
+        2D boolean array, False for padded modes
+
+    Returns:
+    --------
+    beta: ndarray
+        Bigeleisen-Mayer approximation of 1000*lnB, shape (pairs, temperatures)
+    lower: ndarray
+        lower bound of the exact 1000*lnB, shape (pairs, temperatures)
+    upper: ndarray
+        upper bound of the exact 1000*lnB, shape (pairs, temperatures)
+    """
+    light_freq = np.atleast_2d(np.asarray(light_freq, dtype=float))
+    heavy_freq = np.atleast_2d(np.asarray(heavy_freq, dtype=float))
+    assert (
+        light_freq.shape == heavy_freq.shape
+    ), "Array shapes do not match - please ensure both frequency matrices hold the same molecules!"
+
+    # only modes that are real vibrations in both isotopologues are used, the others are set to 0 (no shift)
+    valid = (light_freq > 0) & (heavy_freq > 0)
+    if mask is not None:
+        valid &= np.atleast_2d(mask)
+    light_freq = np.where(valid, light_freq, 0.0)
+    heavy_freq = np.where(valid, heavy_freq, 0.0)
+
+    # (pairs, modes, temperatures)
+    T = np.atleast_1d(np.asarray(temps, dtype=float))
+    u_light = c2 * light_freq[:, :, np.newaxis] / T
+    u_heavy = c2 * heavy_freq[:, :, np.newaxis] / T
+    shift = u_light - u_heavy
+    g_light = _bigeleisen_mayer_g(u_light) * shift
+    g_heavy = _bigeleisen_mayer_g(u_heavy) * shift
+
+    beta = 1000 * np.sum(g_light, axis=1)
+    lower = 1000 * np.sum(np.minimum(g_light, g_heavy), axis=1)
+    upper = 1000 * np.sum(np.maximum(g_light, g_heavy), axis=1)
+    return beta, lower, upper
+
+
+def high_temperature_expansion(light_freq, heavy_freq, temps, mask=None):
+    """
+    Calculates the leading term of the high temperature expansion of the reduced partition function ratio,
+    1000*lnB = 1000/24 * sum(u'^2 - u^2), which falls as 1/T^2.
+
+    Parameters:
+    -----------
+    light_freq: ndarray
+        2D array of vibrational frequencies of the light isotopologues, shape (pairs, modes)
+    heavy_freq: ndarray
+        2D array of vibrational frequencies of the heavy isotopologues, shape (pairs, modes)
+    temps: float or ndarray
+        temperature, or 1D array of temperatures, in K
+    mask: ndarray
+        2D boolean array, False for padded modes
+
+    Returns:
+    --------
+    beta: ndarray
+        1000*lnB, shape (pairs, temperatures)
+    """
+    light_freq = np.atleast_2d(np.asarray(light_freq, dtype=float))
+    heavy_freq = np.atleast_2d(np.asarray(heavy_freq, dtype=float))
+    valid = (light_freq > 0) & (heavy_freq > 0)
+    if mask is not None:
+        valid &= np.atleast_2d(mask)
+    # sum of the squared frequency shifts in cm-2, then scaled by (hc/kT)^2 for every temperature
+    shift = np.sum(np.where(valid, light_freq**2 - heavy_freq**2, 0.0), axis=1)
+    T = np.atleast_1d(np.asarray(temps, dtype=float))
+    return 1000 / 24 * shift[:, np.newaxis] * (c2 / T) ** 2
+
+
+def polynomial_fit(temps, beta, degree=3):
+    """
+    Least squares fit of 1000*lnB = a*x + b*x^2 + c*x^3 (for degree 3), with x = 10^6/T^2, the form in which
+    RPFRs are tabulated in the geochemical literature. The residuals are relative to 1000*lnB, which falls by
+    orders of magnitude over a wide temperature grid: an unweighted fit is dominated by the low temperatures
+    and is off by several % at the high temperatures. Every pair is fitted in one call, as the pairs share
+    the temperatures.
+
+    Parameters:
+    -----------
+    temps: ndarray
+        1D array of temperatures in K, at least `degree` of them, e.g. a dense grid from `temperature_grid()`
+    beta: ndarray
+        1000*lnB at each temperature, shape (pairs, temperatures). A 1D array is treated as a single pair.
+    degree: int
+        number of coefficients, the polynomial has no constant term as lnB vanishes at infinite temperature
+
+    Returns:
+    --------
+    coefficients: ndarray
+        (pairs, degree) coefficients of x, x^2, ... - see `polynomial_beta()`
+    rms: ndarray
+        (pairs,) root mean square residual of the fit
+    max_residual: ndarray
+        (pairs,) largest absolute residual of the fit
+    max_relative: ndarray
+        (pairs,) largest residual of the fit relative to 1000*lnB
+    """
+    temps = np.atleast_1d(np.asarray(temps, dtype=float))
+    beta = np.atleast_2d(np.asarray(beta, dtype=float))
+    if len(temps) < degree:
+        raise ValueError(
+            "At least %i temperatures are needed to fit %i coefficients."
+            % (degree, degree)
+        )
+    x = FIT_X_SCALE / temps**2
+    X = x[:, np.newaxis] ** np.arange(1, degree + 1)
+    # the columns are normalised, as x^3 is orders of magnitude larger than x at low temperatures
+    norm = np.linalg.norm(X, axis=0)
+    # each pair weights its temperatures by 1/|1000*lnB|, bounded where 1000*lnB crosses 0
+    size = np.abs(beta)
+    largest = size.max(axis=1, keepdims=True)
+    size = np.maximum(size, np.where(largest > 0, 1e-9 * largest, 1.0))
+    A = (X / norm)[np.newaxis] / size[:, :, np.newaxis]
+    # one QR decomposition per pair, stacked
+    q, r = np.linalg.qr(A)
+    rhs = np.swapaxes(q, 1, 2) @ (beta / size)[:, :, np.newaxis]
+    coefficients = np.linalg.solve(r, rhs)[:, :, 0] / norm
+    residuals = beta - coefficients @ X.T
+    return (
+        coefficients,
+        np.sqrt(np.mean(residuals**2, axis=1)),
+        np.max(np.abs(residuals), axis=1),
+        np.max(np.abs(residuals) / size, axis=1),
+    )
+
+
+def polynomial_beta(coefficients, temps):
+    """
+    Evaluates the polynomial fits of 1000*lnB from `polynomial_fit()` at any temperatures, without the
+    frequencies.
+
+    Parameters:
+    -----------
+    coefficients: ndarray
+        (pairs, degree) coefficients of x, x^2, ..., with x = 10^6/T^2. A 1D array is a single pair.
+    temps: float or ndarray
+        temperature, or 1D array of temperatures, in K
+
+    Returns:
+    --------
+    beta: ndarray
+        1000*lnB, shape (pairs, temperatures), or (temperatures,) for a single pair
+    """
+    coefficients = np.asarray(coefficients, dtype=float)
+    x = FIT_X_SCALE / np.atleast_1d(np.asarray(temps, dtype=float)) ** 2
+    # Horner's rule, from the highest power
+    beta = np.zeros(coefficients.shape[:-1] + x.shape)
+    for j in reversed(range(coefficients.shape[-1])):
+        beta = (beta + coefficients[..., j, np.newaxis]) * x
+    return beta
+
+
+def teller_redlich(light_masses, heavy_masses, coordinates):
+    """
+    Calculates ln(v/v') expected from the Teller-Redlich product rule, from the atomic masses and moments of inertia:
+    prod(v/v') = prod(m'/m)^(3/2) * (M/M')^(3/2) * prod(I/I')^(1/2), where unprimed values are the heavy isotope.
+    Comparing it with the ln(v/v') of the frequencies checks the frequencies of both isotopologues are consistent.
+
+    Parameters:
+    -----------
+    light_masses: ndarray
+        masses of the atoms of the light isotopologues in u, shape (atoms,) or (pairs, atoms),
+        padded with zero masses
+    heavy_masses: ndarray
+        masses of the atoms of the heavy isotopologues in u, same shape as light_masses
+    coordinates: ndarray
+        cartesian coordinates of the atoms in Angstrom, shape (atoms, 3) or (pairs, atoms, 3)
+
+    Returns:
+    --------
+    ratio: ndarray
+        expected ln(v/v'), shape (pairs,)
+    """
+    light_masses = np.atleast_2d(np.asarray(light_masses, dtype=float))
+    heavy_masses = np.atleast_2d(np.asarray(heavy_masses, dtype=float))
+    coordinates = np.asarray(coordinates, dtype=float)
+    if coordinates.ndim == 2:
+        coordinates = np.broadcast_to(coordinates, light_masses.shape + (3,))
+
+    def ln_moments(masses):
+        # principal moments of inertia about the centre of mass
+        com = (
+            np.einsum("pn,pnx->px", masses, coordinates)
+            / masses.sum(axis=1)[:, np.newaxis]
+        )
+        r = coordinates - com[:, np.newaxis]
+        inertia = np.einsum("pn,pnx,pny->pxy", masses, r, r)
+        inertia = (
+            np.trace(inertia, axis1=1, axis2=2)[:, np.newaxis, np.newaxis] * np.eye(3)
+            - inertia
+        )
+        return np.linalg.eigvalsh(inertia)
+
+    I_light = ln_moments(light_masses)
+    I_heavy = ln_moments(heavy_masses)
+    # the moment about the axis of a linear molecule is zero and does not contribute
+    rotating = I_light > 1e-8 * I_light.max(axis=1, keepdims=True)
+    inertia = 0.5 * np.sum(
+        np.log(np.where(rotating, I_heavy, 1.0) / np.where(rotating, I_light, 1.0)),
+        axis=1,
+    )
+
+    atoms = light_masses > 0
+    masses = 1.5 * np.sum(
+        np.log(np.where(atoms, light_masses, 1.0) / np.where(atoms, heavy_masses, 1.0)),
+        axis=1,
+    )
+    total = 1.5 * np.log(heavy_masses.sum(axis=1) / light_masses.sum(axis=1))
+    return masses + total + inertia
+
+
+def fractionation_matrix(beta):
+    """
+    Calculates the equilibrium fractionation between every pair of species at every temperature,
+    1000*ln(alpha_AB) = 1000*lnB(A) - 1000*lnB(B), by broadcasting the RPFRs against each other.
+
+    Parameters:
+    -----------
+    beta: ndarray
+        1000*lnB of every species, shape (species, temperatures) - see `beta_table()`
+
+    Returns:
+    --------
+    delta: ndarray
+        shape (species, species, temperatures), delta[i, j] is the fractionation between species i and j
+    """
+    beta = np.atleast_2d(np.asarray(beta, dtype=float))
+    return beta[:, np.newaxis, :] - beta[np.newaxis, :, :]
+
+
+def fractionation_pairs(beta):
+    """
+    Calculates the fractionation between each unordered pair of species, the upper triangle of
+    `fractionation_matrix()`, without building the full matrix. delta[j, i] is -delta[i, j] and delta[i, i] is 0,
+    so these values hold all of the matrix in under half of the memory.
+
+    Parameters:
+    -----------
+    beta: ndarray
+        1000*lnB of every species, shape (species, temperatures)
+
+    Returns:
+    --------
+    first, second: ndarray
+        (pairs,) indices of the species of each pair, first < second
+    delta: ndarray
+        (pairs, temperatures) fractionation between the first and second species of each pair
+    """
+    beta = np.atleast_2d(np.asarray(beta, dtype=float))
+    first, second = np.triu_indices(len(beta), 1)
+    return first, second, beta[first] - beta[second]
@@ -0,0 +1,579 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import logging
+
+import numpy as np
+
+from calculations.calculations import (
+    bigeleisen_mayer,
+    partition_function,
+    reduced_partition_function_ratio,
+)
+from extractions.extract import extract_frequencies, extract_isotope, extract_temp
+from extractions.scanner import LogRecord, scan_log
+from file_io import trace
+from file_io.check import check_low_freq, check_optimisation, filename_check
+from isotope_contribution.functions import (
+    displacement_norms,
+    displacement_tensor,
+    get_atomic_number,
+    isotope_atoms,
+    moving_modes,
+    participation,
+)
+
+logger = logging.getLogger(__name__)
+# silent unless the application configures logging
+logger.addHandler(logging.NullHandler())
+
+
+class RPFRError(ValueError):
+    """
+    Raised when the reduced partition function ratio of a pair cannot be calculated.
+    """
+
+
+class RPFRResult:
+    """
+    Result of a reduced partition function ratio calculation by `RPFRCalculator.calculate()`.
+    Values that could not be extracted or calculated are None.
+
+    Attributes:
+    -----------
+    light_filename, heavy_filename: str
+        locations of the light / heavy isotope log files
+    light_record, heavy_record: LogRecord
+        information extracted from the log files
+    element: str
+        Element that has isotopic information
+    light_isotope, heavy_isotope: int
+        Mass numbers of the light / heavy isotopes
+    temperature: float
+        Temperature of the simulations in K
+    light_table, heavy_table: str
+        Item convergence tables
+    light_low_freq, heavy_low_freq: list
+        Low frequencies
+    light_freq, heavy_freq: ndarray
+        Vibrational frequencies
+    beta: float
+        1000*lnB, where B is the reduced partition function ratio
+    ratio, Q_heavy, Q_light: float
+        ln(v/v'), lnQ and lnQ' - the components of beta
+    isotope_atoms: ndarray
+        Indices (from 0) of the atoms that carry the isotope substitution
+    light_cont, heavy_cont: ndarray
+        Displacement norm of the isotope in each frequency - see `displacement_norms()`
+    light_participation, heavy_participation: ndarray
+        Mass weighted participation of the isotope in each frequency - see `participation()`
+    light_freq_cont, heavy_freq_cont: ndarray
+        The frequencies that contain movement of the isotope
+    beta_cont, ratio_cont, Q_heavy_cont, Q_light_cont: float
+        RPFR and its components calculated with the frequencies that contain isotope movement
+    beta_bm, beta_lower, beta_upper: float
+        Bigeleisen-Mayer approximation of beta and the bounds of the exact beta - see `bigeleisen_mayer()`
+    screened: bool
+        True if the exact RPFR was not calculated as beta_upper is below the screening threshold
+    temperatures: ndarray
+        Temperature grid in K, if requested
+    beta_curve, ratio_curve, Q_heavy_curve, Q_light_curve: ndarray
+        RPFR and its components over the temperature grid
+    warnings: list
+        Warnings raised during the calculation
+    """
+
+    def __init__(self, light_filename, heavy_filename):
+        self.light_filename = light_filename
+        self.heavy_filename = heavy_filename
+        self.light_record = None
+        self.heavy_record = None
+        self.element = None
+        self.light_isotope = None
+        self.heavy_isotope = None
+        self.temperature = None
+        self.light_table = None
+        self.heavy_table = None
+        self.light_low_freq = None
+        self.heavy_low_freq = None
+        self.light_freq = None
+        self.heavy_freq = None
+        self.beta_bm = None
+        self.beta_lower = None
+        self.beta_upper = None
+        self.screened = False
+        self.beta = None
+        self.ratio = None
+        self.Q_heavy = None
+        self.Q_light = None
+        self.isotope_atoms = None
+        self.light_cont = None
+        self.heavy_cont = None
+        self.light_participation = None
+        self.heavy_participation = None
+        self.light_freq_cont = None
+        self.heavy_freq_cont = None
+        self.beta_cont = None
+        self.ratio_cont = None
+        self.Q_heavy_cont = None
+        self.Q_light_cont = None
+        self.temperatures = None
+        self.beta_curve = None
+        self.ratio_curve = None
+        self.Q_heavy_curve = None
+        self.Q_light_curve = None
+        self.warnings = []
+
+
+class RPFRCalculator:
+    """
+    Calculates the reduced partition function ratio between 2 singly substituted isotopologues from their
+    Gaussian log files, without printing or prompting. Progress is reported through the `logging` module.
+
+    Parameters:
+    -----------
+    linear: bool
+        True if the molecule is linear
+    tail: bool
+        only parse the last frequency section of each log file - see `scan_log()`
+    cache: bool
+        reuse parsed log files from the on-disk cache - see `cached_scan_log()`
+    unconverged: str or callable
+        what to do if a log file has no converged item convergence table: "continue" with a warning,
+        "fail" with an RPFRError, or a function that is given the question and returns True to continue
+    missing_frequencies: str or callable
+        what to do if a log file has no frequencies, as for `unconverged`
+    contributions: bool
+        also estimate the isotope movement in each frequency and calculate the RPFR with the frequencies
+        that contain isotope movement
+    movement_threshold: float
+        the isotope moves in a frequency if its displacement norm is larger than this value
+    min_participation: float
+        and if its mass weighted participation in the frequency is larger than this value
+    screen_below: float
+        if given, the exact RPFR is only calculated if the upper Bigeleisen-Mayer bound of beta, which is always
+        calculated first, is not below this value
+    job: int
+        only parse this job of multi-job (Link1) log files, numbered from 1, instead of the last frequency
+        job - see `scan_job()`
+    """
+
+    def __init__(
+        self,
+        linear=False,
+        tail=False,
+        cache=False,
+        unconverged="continue",
+        missing_frequencies="fail",
+        contributions=True,
+        movement_threshold=0.0,
+        min_participation=0.0,
+        screen_below=None,
+        job=None,
+    ):
+        self.linear = linear
+        self.tail = tail
+        self.job = job
+        self.cache = cache
+        self.unconverged = unconverged
+        self.missing_frequencies = missing_frequencies
+        self.contributions = contributions
+        self.movement_threshold = movement_threshold
+        self.min_participation = min_participation
+        self.screen_below = screen_below
+
+    def load(self, log):
+        """
+        Scans a log file, or passes a record from `scan_log()` through.
+
+        Parameters:
+        -----------
+        log: str or LogRecord
+            location of the Gaussian log file, or its record
+
+        Returns:
+        --------
+        record: LogRecord
+            Information extracted from the log file
+        """
+        if isinstance(log, LogRecord):
+            return log
+        with trace.span("file check", file=log):
+            filename_check(log)
+        if self.cache:
+            # imported here as the cache is optional and its dependencies slow down start up
+            from extractions.cache import cached_scan_log
+
+            with trace.span("cache", file=log):
+                return cached_scan_log(log, tail=self.tail, job=self.job)
+        return scan_log(log, tail=self.tail, job=self.job)
+
+    def _continue(self, policy, question, warning, result):
+        """
+        Applies an `unconverged` / `missing_frequencies` policy, raising an RPFRError if the calculation stops.
+        """
+        result.warnings.append(warning)
+        if callable(policy):
+            carry_on = policy(question)
+        else:
+            carry_on = policy == "continue"
+        if not carry_on:
+            raise RPFRError(warning)
+
+    def _extract(self, result, side, record):
+        """
+        Extracts the isotopic information, convergence table, low frequencies and frequencies of one isotope.
+        """
+        name = side.capitalize()
+        logger.info(
+            "\n----------- %s ISOTOPE FREQ. EXTRACTION -----------\n", side.upper()
+        )
+        logger.info("The %s isotope log file is:  %s", side, record.filename)
+
+        # elemental + isotopic information
+        if record.element is not None:
+            logger.info("Extracting isotopic information.")
+            element, isotope = extract_isotope(record)
+            result.element = element
+            setattr(result, side + "_isotope", isotope)
+        else:
+            logger.info("%s isotope nonexistent. Unable to extract.", name)
+            result.warnings.append("%s isotope not found" % side)
+
+        # check item convergence table
+        if record.table is not None:
+            logger.info("Extracting item convergence table")
+            setattr(result, side + "_table", check_optimisation(record))
+        else:
+            logger.info("Convergence table for optimised molecule not found.")
+            self._continue(
+                self.unconverged,
+                "Your molecule may be unoptimised - would you like to continue? [y/n]",
+                "%s isotope may be unoptimised" % side,
+                result,
+            )
+
+        # check low frequencies
+        if record.low_freq:
+            logger.info("Extracting low frequencies.")
+            setattr(result, side + "_low_freq", check_low_freq(record))
+        else:
+            logger.info("Low frequencies not found.")
+
+        # extracting frequencies
+        if len(record.frequencies) > 0:
+            logger.info("Extracting frequencies.")
+            linear_check = "y" if self.linear else "n"
+            try:
+                freq = extract_frequencies(record, linear_check)
+            except ValueError as e:
+                raise RPFRError(str(e)) from e
+            setattr(result, side + "_freq", freq)
+        else:
+            logger.info("Frequencies not found.")
+            self._continue(
+                self.missing_frequencies,
+                "Would you like to continue? [y/n] ",
+                "%s isotope frequencies not found" % side,
+                result,
+            )
+
+    def reference(self, light, temperatures=None):
+        """
+        Extracts a light isotopologue and calculates its lnQ' once, to calculate the RPFR of many heavy
+        isotopologues against it with `calculate()`.
+
+        Parameters:
+        -----------
+        light: str or LogRecord
+            location of the light isotope log file, or its record from `scan_log()`
+        temperatures: ndarray
+            optional temperature grid in K to also calculate lnQ' over
+
+        Returns:
+        --------
+        reference: RPFRResult
+            result with the light isotope information, temperature and lnQ' filled in
+
+        Raises:
+        -------
+        RPFRError
+            if the log file has no temperature or no frequencies
+        """
+        l_record = self.load(light)
+        reference = RPFRResult(l_record.filename, None)
+        reference.light_record = l_record
+
+        if l_record.temperature is None:
+            raise RPFRError(
+                "Temperature not found in %s.\n"
+                "The reduced partition function will not be calculated."
+                % l_record.filename
+            )
+        reference.temperature = extract_temp(l_record)
+        with trace.span("extract", file=l_record.filename):
+            self._extract(reference, "light", l_record)
+        if reference.light_freq is None:
+            raise RPFRError("Frequencies not found in %s." % l_record.filename)
+
+        reference.Q_light = partition_function(
+            reference.light_freq, reference.temperature
+        )
+        if temperatures is not None:
+            reference.temperatures = temperatures
+            reference.Q_light_curve = partition_function(
+                reference.light_freq, temperatures
+            )
+        return reference
+
+    def calculate(self, light, heavy, temperatures=None):
+        """
+        Calculates the reduced partition function ratio between a light and a heavy isotopologue.
+
+        Parameters:
+        -----------
+        light: str, LogRecord or RPFRResult
+            location of the light isotope log file, its record from `scan_log()`, or a reference from
+            `reference()` whose extracted information and lnQ' are reused
+        heavy: str or LogRecord
+            location of the heavy isotope log file, or its record from `scan_log()`
+        temperatures: ndarray
+            optional temperature grid in K to also calculate the RPFR over
+
+        Returns:
+        --------
+        result: RPFRResult
+            RPFR, its components, the extracted information and any warnings
+
+        Raises:
+        -------
+        RPFRError
+            if the RPFR cannot be calculated, e.g. missing or different temperatures
+        """
+        reference = light if isinstance(light, RPFRResult) else None
+        l_record = reference.light_record if reference else self.load(light)
+        h_record = self.load(heavy)
+        result = RPFRResult(l_record.filename, h_record.filename)
+        result.light_record = l_record
+        result.heavy_record = h_record
+
+        logger.info("\n------------------ TEMPERATURE CHECK ------------------\n")
+
+        if l_record.temperature is None or h_record.temperature is None:
+            raise RPFRError(
+                "Temperature not found in either log file.\n"
+                "The reduced partition function will not be calculated."
+            )
+        logger.info("Extracting temperature values from the log files...")
+        # extract temperature values from log files
+        l_temp = extract_temp(l_record)
+        h_temp = extract_temp(h_record)
+        logger.info("Checking the temperature values in both log files are equal.")
+        # if not, there are inconsistencies between the log files
+        if l_temp != h_temp:
+            raise RPFRError(
+                "The temperatures are not the same! Please check for inconsistencies in log files."
+            )
+        # set the temperature equal to light isotope temp (arbitrary)
+        result.temperature = l_temp
+        logger.info("Temperature:  %s  K\n", result.temperature)
+
+        if reference is None:
+            with trace.span("extract", file=l_record.filename):
+                self._extract(result, "light", l_record)
+        else:
+            # the light isotope was extracted once by `reference()`
+            result.element = reference.element
+            result.light_isotope = reference.light_isotope
+            result.light_table = reference.light_table
+            result.light_low_freq = reference.light_low_freq
+            result.light_freq = reference.light_freq
+            result.warnings.extend(reference.warnings)
+        with trace.span("extract", file=h_record.filename):
+            self._extract(result, "heavy", h_record)
+
+        logger.info("\n--------------------- CALCULATION ---------------------\n")
+
+        light_freq = result.light_freq
+        heavy_freq = result.heavy_freq
+        # calculating RPFR, if frequencies exist.
+        if light_freq is None or heavy_freq is None:
+            logger.info("Unable to calculate the reduced partition function ratio.")
+            logger.info(
+                "Unable to ascertain isotope movement for individual frequencies."
+            )
+            return result
+        if len(light_freq) != len(heavy_freq):
+            raise RPFRError(
+                "Array lengths do not match - please ensure both your chosen log files optimise the same molecule!"
+            )
+
+        # the Bigeleisen-Mayer approximation is cheap, screening only decides whether the exact RPFR is skipped
+        with trace.span("screening"):
+            beta_bm, lower, upper = bigeleisen_mayer(
+                light_freq, heavy_freq, result.temperature
+            )
+        result.beta_bm = float(beta_bm[0, 0])
+        result.beta_lower = float(lower[0, 0])
+        result.beta_upper = float(upper[0, 0])
+        logger.info(
+            "Bigeleisen-Mayer 1000*lnB: %s, exact value between %s and %s",
+            result.beta_bm,
+            result.beta_lower,
+            result.beta_upper,
+        )
+        if self.screen_below is not None and result.beta_upper < self.screen_below:
+            logger.info(
+                "Upper bound below the screening threshold of %s, the exact RPFR is not calculated.",
+                self.screen_below,
+            )
+            result.screened = True
+            return result
+
+        logger.info("Now calculating the reduced partition function ratio...")
+        with trace.span("calculation"):
+            (
+                result.beta,
+                result.ratio,
+                result.Q_heavy,
+                result.Q_light,
+            ) = reduced_partition_function_ratio(
+                light_freq,
+                heavy_freq,
+                result.temperature,
+                reference.Q_light if reference else None,
+            )
+
+        # calculating RPFR over the temperature grid, if requested
+        if temperatures is not None:
+            logger.info(
+                "\nNow calculating the reduced partition function ratio from %s K to %s K...",
+                temperatures[0],
+                temperatures[-1],
+            )
+            result.temperatures = temperatures
+            with trace.span("calculation", temperatures=len(temperatures)):
+                (
+                    result.beta_curve,
+                    result.ratio_curve,
+                    result.Q_heavy_curve,
+                    result.Q_light_curve,
+                ) = reduced_partition_function_ratio(
+                    light_freq,
+                    heavy_freq,
+                    temperatures,
+                    (
+                        reference.Q_light_curve
+                        if reference is not None
+                        and np.array_equal(reference.temperatures, temperatures)
+                        else None
+                    ),
+                )
+
+        if self.contributions:
+            with trace.span("contributions"):
+                self._contributions(result)
+        return result
+
+    def _contributions(self, result):
+        """
+        Estimates the isotope movement in each frequency and calculates the RPFR with the frequencies that
+        contain isotope movement.
+        """
+        logger.info("\n-------------- CONTRIBUTIONS TO FREQUENCY --------------\n")
+
+        logger.info(
+            "This section calculates the extent to which the isotope moves for each frequency."
+        )
+        logger.info(
+            "The atomic number is extracted from isotope_contribution/atomic_number.csv. If the element you need is not present, please add it."
+        )
+        logger.info(
+            "The displacement norm and mass weighted participation of the isotope are calculated for each frequency and stored in arrays."
+        )
+
+        if result.element is None:
+            logger.info("Isotope not found. Unable to ascertain isotope movement.")
+            result.warnings.append(
+                "isotope movement not ascertained, isotope not found"
+            )
+            return
+
+        # getting atomic number
+        try:
+            atomic_number = get_atomic_number(result.element)
+        except ValueError as e:
+            logger.warning(str(e))
+            result.warnings.append(str(e))
+            return
+
+        # the substituted atoms, and the normal modes of both isotopologues
+        records = [result.light_record, result.heavy_record]
+        atoms = isotope_atoms(records, atomic_number)
+        l_modes, _ = displacement_tensor(result.light_record)
+        h_modes, _ = displacement_tensor(result.heavy_record)
+        # there must be one normal mode per frequency
+        if len(l_modes) != len(result.light_freq) or len(h_modes) != len(
+            result.heavy_freq
+        ):
+            message = "Error - number of normal modes does not equal the length of the frequency array!"
+            logger.warning(message)
+            result.warnings.append(message)
+            return
+        result.isotope_atoms = atoms
+        logger.info("Isotope atoms: %s", atoms + 1)
+
+        result.light_cont = displacement_norms(l_modes, atoms)
+        result.heavy_cont = displacement_norms(h_modes, atoms)
+        result.light_participation = participation(
+            l_modes, atoms, result.light_record.masses
+        )
+        result.heavy_participation = participation(
+            h_modes, atoms, result.heavy_record.masses
+        )
+
+        # determining the frequencies in which the isotope moves more than the thresholds
+        # this is done by indexing the frequency arrays with the selected modes
+        result.light_freq_cont = result.light_freq[
+            moving_modes(
+                l_modes,
+                atoms,
+                result.light_record.masses,
+                self.movement_threshold,
+                self.min_participation,
+            )
+        ]
+        result.heavy_freq_cont = result.heavy_freq[
+            moving_modes(
+                h_modes,
+                atoms,
+                result.heavy_record.masses,
+                self.movement_threshold,
+                self.min_participation,
+            )
+        ]
+
+        logger.info(
+            "Frequency contributions ascertained.\nNumber of frequencies that have light isotope movement: %i.\nNumber of frequencies that have heavy isotope movement: %i.\n",
+            len(result.light_freq_cont),
+            len(result.heavy_freq_cont),
+        )
+
+        if len(result.light_freq_cont) != len(result.heavy_freq_cont):
+            logger.info(
+                "The number of light / heavy frequencies that contain isotope movement are not the same. Unable to calculate secondary RPFR."
+            )
+            return
+
+        logger.info(
+            "The number of light / heavy frequencies that contain isotope movement are the same.\nCalculating RPFR with selected frequencies - treat this result with caution."
+        )
+        logger.info("Now calculating the reduced partition function ratio...")
+        (
+            result.beta_cont,
+            result.ratio_cont,
+            result.Q_heavy_cont,
+            result.Q_light_cont,
+        ) = reduced_partition_function_ratio(
+            result.light_freq_cont, result.heavy_freq_cont, result.temperature
+        )
@@ -0,0 +1,243 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import logging
+
+import numpy as np
+
+from calculations.calculations import c, reduced_partition_function_ratios
+from isotope_contribution.functions import get_atomic_number, get_isotope_mass
+
+logger = logging.getLogger(__name__)
+# silent unless the application configures logging
+logger.addHandler(logging.NullHandler())
+
+# CODATA 2018 values to convert Hessian eigenvalues from Hartree/(Bohr^2 u) to s^-2
+HARTREE = 4.3597447222071e-18  # J
+BOHR = 5.29177210903e-11  # m
+AMU = 1.66053906660e-27  # kg
+# eigenvalue in Hartree/(Bohr^2 u) to wavenumber in cm-1: sqrt(eigenvalue * UNIT) / (2 pi c)
+UNIT = HARTREE / (BOHR**2 * AMU)
+
+
+def _rigid_body_modes(coordinates, masses):
+    """
+    Returns orthonormal mass weighted translation and rotation vectors, (K, 3N, R), R = 6 (5 if linear).
+    """
+    masses = np.atleast_2d(masses)
+    sqrt_m = np.sqrt(masses)[:, :, np.newaxis]
+    # positions relative to the centre of mass of every mass assignment
+    com = (
+        np.einsum("kn,nx->kx", masses, coordinates) / masses.sum(axis=1)[:, np.newaxis]
+    )
+    r = coordinates[np.newaxis] - com[:, np.newaxis]
+
+    vectors = []
+    for axis in np.eye(3):
+        # translation along the axis
+        vectors.append((np.broadcast_to(axis, r.shape) * sqrt_m).reshape(len(r), -1))
+        # rotation about the axis
+        vectors.append((np.cross(axis, r) * sqrt_m).reshape(len(r), -1))
+    # orthonormalise, the rotation about the axis of a linear molecule vanishes
+    q, s, _ = np.linalg.svd(np.stack(vectors, axis=2), full_matrices=False)
+    rank = int(np.sum(s[0] > 1e-6 * s[0].max()))
+    return q[:, :, :rank]
+
+
+def harmonic_frequencies(hessian, coordinates, masses):
+    """
+    Calculates the harmonic vibrational frequencies of one or more isotopologues from a cartesian Hessian.
+
+    The Hessian is mass weighted with each set of masses, the translations and rotations are projected out
+    and the result is diagonalised. All sets of masses are diagonalised in one call.
+
+    Parameters:
+    -----------
+    hessian: ndarray
+        (3N, 3N) cartesian second derivatives of the energy in Hartree/Bohr^2 - see `read_hessian()`
+    coordinates: ndarray
+        (N, 3) cartesian coordinates in Angstrom
+    masses: ndarray
+        (N,) mass of each atom in u, or (K, N) for K isotopologues
+
+    Returns:
+    --------
+    freq: ndarray
+        vibrational frequencies in cm-1 in ascending order, imaginary frequencies as negative values,
+        shape (3N-6,) or (K, 3N-6) - 3N-5 for linear molecules
+    """
+    masses = np.asarray(masses, dtype=float)
+    single = masses.ndim == 1
+    masses = np.atleast_2d(masses)
+
+    # mass weighted Hessian of every isotopologue, H_ij / sqrt(m_i m_j)
+    inv_sqrt_m = 1 / np.sqrt(np.repeat(masses, 3, axis=1))
+    weighted = hessian * inv_sqrt_m[:, :, np.newaxis] * inv_sqrt_m[:, np.newaxis, :]
+
+    # projecting out translations and rotations, P H P with P = 1 - D D^T
+    d = _rigid_body_modes(np.asarray(coordinates, dtype=float), masses)
+    projector = np.eye(hessian.shape[0]) - d @ np.swapaxes(d, 1, 2)
+    eigenvalues = np.linalg.eigvalsh(projector @ weighted @ projector)
+
+    # the smallest eigenvalues in magnitude belong to the projected translations and rotations
+    order = np.argsort(np.abs(eigenvalues), axis=1)[:, d.shape[2] :]
+    eigenvalues = np.sort(np.take_along_axis(eigenvalues, order, axis=1), axis=1)
+    freq = np.sign(eigenvalues) * np.sqrt(np.abs(eigenvalues) * UNIT) / (2 * np.pi * c)
+    return freq[0] if single else freq
+
+
+def substitution_sites(atomic_numbers, element, sites=None):
+    """
+    Finds the atoms of an element that can be substituted by one of its isotopes.
+
+    Parameters:
+    -----------
+    atomic_numbers: ndarray
+        (N,) atomic number of each atom
+    element: str
+        Element symbol
+    sites: list
+        indices (from 1) of the atoms to substitute, every atom of the element if None
+
+    Returns:
+    --------
+    sites: ndarray
+        indices (from 0) of the atoms
+    """
+    atomic_number = get_atomic_number(element)
+    candidates = np.flatnonzero(np.asarray(atomic_numbers) == atomic_number)
+    if sites is None:
+        return candidates
+    sites = np.asarray(sites, dtype=int) - 1
+    invalid = np.setdiff1d(sites, candidates)
+    if len(invalid):
+        raise ValueError(
+            "Atoms %s are not %s atoms." % (", ".join(map(str, invalid + 1)), element)
+        )
+    return sites
+
+
+class IsotopologueResult:
+    """
+    Reduced partition function ratios of singly substituted isotopologues from `isotopologue_rpfrs()`.
+    Row i of each array belongs to the substitution of atom `sites[i]` by isotope `heavy_isotopes[i]`.
+
+    Attributes:
+    -----------
+    element: str
+        Element symbol
+    sites: ndarray
+        (S,) index (from 1) of the substituted atom
+    light_isotopes, heavy_isotopes: ndarray
+        (S,) mass numbers of the light and heavy isotopes, 0 if the mass of the log file is used
+    temperatures: ndarray
+        (T,) temperatures in K
+    light_freq, heavy_freq: ndarray
+        (S, modes) vibrational frequencies in cm-1
+    beta: ndarray
+        (S, T) 1000*lnB
+    ratio: ndarray
+        (S,) ln(v/v')
+    Q_heavy, Q_light: ndarray
+        (S, T) lnQ and lnQ'
+    """
+
+    def __init__(self, element, sites, light_isotopes, heavy_isotopes, temperatures):
+        self.element = element
+        self.sites = sites
+        self.light_isotopes = light_isotopes
+        self.heavy_isotopes = heavy_isotopes
+        self.temperatures = temperatures
+        self.light_freq = None
+        self.heavy_freq = None
+        self.beta = None
+        self.ratio = None
+        self.Q_heavy = None
+        self.Q_light = None
+
+
+def isotopologue_rpfrs(
+    record, element, heavy_isotopes, temperatures, light_isotope=None, sites=None
+):
+    """
+    Calculates the reduced partition function ratio of every single substitution of an element by each of
+    its heavy isotopes, from one Hessian. E.g. all 13C sites of an alkane, or 66Zn, 67Zn and 68Zn.
+
+    Parameters:
+    -----------
+    record: HessianRecord
+        Hessian, geometry and masses - see `read_hessian()`
+    element: str
+        Element symbol
+    heavy_isotopes: list
+        mass numbers of the heavy isotopes
+    temperatures: float or ndarray
+        temperature, or 1D array of temperatures, in K
+    light_isotope: int
+        mass number of the light isotope. If None, the masses used by Gaussian for the file are the light
+        isotopologue (the most abundant isotopes, unless the job specified others).
+    sites: list
+        indices (from 1) of the atoms to substitute, every atom of the element if None
+
+    Returns:
+    --------
+    result: IsotopologueResult
+        frequencies and RPFR of every (site, heavy isotope) substitution
+    """
+    sites = substitution_sites(record.atomic_numbers, element, sites)
+    if len(sites) == 0:
+        raise ValueError("No %s atoms found in %s." % (element, record.filename))
+    heavy_isotopes = [int(isotope) for isotope in heavy_isotopes]
+    temperatures = np.atleast_1d(np.asarray(temperatures, dtype=float))
+
+    # masses of the light isotopologue
+    if record.masses is None and light_isotope is None:
+        raise ValueError(
+            "No atomic masses found in %s, please give the light isotope."
+            % record.filename
+        )
+    masses = (
+        np.array(record.masses, dtype=float)
+        if record.masses is not None
+        else np.zeros(len(record.atomic_numbers))
+    )
+    if light_isotope is not None:
+        masses[sites] = get_isotope_mass(element, light_isotope)
+    if np.any(masses <= 0):
+        raise ValueError(
+            "No atomic masses found in %s for the atoms that are not substituted."
+            % record.filename
+        )
+
+    # one row of masses per substitution, and the light isotopologue in the last row
+    rows = [(site, isotope) for site in sites for isotope in heavy_isotopes]
+    substituted = np.tile(masses, (len(rows) + 1, 1))
+    for i, (site, isotope) in enumerate(rows):
+        substituted[i, site] = get_isotope_mass(element, isotope)
+    logger.info(
+        "Diagonalising the Hessian of %i isotopologues of %s.",
+        len(substituted),
+        record.filename,
+    )
+    freq = harmonic_frequencies(record.hessian, record.coordinates, substituted)
+
+    light_freq = np.tile(freq[-1], (len(rows), 1))
+    heavy_freq = freq[:-1]
+    beta, ratio, Q_heavy, Q_light = reduced_partition_function_ratios(
+        light_freq, heavy_freq, temperatures
+    )
+
+    result = IsotopologueResult(
+        element,
+        np.array([site + 1 for site, _ in rows], dtype=int),
+        np.full(len(rows), 0 if light_isotope is None else int(light_isotope)),
+        np.array([isotope for _, isotope in rows], dtype=int),
+        temperatures,
+    )
+    result.light_freq = light_freq
+    result.heavy_freq = heavy_freq
+    result.beta = beta
+    result.ratio = ratio
+    result.Q_heavy = Q_heavy
+    result.Q_light = Q_light
+    return result
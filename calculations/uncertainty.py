@@ -0,0 +1,383 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import logging
+
+import numpy as np
+
+from calculations.calculations import reduced_partition_function_ratios
+from file_io import trace
+
+logger = logging.getLogger(__name__)
+# silent unless the application configures logging
+logger.addHandler(logging.NullHandler())
+
+# distributions of the scaling factor and the mode errors, and the names of their parameters
+DISTRIBUTIONS = {
+    "normal": ("mean", "standard deviation"),
+    "uniform": ("low", "high"),
+    "fixed": ("value",),
+}
+# percentiles of 1000*lnB reported by default: the median, and the 68% and 95% intervals
+DEFAULT_PERCENTILES = (2.5, 16.0, 50.0, 84.0, 97.5)
+# largest number of (realisation, mode, temperature) elements evaluated at once, to bound memory
+MAX_ELEMENTS = 2**20
+# bins of the histogram of 1000*lnB at each temperature, from which the percentiles are interpolated
+HISTOGRAM_BINS = 2**14
+# the histogram spans the mean +/- this many standard deviations of the first chunk of realisations
+HISTOGRAM_WIDTH = 12.0
+# chunks calculated ahead of the merge per worker process, to bound the statistics held in memory
+CHUNKS_PER_WORKER = 2
+
+
+class Distribution:
+    """
+    Probability distribution of the frequency scaling factor, or of the relative error of each frequency.
+
+    Attributes:
+    -----------
+    kind: str
+        "normal", "uniform" or "fixed" - see `DISTRIBUTIONS`
+    parameters: tuple
+        (mean, standard deviation), (low, high) or (value,)
+    """
+
+    def __init__(self, kind, *parameters):
+        if kind not in DISTRIBUTIONS:
+            raise ValueError(
+                "Unknown distribution %s, use one of: %s."
+                % (kind, ", ".join(DISTRIBUTIONS))
+            )
+        if len(parameters) != len(DISTRIBUTIONS[kind]):
+            raise ValueError(
+                "A %s distribution takes %i parameters: %s."
+                % (kind, len(DISTRIBUTIONS[kind]), ", ".join(DISTRIBUTIONS[kind]))
+            )
+        if kind == "normal" and parameters[1] < 0:
+            raise ValueError("The standard deviation must not be negative.")
+        if kind == "uniform" and parameters[1] < parameters[0]:
+            raise ValueError("A uniform distribution needs low <= high.")
+        self.kind = kind
+        self.parameters = tuple(float(p) for p in parameters)
+
+    def sample(self, rng, size):
+        """
+        Draws samples from the distribution with a numpy random generator.
+        """
+        if self.kind == "normal":
+            return rng.normal(self.parameters[0], self.parameters[1], size)
+        if self.kind == "uniform":
+            return rng.uniform(self.parameters[0], self.parameters[1], size)
+        return np.full(size, self.parameters[0])
+
+    def __repr__(self):
+        return ":".join([self.kind] + ["%g" % p for p in self.parameters])
+
+
+def parse_distribution(text):
+    """
+    Reads a distribution written as "normal:MEAN:SD", "uniform:LOW:HIGH" or "fixed:VALUE" (or just VALUE),
+    e.g. "normal:0.967:0.01".
+
+    Parameters:
+    -----------
+    text: str
+        the distribution
+
+    Returns:
+    --------
+    distribution: Distribution
+        the distribution
+
+    Raises:
+    -------
+    ValueError
+        if the text is not a distribution
+    """
+    kind, *parameters = text.split(":")
+    try:
+        if not parameters:
+            return Distribution("fixed", float(kind))
+        return Distribution(kind, *map(float, parameters))
+    except ValueError as e:
+        raise ValueError(
+            "%s is not a distribution (normal:MEAN:SD, uniform:LOW:HIGH or fixed:VALUE). %s"
+            % (text, e)
+        ) from None
+
+
+class UncertaintyResult:
+    """
+    Distribution of 1000*lnB over the realisations of `rpfr_uncertainty()`.
+
+    Attributes:
+    -----------
+    temperatures: ndarray
+        temperatures in K
+    realisations: int
+        number of realisations
+    seed: int
+        seed of the random numbers, the same seed gives the same result
+    scale, mode_error: Distribution
+        distributions of the frequency scaling factor and of the relative error of each frequency
+    nominal: ndarray
+        1000*lnB of the unperturbed frequencies at each temperature
+    mean, std, minimum, maximum: ndarray
+        mean, standard deviation, smallest and largest 1000*lnB at each temperature
+    percentiles: dict
+        1000*lnB at each temperature for each percentile, e.g. {2.5: array([...]), 97.5: array([...])}
+    """
+
+    def __init__(self, temperatures, realisations, seed, scale, mode_error):
+        self.temperatures = temperatures
+        self.realisations = realisations
+        self.seed = seed
+        self.scale = scale
+        self.mode_error = mode_error
+        self.nominal = None
+        self.mean = None
+        self.std = None
+        self.minimum = None
+        self.maximum = None
+        self.percentiles = {}
+
+    def report(self):
+        """
+        Returns a table of the mean, standard deviation and percentiles of 1000*lnB at each temperature.
+        """
+        lines = [
+            "1000*lnB from %i realisations, scaling factor %s, mode error %s, seed %i"
+            % (self.realisations, self.scale, self.mode_error, self.seed),
+            "%10s  %10s  %10s  %10s" % ("T (K)", "nominal", "mean", "std")
+            + "".join("  %10s" % ("p%g" % p) for p in self.percentiles),
+        ]
+        for i, temp in enumerate(self.temperatures):
+            lines.append(
+                "%10.2f  %10.4f  %10.4f  %10.4f"
+                % (temp, self.nominal[i], self.mean[i], self.std[i])
+                + "".join(
+                    "  %10.4f" % values[i] for values in self.percentiles.values()
+                )
+            )
+        return "\n".join(lines)
+
+
+def _chunk_beta(light_freq, heavy_freq, temps, scale, mode_error, seed, size):
+    """
+    Calculates 1000*lnB of `size` realisations, shape (size, temperatures). Each realisation multiplies the
+    frequencies by one scaling factor and each mode by (1 + its relative error), the same for the light and
+    heavy isotopologue.
+    """
+    rng = np.random.default_rng(seed)
+    factor = scale.sample(rng, size)[:, np.newaxis] * (
+        1 + mode_error.sample(rng, (size, len(light_freq)))
+    )
+    return reduced_partition_function_ratios(
+        factor * light_freq, factor * heavy_freq, temps
+    )[0]
+
+
+def _statistics(beta, low, high):
+    """
+    Returns the number, mean, sum of squared deviations, minimum, maximum and histogram at each temperature of
+    1000*lnB of a chunk of realisations, shape (size, temperatures). Values outside the histogram range of each
+    temperature, `low` to `high`, are counted in the first and last bins.
+    """
+    size, n_temps = beta.shape
+    mean = beta.mean(axis=0)
+    width = (high - low) / HISTOGRAM_BINS
+    # bin 0 holds the values below low, bin HISTOGRAM_BINS + 1 the values above high
+    bins = np.clip(
+        np.floor((beta - low) / width).astype(np.int64) + 1, 0, HISTOGRAM_BINS + 1
+    )
+    bins += np.arange(n_temps) * (HISTOGRAM_BINS + 2)
+    histogram = np.bincount(
+        bins.ravel(), minlength=n_temps * (HISTOGRAM_BINS + 2)
+    ).reshape(n_temps, HISTOGRAM_BINS + 2)
+    return dict(
+        count=size,
+        mean=mean,
+        m2=np.sum((beta - mean) ** 2, axis=0),
+        minimum=beta.min(axis=0),
+        maximum=beta.max(axis=0),
+        histogram=histogram,
+    )
+
+
+def _chunk_statistics(
+    light_freq, heavy_freq, temps, scale, mode_error, seed, size, low, high
+):
+    """
+    Calculates a chunk of realisations and returns their statistics - see `_statistics()`.
+    """
+    beta = _chunk_beta(light_freq, heavy_freq, temps, scale, mode_error, seed, size)
+    return _statistics(beta, low, high)
+
+
+def _merge_statistics(a, b):
+    """
+    Merges the statistics of 2 chunks of realisations (Chan et al. parallel variance).
+    """
+    count = a["count"] + b["count"]
+    delta = b["mean"] - a["mean"]
+    return dict(
+        count=count,
+        mean=a["mean"] + delta * b["count"] / count,
+        m2=a["m2"] + b["m2"] + delta**2 * a["count"] * b["count"] / count,
+        minimum=np.minimum(a["minimum"], b["minimum"]),
+        maximum=np.maximum(a["maximum"], b["maximum"]),
+        histogram=a["histogram"] + b["histogram"],
+    )
+
+
+def _chunks(args, workers):
+    """
+    Yields the statistics of each chunk in order. Worker processes calculate at most `CHUNKS_PER_WORKER`
+    chunks each ahead of the merge, so memory does not grow with the number of chunks.
+    """
+    if workers is None or workers <= 1 or len(args) <= 1:
+        for a in args:
+            yield _chunk_statistics(*a)
+        return
+    # imported here as worker processes are optional
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for a in args:
+            pending.append(executor.submit(_chunk_statistics, *a))
+            if len(pending) >= workers * CHUNKS_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _percentile(histogram, low, high, minimum, maximum, percentile):
+    """
+    Interpolates a percentile from the histogram of one temperature, the smallest / largest value if it
+    falls outside the histogram range.
+    """
+    width = (high - low) / HISTOGRAM_BINS
+    cumulative = np.cumsum(histogram)
+    rank = percentile / 100 * cumulative[-1]
+    i = min(int(np.searchsorted(cumulative, rank)), len(histogram) - 1)
+    if i == 0:
+        return minimum
+    if i == len(histogram) - 1:
+        return maximum
+    before = cumulative[i - 1]
+    value = low + width * (i - 1 + (rank - before) / histogram[i])
+    return min(max(value, minimum), maximum)
+
+
+def rpfr_uncertainty(
+    light_freq,
+    heavy_freq,
+    temps,
+    realisations=100000,
+    scale=None,
+    mode_error=None,
+    percentiles=DEFAULT_PERCENTILES,
+    seed=None,
+    workers=None,
+):
+    """
+    Propagates the uncertainty of the frequency scaling factor and of each frequency to 1000*lnB by Monte Carlo.
+
+    Each realisation multiplies all frequencies by a scaling factor drawn from `scale`, and each mode by
+    (1 + e), where e is drawn from `mode_error` for every mode. Both isotopologues get the same factors, as the
+    errors come from the method and the force constants they share. 1000*lnB of the realisations is
+    calculated in chunks of at most `MAX_ELEMENTS` (realisation, mode, temperature) elements with
+    `reduced_partition_function_ratios()`, so memory does not grow with the number of realisations.
+    The mean and standard deviation are exact, the percentiles are interpolated from a histogram of
+    `HISTOGRAM_BINS` bins per temperature.
+
+    Each chunk has its own random numbers spawned from `seed`, so the result only depends on the seed, and not
+    on the number of worker processes.
+
+    Parameters:
+    -----------
+    light_freq: ndarray
+        vibrational frequencies of the light isotopologue
+    heavy_freq: ndarray
+        vibrational frequencies of the heavy isotopologue
+    temps: float or ndarray
+        temperature, or 1D array of temperatures, in K
+    realisations: int
+        number of realisations, e.g. 10^5 - 10^6
+    scale: Distribution
+        distribution of the frequency scaling factor, defaults to no scaling
+    mode_error: Distribution
+        distribution of the relative error of each frequency, defaults to no error
+    percentiles: list
+        percentiles of 1000*lnB to report
+    seed: int
+        seed of the random numbers, a random seed is used (and stored in the result) if not given
+    workers: int
+        number of worker processes, the chunks are calculated in this process if not more than 1
+
+    Returns:
+    --------
+    result: UncertaintyResult
+        mean, standard deviation and percentiles of 1000*lnB at each temperature
+    """
+    light_freq = np.asarray(light_freq, dtype=float)
+    heavy_freq = np.asarray(heavy_freq, dtype=float)
+    temps = np.atleast_1d(np.asarray(temps, dtype=float))
+    if len(light_freq) != len(heavy_freq):
+        raise ValueError(
+            "Array lengths do not match - please ensure both your chosen log files optimise the same molecule!"
+        )
+    if realisations < 2:
+        raise ValueError("At least 2 realisations are needed for a standard deviation.")
+    scale = scale or Distribution("fixed", 1.0)
+    mode_error = mode_error or Distribution("fixed", 0.0)
+    seeds = np.random.SeedSequence(seed)
+    result = UncertaintyResult(temps, realisations, seeds.entropy, scale, mode_error)
+
+    # realisations per chunk, the chunks only depend on the frequencies and temperatures
+    size = max(2, MAX_ELEMENTS // max(1, len(light_freq) * len(temps)))
+    sizes = [min(size, realisations - i) for i in range(0, realisations, size)]
+    chunk_seeds = seeds.spawn(len(sizes))
+    common = (light_freq, heavy_freq, temps, scale, mode_error)
+
+    with trace.span("uncertainty", realisations=realisations, chunks=len(sizes)):
+        result.nominal = reduced_partition_function_ratios(
+            light_freq, heavy_freq, temps
+        )[0][0]
+        # the histogram range is set from the first chunk, which is then binned like the others
+        first = _chunk_beta(*common, chunk_seeds[0], sizes[0])
+        # a small width if the frequencies are not perturbed, so the histogram has a range
+        spread = np.maximum(
+            first.std(axis=0), 1e-9 * np.abs(first.mean(axis=0)) + 1e-12
+        )
+        low = first.mean(axis=0) - HISTOGRAM_WIDTH * spread
+        high = first.mean(axis=0) + HISTOGRAM_WIDTH * spread
+        statistics = _statistics(first, low, high)
+        del first
+
+        args = [common + (s, n, low, high) for s, n in zip(chunk_seeds[1:], sizes[1:])]
+        # chunks are merged in order as they arrive, so the result does not depend on the number of workers
+        for chunk in _chunks(args, workers):
+            statistics = _merge_statistics(statistics, chunk)
+    result.mean = statistics["mean"]
+    result.std = np.sqrt(statistics["m2"] / (realisations - 1))
+    result.minimum = statistics["minimum"]
+    result.maximum = statistics["maximum"]
+    for p in percentiles:
+        result.percentiles[p] = np.array(
+            [
+                _percentile(
+                    statistics["histogram"][i],
+                    low[i],
+                    high[i],
+                    result.minimum[i],
+                    result.maximum[i],
+                    p,
+                )
+                for i in range(len(temps))
+            ]
+        )
+    logger.info(result.report())
+    return result
@@ -0,0 +1,58 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import argparse
+import csv
+
+from extractions.discover import (
+    find_logs,
+    isotopologue_pairs,
+    manifest_rows,
+    read_headers,
+)
+
+if __name__ == "__main__":  # only execute this if this file is run as a script
+
+    parser = argparse.ArgumentParser(
+        description="Finds the isotopologue pairs in a directory tree of Gaussian log files by the route, charge and input geometry of each file, and writes a manifest for batch.py."
+    )
+    parser.add_argument("root", help="directory to search for .log / .out files")
+    parser.add_argument(
+        "--output",
+        default="manifest.csv",
+        help="path to the manifest CSV file (default: manifest.csv)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=None,
+        help="directory of the output file of each pair in the manifest (default: no output files)",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=16,
+        help="number of threads reading log files (default: 16)",
+    )
+    args = parser.parse_args()
+
+    filenames = find_logs(args.root)
+    headers = read_headers(filenames, args.workers)
+    pairs = isotopologue_pairs(headers)
+    print(
+        "%i log files, %i with an input geometry, %i isotopologue pairs."
+        % (len(filenames), len(headers), len(pairs))
+    )
+    if not pairs:
+        print("No isotopologue pairs found in %s" % args.root)
+        print("Exiting...")
+        raise SystemExit(1)
+
+    rows = manifest_rows(pairs, args.output_dir)
+    with open(args.output, "wt", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=["light", "heavy", "linear", "output"])
+        writer.writeheader()
+        writer.writerows(rows)
+    for row in rows:
+        print("%s  %s  %s" % (row["light"], row["heavy"], row["linear"]))
+    print("Manifest written to %s" % args.output)
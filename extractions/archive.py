@@ -0,0 +1,229 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import os
+import re
+
+import numpy as np
+
+from extractions.scanner import MASS_PATTERN
+from extractions.sources import compression, map_log, open_log
+from isotope_contribution.functions import periodic_table
+
+# Bohr radius in Angstrom (CODATA 2018), formatted checkpoint coordinates are in Bohr
+BOHR = 0.529177210903
+# header of an array in a formatted checkpoint file, e.g. "Atomic numbers      I   N=     5"
+FCHK_ARRAY_PATTERN = re.compile(r"^(\S.{0,39}?)\s+([IR])\s+N=\s*(\d+)\s*$")
+
+
+class HessianRecord:
+    """
+    Cartesian force constants of a molecule, from the archive entry of a Gaussian frequency log file
+    or a formatted checkpoint file.
+
+    Attributes:
+    -----------
+    filename: str
+        location of the file
+    atomic_numbers: ndarray
+        (n_atoms,) atomic number of each atom
+    coordinates: ndarray
+        (n_atoms, 3) cartesian coordinates in Angstrom, in the orientation of the Hessian
+    hessian: ndarray
+        (3 n_atoms, 3 n_atoms) cartesian second derivatives of the energy in Hartree/Bohr^2
+    masses: ndarray or None
+        (n_atoms,) mass of each atom used by Gaussian in u, None if not found
+    """
+
+    def __init__(self, filename, atomic_numbers, coordinates, hessian, masses=None):
+        self.filename = filename
+        self.atomic_numbers = atomic_numbers
+        self.coordinates = coordinates
+        self.hessian = hessian
+        self.masses = masses
+
+
+def lower_triangle(values, size):
+    """
+    Unpacks the lower triangle of a symmetric matrix, stored row by row, into the full matrix.
+
+    Parameters:
+    -----------
+    values: array-like
+        size * (size + 1) / 2 values of the lower triangle
+    size: int
+        number of rows of the matrix
+
+    Returns:
+    --------
+    matrix: ndarray
+        (size, size) symmetric matrix
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) != size * (size + 1) // 2:
+        raise ValueError(
+            "%i values do not fill the lower triangle of a %i x %i matrix."
+            % (len(values), size, size)
+        )
+    matrix = np.zeros((size, size))
+    matrix[np.tril_indices(size)] = values
+    return matrix + np.tril(matrix, -1).T
+
+
+def read_archive(filename):
+    """
+    Reads the Hessian from the archive entry at the end of a Gaussian frequency log file.
+
+    The archive entry is the block of "|" (Windows) or "\\" separated fields that ends with "@". Its sections,
+    separated by double separators, hold the route, title, geometry, properties and, for frequency jobs,
+    the lower triangle of the cartesian force constants after "NImag=".
+
+    Parameters:
+    -----------
+    filename: str
+        The location of the Gaussian log file
+
+    Returns:
+    --------
+    record: HessianRecord
+        geometry, Hessian and masses of the molecule
+
+    Raises:
+    -------
+    ValueError
+        if the log file does not contain the archive entry of a frequency job
+    """
+    with map_log(filename) as mm:
+        # archive entries start with " 1\1\" or " 1|1|" and end with "@". Their lines are wrapped at 70 characters,
+        # each with a leading space, so "NImag=" can be split across lines and is only searched for once unwrapped.
+        # The last entry of a frequency job is used, searching backwards from the end of the file
+        end = len(mm)
+        while True:
+            start = max(mm.rfind(b" 1\\1\\", 0, end), mm.rfind(b" 1|1|", 0, end))
+            if start == -1:
+                raise ValueError("No frequency archive entry found in %s." % filename)
+            stop = mm.find(b"@", start, end)
+            if stop != -1:
+                text = mm[start:stop].decode("ascii", errors="replace")
+                archive = "".join(line[1:] for line in text.splitlines())
+                if "NImag=" in archive:
+                    break
+            end = start
+        # the masses are printed before the thermochemistry, ahead of the archive entry
+        thermo = mm.rfind(b"Thermochemistry", 0, start)
+        masses = [
+            float(match.group(3))
+            for match in MASS_PATTERN.finditer(
+                mm[max(thermo, 0) : start].decode("ascii", errors="replace")
+            )
+        ]
+
+    separator = archive[1]
+    sections = archive.split(separator * 2)
+    if len(sections) < 6:
+        raise ValueError("No force constants in the archive entry of %s." % filename)
+
+    # geometry - "charge,multiplicity|Zn,0.,0.,0.|Cl,x,y,z|...", optionally with an extra field before x,y,z
+    symbols = []
+    coordinates = []
+    for atom in sections[3].split(separator)[1:]:
+        fields = atom.split(",")
+        # labels such as "C(Iso=13)" or "C1"
+        symbols.append(re.match(r"[A-Za-z]+", fields[0]).group(0).capitalize())
+        coordinates.append([float(x) for x in fields[-3:]])
+    table = periodic_table()
+    atomic_numbers = np.array([table[symbol] for symbol in symbols], dtype=int)
+    coordinates = np.array(coordinates)
+
+    size = 3 * len(symbols)
+    hessian = lower_triangle(sections[5].split(","), size)
+
+    return HessianRecord(
+        filename,
+        atomic_numbers,
+        coordinates,
+        hessian,
+        np.array(masses) if len(masses) == len(symbols) else None,
+    )
+
+
+def read_fchk(filename):
+    """
+    Reads the Hessian from a Gaussian formatted checkpoint file.
+
+    Parameters:
+    -----------
+    filename: str
+        The location of the formatted checkpoint file
+
+    Returns:
+    --------
+    record: HessianRecord
+        geometry, Hessian and masses of the molecule
+
+    Raises:
+    -------
+    ValueError
+        if the file does not contain cartesian force constants
+    """
+    arrays = {}
+    with open_log(filename) as file:
+        name = None
+        for line in file:
+            match = FCHK_ARRAY_PATTERN.match(line)
+            if match is not None:
+                name, count = match.group(1), int(match.group(3))
+                arrays[name] = []
+                continue
+            if name is not None:
+                arrays[name] += line.replace("D", "E").split()
+                if len(arrays[name]) >= count:
+                    name = None
+
+    for name in (
+        "Atomic numbers",
+        "Current cartesian coordinates",
+        "Cartesian Force Constants",
+    ):
+        if name not in arrays:
+            raise ValueError("No '%s' found in %s." % (name, filename))
+
+    atomic_numbers = np.array([int(x) for x in arrays["Atomic numbers"]], dtype=int)
+    coordinates = (
+        np.array(arrays["Current cartesian coordinates"], dtype=float).reshape(-1, 3)
+        * BOHR
+    )
+    hessian = lower_triangle(
+        arrays["Cartesian Force Constants"], 3 * len(atomic_numbers)
+    )
+    masses = arrays.get("Real atomic weights")
+    return HessianRecord(
+        filename,
+        atomic_numbers,
+        coordinates,
+        hessian,
+        np.array(masses, dtype=float) if masses else None,
+    )
+
+
+def read_hessian(filename):
+    """
+    Reads the Hessian from a formatted checkpoint file (.fchk, .fch) or the archive entry of a log file.
+
+    Parameters:
+    -----------
+    filename: str
+        The location of the file
+
+    Returns:
+    --------
+    record: HessianRecord
+        geometry, Hessian and masses of the molecule
+    """
+    name = filename.lower()
+    # formatted checkpoint files are often compressed, e.g. ZnCl4.fchk.gz
+    if compression(name) is not None:
+        name = os.path.splitext(name)[0]
+    if name.endswith((".fchk", ".fch")):
+        return read_fchk(filename)
+    return read_archive(filename)
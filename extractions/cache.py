@@ -0,0 +1,462 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import argparse
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from extractions.scanner import LogRecord, scan_log
+from extractions.sources import STDIN, open_log, source_path
+
+# version of the cache entry layout, increase when the scanner output changes to invalidate old entries
+CACHE_VERSION = 3
+# default cache location and size cap, can be overridden with environment variables
+DEFAULT_CACHE_DIR = os.environ.get(
+    "RPFR_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "rpfr_calculator")
+)
+DEFAULT_MAX_SIZE = int(os.environ.get("RPFR_CACHE_MAX_MB", "512")) * 1024**2
+# a process lists the cache again after writing this fraction of the size cap, as other processes
+# (e.g. batch workers) may write to the same cache
+EVICT_FRACTION = 16
+# estimated size of each cache directory and the bytes written by this process since it was listed
+_cache_sizes = {}
+
+
+def _sha1(text):
+    """
+    Returns the hexadecimal SHA-1 digest of a string.
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def file_hash(filename):
+    """
+    Calculates the SHA-256 hash of the contents of a file, reading it in 1 MB chunks. Compressed and archived
+    log files are hashed by their decompressed contents - see `open_log()`.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the file
+
+    Returns:
+    --------
+    digest: str
+        hexadecimal hash of the file contents
+    """
+    digest = hashlib.sha256()
+    with open_log(filename, "rb") as file:
+        for chunk in iter(lambda: file.read(1024**2), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _atomic_write(path, write):
+    """
+    Writes a file through a temporary file in the same directory, so concurrent readers never see partial files.
+    `write` is called with the open binary temporary file.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            write(file)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def record_to_arrays(record):
+    """
+    Converts a LogRecord to a dictionary of numpy arrays that can be saved with `np.savez()`.
+
+    Parameters:
+    -----------
+    record: LogRecord
+        record from `scan_log()`
+
+    Returns:
+    --------
+    arrays: dict
+        dictionary of numpy arrays
+    """
+    rows = [row for block in record.displacements for row in block]
+    return {
+        "temperature": np.array(
+            np.nan if record.temperature is None else record.temperature
+        ),
+        "element": np.array("" if record.element is None else record.element),
+        "isotope": np.array(-1 if record.isotope is None else record.isotope),
+        "isotope_atoms": np.array(record.isotope_atoms, dtype=int),
+        "num_atoms": np.array(-1 if record.num_atoms is None else record.num_atoms),
+        "table": np.array("" if record.table is None else record.table),
+        "has_table": np.array(record.table is not None),
+        "low_freq": np.array(record.low_freq, dtype=float),
+        "frequencies": np.asarray(record.frequencies, dtype=float),
+        "masses": np.array(record.masses, dtype=float),
+        # displacement blocks flattened into the rows of every block, and the number of rows in each block
+        "block_rows": np.array(
+            [len(block) for block in record.displacements], dtype=int
+        ),
+        "atoms": np.array([row[:2] for row in rows], dtype=int).reshape(-1, 2),
+        "coord_counts": np.array([len(row[2]) for row in rows], dtype=int),
+        "coords": np.array([c for row in rows for c in row[2]], dtype=float),
+    }
+
+
+def arrays_to_record(filename, arrays):
+    """
+    Rebuilds a LogRecord from the arrays written by `record_to_arrays()`.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the Gaussian log file
+    arrays: dict-like
+        arrays from `record_to_arrays()` or a loaded .npz file
+
+    Returns:
+    --------
+    record: LogRecord
+        Information extracted from the log file
+    """
+    record = LogRecord(filename)
+    temperature = float(arrays["temperature"])
+    record.temperature = None if np.isnan(temperature) else temperature
+    record.element = str(arrays["element"]) or None
+    record.isotope = int(arrays["isotope"]) if int(arrays["isotope"]) >= 0 else None
+    record.isotope_atoms = arrays["isotope_atoms"].tolist()
+    record.num_atoms = (
+        int(arrays["num_atoms"]) if int(arrays["num_atoms"]) >= 0 else None
+    )
+    record.table = str(arrays["table"]) if bool(arrays["has_table"]) else None
+    record.low_freq = arrays["low_freq"].tolist()
+    record.frequencies = np.array(arrays["frequencies"])
+    record.masses = arrays["masses"].tolist()
+
+    # splitting the flattened coordinates back into rows, and the rows back into blocks
+    atoms = arrays["atoms"].tolist()
+    coords = np.split(arrays["coords"], np.cumsum(arrays["coord_counts"])[:-1])
+    rows = [(a[0], a[1], c.tolist()) for a, c in zip(atoms, coords)]
+    start = 0
+    for n in arrays["block_rows"].tolist():
+        record.displacements.append(rows[start : start + n])
+        start += n
+    return record
+
+
+def cached_scan_log(filename, tail=False, cache_dir=None, max_size=None, job=None):
+    """
+    Returns the LogRecord of a Gaussian log file from the on-disk cache, scanning the file with `scan_log()`
+    and storing the record if it is not cached.
+
+    Entries are stored as compressed .npz files named by the hash of the file contents. A small stamp file
+    per (path, size, modification time) points to the entry, so an unchanged file is found without being read.
+    Copied or touched files are found through the content hash. The size cap is checked when this process
+    first writes to the cache and whenever it has written `max_size / EVICT_FRACTION` bytes since, and the
+    least recently used entries are removed while the cache is larger than `max_size`.
+
+    Parameters:
+    -----------
+    filename: str
+        The location of the Gaussian log file
+    tail: bool
+        only parse the last frequency section of the file - see `scan_log()`
+    cache_dir: str
+        cache directory, defaults to $RPFR_CACHE_DIR or ~/.cache/rpfr_calculator
+    max_size: int
+        size cap of the cache in bytes, defaults to $RPFR_CACHE_MAX_MB (512 MB)
+    job: int
+        only parse this job of a multi-job (Link1) log file - see `scan_log()`
+
+    Returns:
+    --------
+    record: LogRecord
+        Information extracted from the log file
+    """
+    # standard input can only be read once
+    if filename == STDIN:
+        return scan_log(filename, tail=tail, job=job)
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    max_size = DEFAULT_MAX_SIZE if max_size is None else max_size
+    os.makedirs(cache_dir, exist_ok=True)
+    mode = "job%i" % job if job is not None else "tail" if tail else "full"
+
+    # stamp of the file path, size and modification time, of the tar archive for archive members
+    stat = os.stat(source_path(filename))
+    stamp = os.path.join(
+        cache_dir,
+        "%s.stamp"
+        % _sha1(
+            "%s|%i|%i|%s|%i"
+            % (
+                os.path.abspath(filename),
+                stat.st_size,
+                stat.st_mtime_ns,
+                mode,
+                CACHE_VERSION,
+            )
+        ),
+    )
+
+    # cache hit on the stamp - no need to read the log file
+    try:
+        with open(stamp, "rt") as file:
+            entry = os.path.join(cache_dir, file.readline().strip())
+        record = load_entry(filename, entry)
+        if record is not None:
+            return record
+    except OSError:
+        pass
+
+    # content hash fallback
+    entry = os.path.join(
+        cache_dir, "%s-%s-v%i.npz" % (file_hash(filename), mode, CACHE_VERSION)
+    )
+    record = load_entry(filename, entry)
+    if record is None:
+        record = scan_log(filename, tail=tail, job=job)
+        _atomic_write(
+            entry, lambda f: np.savez_compressed(f, **record_to_arrays(record))
+        )
+        _account(cache_dir, os.path.getsize(entry), max_size)
+    # the stamp also holds the file it stands for, so stamps of changed or removed files can be pruned
+    text = "%s\n%s\n%i\n%i\n%i\n" % (
+        os.path.basename(entry),
+        os.path.abspath(source_path(filename)),
+        stat.st_size,
+        stat.st_mtime_ns,
+        CACHE_VERSION,
+    )
+    _atomic_write(stamp, lambda f: f.write(text.encode("utf-8")))
+    return record
+
+
+def _account(cache_dir, size, max_size):
+    """
+    Adds a new entry of `size` bytes to the estimated size of the cache, listing the cache and removing the
+    least recently used entries when this process first writes to it, when the estimate is over `max_size`
+    and after every `max_size / EVICT_FRACTION` bytes written.
+    """
+    state = _cache_sizes.get(cache_dir)
+    if (
+        state is None
+        or state[0] + size > max_size
+        or state[1] + size > max_size / EVICT_FRACTION
+    ):
+        _cache_sizes[cache_dir] = [_evict(cache_dir, max_size)[1], 0]
+    else:
+        state[0] += size
+        state[1] += size
+
+
+def load_entry(filename, entry):
+    """
+    Loads a cache entry, marking it as recently used.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the Gaussian log file the entry belongs to
+    entry: str
+        location of the .npz cache entry
+
+    Returns:
+    --------
+    record: LogRecord or None
+        the cached record, or None if the entry does not exist or cannot be read
+    """
+    try:
+        with np.load(entry, allow_pickle=False) as arrays:
+            record = arrays_to_record(filename, arrays)
+        # the modification time of an entry is its last use, for LRU eviction
+        os.utime(entry)
+    except (OSError, ValueError, KeyError):
+        return None
+    return record
+
+
+def cache_entries(cache_dir=None):
+    """
+    Lists the entries in the cache.
+
+    Parameters:
+    -----------
+    cache_dir: str
+        cache directory
+
+    Returns:
+    --------
+    entries: list
+        (path, size in bytes, last use time) of every entry, least recently used first
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    entries = []
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            if name.endswith(".npz"):
+                path = os.path.join(cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:  # removed by another process
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+    entries.sort(key=lambda entry: entry[2])
+    return entries
+
+
+def _stale_stamp(cache_dir, stamp):
+    """
+    Tells whether a stamp can no longer be hit: its entry was removed, it was written by another cache version,
+    or the file it stands for was changed or removed.
+    """
+    try:
+        with open(stamp, "rt") as file:
+            lines = file.read().split("\n")
+        # stamps written by older versions only hold the entry
+        if len(lines) < 5 or int(lines[4]) != CACHE_VERSION:
+            return True
+        if not os.path.isfile(os.path.join(cache_dir, lines[0])):
+            return True
+        stat = os.stat(lines[1])
+        return stat.st_size != int(lines[2]) or stat.st_mtime_ns != int(lines[3])
+    except (OSError, ValueError):
+        return True
+
+
+def prune_stamps(cache_dir=None):
+    """
+    Removes the stamps that can no longer be hit, because their entry was removed, they were written by another
+    cache version, or the log file they stand for was changed or removed.
+
+    Parameters:
+    -----------
+    cache_dir: str
+        cache directory
+
+    Returns:
+    --------
+    removed: int
+        number of stamps removed
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    removed = 0
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            stamp = os.path.join(cache_dir, name)
+            if name.endswith(".stamp") and _stale_stamp(cache_dir, stamp):
+                try:
+                    os.remove(stamp)
+                except OSError:  # removed by another process
+                    continue
+                removed += 1
+    return removed
+
+
+def _evict(cache_dir, max_size):
+    """
+    Removes the least recently used entries until the cache is no larger than `max_size` bytes, and the stamps
+    that can no longer be hit - see `evict()`. Returns the number of entries removed and the size of the cache.
+    """
+    entries = cache_entries(cache_dir)
+    total = sum(entry[1] for entry in entries)
+    removed = 0
+    for path, size, used in entries:
+        if total <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+        removed += 1
+    prune_stamps(cache_dir)
+    return removed, total
+
+
+def evict(cache_dir=None, max_size=None):
+    """
+    Removes the least recently used entries until the cache is no larger than `max_size` bytes, and the stamps
+    that can no longer be hit - see `prune_stamps()`.
+
+    Parameters:
+    -----------
+    cache_dir: str
+        cache directory
+    max_size: int
+        size cap of the cache in bytes
+
+    Returns:
+    --------
+    removed: int
+        number of entries removed
+    """
+    max_size = DEFAULT_MAX_SIZE if max_size is None else max_size
+    return _evict(cache_dir or DEFAULT_CACHE_DIR, max_size)[0]
+
+
+def clear_cache(cache_dir=None):
+    """
+    Removes every entry and stamp from the cache.
+
+    Parameters:
+    -----------
+    cache_dir: str
+        cache directory
+
+    Returns:
+    --------
+    removed: int
+        number of entries removed
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    removed = 0
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            if name.endswith((".npz", ".stamp", ".tmp")):
+                try:
+                    os.remove(os.path.join(cache_dir, name))
+                except OSError:
+                    continue
+                removed += name.endswith(".npz")
+    return removed
+
+
+if __name__ == "__main__":  # only execute this if this file is run as a script
+
+    parser = argparse.ArgumentParser(
+        description="Inspects or clears the cache of parsed Gaussian log files."
+    )
+    parser.add_argument("command", choices=["info", "clear", "evict"])
+    parser.add_argument(
+        "--cache-dir", default=DEFAULT_CACHE_DIR, help="cache directory"
+    )
+    parser.add_argument(
+        "--max-mb",
+        type=float,
+        default=DEFAULT_MAX_SIZE / 1024**2,
+        help="size cap in MB used by evict",
+    )
+    args = parser.parse_args()
+
+    if args.command == "info":
+        pruned = prune_stamps(args.cache_dir)
+        entries = cache_entries(args.cache_dir)
+        print("Cache directory: %s" % args.cache_dir)
+        print(
+            "%i entries, %.2f MB"
+            % (len(entries), sum(entry[1] for entry in entries) / 1024**2)
+        )
+        for path, size, used in entries:
+            print("%10.1f kB  %s" % (size / 1024, os.path.basename(path)))
+        if pruned:
+            print("Removed %i stale stamps" % pruned)
+    elif args.command == "evict":
+        removed = evict(args.cache_dir, int(args.max_mb * 1024**2))
+        print("Removed %i entries from %s" % (removed, args.cache_dir))
+    else:
+        removed = clear_cache(args.cache_dir)
+        print("Removed %i entries from %s" % (removed, args.cache_dir))
@@ -0,0 +1,340 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import contextlib
+import hashlib
+import itertools
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from extractions.scanner import ISO_PATTERN
+from extractions.sources import (
+    MEMBER_SEPARATOR,
+    is_log,
+    is_tar,
+    iter_members,
+    open_log,
+    split_member,
+    tar_members,
+)
+from isotope_contribution.functions import default_isotopes
+
+logger = logging.getLogger(__name__)
+# silent unless the application configures logging
+logger.addHandler(logging.NullHandler())
+
+# the input section is within the first few hundred lines, stop reading files without one
+MAX_HEADER_LINES = 2000
+# atom line of a cartesian input geometry, e.g. " Zn(Iso=66)   0.   0.   0." or " C   0  -1.46  -0.59  -0.13"
+CARTESIAN_PATTERN = re.compile(
+    r"^\s*([A-Za-z]+)\S*(?:\s+-?\d+)?\s+(-?\d+\.\d*)\s+(-?\d+\.\d*)\s+(-?\d+\.\d*)\s*$"
+)
+
+
+class LogHeader:
+    """
+    Input section of a Gaussian log file - the route, charge, multiplicity and input geometry -
+    read by `read_header()` without parsing the rest of the file.
+
+    Attributes:
+    -----------
+    filename: str
+        location of the Gaussian log file
+    route: str
+        route section, lower case with single spaces, e.g. "# opt freq b3lyp/6-31g(d,p)"
+    charge, multiplicity: int or None
+        Charge and multiplicity of the molecule
+    geometry: list
+        atom lines of the input geometry without the isotope labels, with single spaces
+    symbols: list
+        Element symbol of each atom
+    coordinates: ndarray or None
+        (n_atoms, 3) cartesian input coordinates in Angstrom, None for Z-matrix input
+    isotopes: dict
+        mass number of each atom labelled with "(Iso=", by atom index (from 1)
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.route = ""
+        self.charge = None
+        self.multiplicity = None
+        self.geometry = []
+        self.symbols = []
+        self.coordinates = None
+        self.isotopes = {}
+
+    def fingerprint(self):
+        """
+        Returns a hash of the route, charge, multiplicity and input geometry without the isotope labels,
+        which is the same for every isotopologue of one calculation.
+        """
+        text = "\n".join(
+            [self.route, "%s %s" % (self.charge, self.multiplicity)] + self.geometry
+        )
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def linear(self):
+        """
+        Returns True if the input geometry is cartesian and its atoms lie on a line.
+        """
+        if self.coordinates is None:
+            return False
+        if len(self.coordinates) <= 2:
+            return True
+        # the second singular value of the centred coordinates vanishes for a line
+        s = np.linalg.svd(
+            self.coordinates - self.coordinates.mean(axis=0), compute_uv=False
+        )
+        return bool(s[1] < 1e-3)
+
+
+def read_header(filename, file=None):
+    """
+    Reads the input section of a Gaussian log file, stopping at the end of the input geometry.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the Gaussian log file
+    file: file object
+        text stream of the log file if it is already open, e.g. from `iter_members()`
+
+    Returns:
+    --------
+    header: LogHeader or None
+        route, charge, multiplicity and input geometry, None if the file has no input geometry
+    """
+    header = LogHeader(filename)
+    route = []
+    geometry = None
+    with (
+        contextlib.nullcontext(file) if file is not None else open_log(filename)
+    ) as file:
+        for line in itertools.islice(file, MAX_HEADER_LINES):
+            line = line.rstrip("\n")
+            # the route section starts with "#" and ends with a line of dashes.
+            # Long routes are wrapped at a fixed width, even within words.
+            if not header.route:
+                if route and line.strip().startswith("-"):
+                    header.route = " ".join("".join(route).lower().split())
+                elif route or line.startswith(" #"):
+                    route.append(line[1:])
+                continue
+
+            if geometry is not None:
+                if "Charge =" in line:
+                    fields = line.split()
+                    header.charge = int(fields[2])
+                    header.multiplicity = int(fields[5])
+                    continue
+                if not line.strip() or "Variables:" in line:
+                    break
+                geometry.append(line)
+            elif "Symbolic Z-matrix:" in line:
+                geometry = []
+    if not geometry:
+        return None
+
+    coordinates = []
+    for i, line in enumerate(geometry):
+        match = ISO_PATTERN.search(line)
+        if match is not None:
+            header.isotopes[i + 1] = int(match.group(2))
+        # without the isotope label, so isotopologues have the same geometry
+        line = ISO_PATTERN.sub(lambda m: m.group(1), line)
+        header.geometry.append(" ".join(line.split()))
+        header.symbols.append(re.match(r"\s*([A-Za-z]+)", line).group(1).capitalize())
+        match = CARTESIAN_PATTERN.match(line)
+        if match is not None:
+            coordinates.append([float(x) for x in match.group(2, 3, 4)])
+    if len(coordinates) == len(geometry):
+        header.coordinates = np.array(coordinates)
+    return header
+
+
+def find_logs(root):
+    """
+    Finds the Gaussian log files (.log, .out in any case, optionally compressed) in a directory tree,
+    including the log files in tar archives as "<archive>::<member>" - see `open_log()`.
+
+    Parameters:
+    -----------
+    root: str
+        directory to search
+
+    Returns:
+    --------
+    filenames: list
+        sorted locations of the log files
+    """
+    filenames = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            if is_tar(name):
+                filenames += [
+                    path + MEMBER_SEPARATOR + member for member in tar_members(path)
+                ]
+            elif is_log(name):
+                filenames.append(path)
+    return sorted(filenames)
+
+
+def _read_header_safe(filename):
+    """
+    Calls `read_header()`, logging and skipping files that cannot be read, e.g. corrupt or .zst files without zstd.
+    """
+    try:
+        return read_header(filename)
+    except (OSError, ValueError, EOFError) as e:
+        logger.warning("Skipping %s: %s", filename, e)
+        return None
+
+
+def _read_archive_headers(path, members):
+    """
+    Reads the input sections of members of a tar archive in one pass over the archive - see `iter_members()`.
+    Returns the LogHeader of each readable member by its location.
+    """
+    # imported here as tar archives are optional
+    import tarfile
+
+    headers = {}
+    try:
+        for member, file in iter_members(path, set(members)):
+            filename = path + MEMBER_SEPARATOR + member
+            try:
+                headers[filename] = read_header(filename, file)
+            except (OSError, ValueError, EOFError) as e:
+                logger.warning("Skipping %s: %s", filename, e)
+    except (OSError, ValueError, EOFError, tarfile.TarError) as e:
+        logger.warning("Skipping %s: %s", path, e)
+    return headers
+
+
+def read_headers(filenames, workers=16):
+    """
+    Reads the input sections of many log files with a pool of threads, as reading is bound by I/O.
+    The members of each tar archive are read in one pass over the archive.
+
+    Parameters:
+    -----------
+    filenames: list
+        locations of the log files
+    workers: int
+        number of threads
+
+    Returns:
+    --------
+    headers: list
+        LogHeader of every readable file with an input geometry, in the given order
+    """
+    files, archives = [], {}
+    for filename in filenames:
+        path, member = split_member(filename)
+        if member is None:
+            files.append(filename)
+        else:
+            archives.setdefault(path, []).append(member)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        found = dict(zip(files, executor.map(_read_header_safe, files)))
+        for headers in executor.map(_read_archive_headers, *zip(*archives.items())):
+            found.update(headers)
+    headers = (found.get(filename) for filename in filenames)
+    return [header for header in headers if header is not None]
+
+
+def isotopologue_pairs(headers):
+    """
+    Groups log files into isotopologue sets by the fingerprint of their input section, and pairs the
+    light and heavy isotopologues of each set.
+
+    Within a set, files that label the same atoms with "(Iso=" are paired: each file with the lightest
+    isotopes is paired with every file with heavier isotopes (e.g. 64Zn with 66Zn and 68Zn). A file without
+    labels uses the default, most abundant, isotopes. It is paired with each file that labels a single atom, if
+    the files labelling that atom all use one isotope: as the light isotopologue if the label is heavier than the
+    default isotope (e.g. 66Zn), and as the heavy isotopologue if it is lighter (e.g. 54Fe or 6Li).
+
+    Copies of a calculation in different directories have the same fingerprint, so a heavy file is only
+    paired with the light files in its own directory, if there are any.
+
+    Parameters:
+    -----------
+    headers: list
+        LogHeader of each file - see `read_headers()`
+
+    Returns:
+    --------
+    pairs: list
+        (light, heavy) LogHeader pairs, sorted by filename
+    """
+    groups = {}
+    for header in headers:
+        groups.setdefault(header.fingerprint(), []).append(header)
+
+    pairs = []
+    for group in groups.values():
+        # files labelling the same atoms
+        sites = {}
+        for header in group:
+            sites.setdefault(tuple(sorted(header.isotopes)), []).append(header)
+        unlabelled = sites.pop((), [])
+
+        for labelled in sites.values():
+            masses = [sum(header.isotopes.values()) for header in labelled]
+            lightest = min(masses)
+            light = [h for h, m in zip(labelled, masses) if m == lightest]
+            heavy = [h for h, m in zip(labelled, masses) if m > lightest]
+            if not heavy and len(labelled[0].isotopes) == 1:
+                # unlabelled files use the default isotope of the labelled atom, which may be the heavier one,
+                # e.g. 54Fe or 6Li labels are lighter than the default 56Fe or 7Li
+                ((atom, mass_number),) = labelled[0].isotopes.items()
+                default = default_isotopes().get(labelled[0].symbols[atom - 1])
+                if default is None or mass_number > default:
+                    light, heavy = unlabelled, light
+                elif mass_number < default:
+                    heavy = unlabelled
+            for header in heavy:
+                directory = os.path.dirname(header.filename)
+                nearby = [h for h in light if os.path.dirname(h.filename) == directory]
+                pairs += [(h, header) for h in nearby or light]
+    return sorted(pairs, key=lambda pair: (pair[0].filename, pair[1].filename))
+
+
+def manifest_rows(pairs, output_dir=None):
+    """
+    Converts isotopologue pairs to rows of a manifest for `batch.py`.
+
+    Parameters:
+    -----------
+    pairs: list
+        (light, heavy) LogHeader pairs - see `isotopologue_pairs()`
+    output_dir: str
+        directory of the output file of each pair, named after the heavy isotope log file. No output files if None
+
+    Returns:
+    --------
+    rows: list
+        dictionaries with the keys `light`, `heavy`, `linear` and `output`
+    """
+    rows = []
+    for light, heavy in pairs:
+        output = ""
+        if output_dir is not None:
+            name = os.path.splitext(os.path.basename(heavy.filename))[0]
+            output = os.path.join(output_dir, name + ".txt")
+        rows.append(
+            dict(
+                light=light.filename,
+                heavy=heavy.filename,
+                linear="y" if light.linear() else "n",
+                output=output,
+            )
+        )
+    return rows
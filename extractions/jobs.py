@@ -0,0 +1,335 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import argparse
+import re
+
+from extractions.scanner import (
+    JOB_MARKERS,
+    LogRecord,
+    line_start,
+    read_lines,
+    scan_lines,
+)
+from extractions.sources import map_log
+from file_io import trace
+
+# an optimisation keyword in a route section, e.g. "opt" or "opt=(calcfc,tight)"
+OPT_PATTERN = re.compile(r"\bopt\b")
+# sections indexed in each job, in the order they are printed
+SECTIONS = [
+    "route",
+    "geometry",
+    "convergence",
+    "low frequencies",
+    "frequencies",
+    "thermochemistry",
+]
+
+
+class Job:
+    """
+    One job of a Gaussian log file - the whole file, or one step of a multi-step (Link1) input - with the
+    byte offsets of its sections.
+
+    Attributes:
+    -----------
+    number: int
+        number of the job in the log file, from 1
+    start, end: int
+        byte offsets of the first line of the job and of the end of its last line
+    route: str
+        route section, lower case with single spaces, e.g. "#n geom=allcheck ... freq"
+    sections: dict
+        (start, end) byte offsets of each section found in the job - see `SECTIONS`. "frequencies" runs from
+        "Harmonic frequencies" to the thermochemistry and holds the normal mode displacements, which Gaussian
+        prints between the "Frequencies --" lines
+    """
+
+    def __init__(self, number, start, end):
+        self.number = number
+        self.start = start
+        self.end = end
+        self.route = ""
+        self.sections = {}
+
+    def has_frequencies(self):
+        """
+        Returns True if the job is a frequency job.
+        """
+        return "frequencies" in self.sections
+
+
+class LogIndex:
+    """
+    Byte offsets of the jobs of a Gaussian log file and of their sections, from `index_log()`. The index
+    can be kept to read any section of a large log file without scanning it again.
+
+    Attributes:
+    -----------
+    filename: str
+        location of the Gaussian log file
+    size: int
+        size of the (decompressed) log file in bytes
+    jobs: list
+        Job of each job in the log file
+    """
+
+    def __init__(self, filename, size):
+        self.filename = filename
+        self.size = size
+        self.jobs = []
+
+    def job(self, number=None):
+        """
+        Selects a job of the log file.
+
+        Parameters:
+        -----------
+        number: int
+            number of the job, from 1. Defaults to the last frequency job, or the last job if there is none
+
+        Returns:
+        --------
+        job: Job
+            the selected job
+
+        Raises:
+        -------
+        ValueError
+            if the log file has no such job
+        """
+        if number is None:
+            frequency_jobs = [job for job in self.jobs if job.has_frequencies()]
+            return (frequency_jobs or self.jobs)[-1]
+        if not 1 <= number <= len(self.jobs):
+            raise ValueError(
+                "ERROR - %s has %i jobs, there is no job %s!"
+                % (self.filename, len(self.jobs), number)
+            )
+        return self.jobs[number - 1]
+
+    def read(self, section, number=None):
+        """
+        Reads one section of a job, without reading the rest of the log file.
+
+        Parameters:
+        -----------
+        section: str
+            name of the section - see `SECTIONS`
+        number: int
+            number of the job, from 1, defaults to the last frequency job - see `job()`
+
+        Returns:
+        --------
+        lines: list
+            lines of the section
+
+        Raises:
+        -------
+        ValueError
+            if the job has no such section
+        """
+        job = self.job(number)
+        if section not in job.sections:
+            raise ValueError(
+                "ERROR - job %i of %s has no %s section!"
+                % (job.number, self.filename, section)
+            )
+        with map_log(self.filename) as mm:
+            return read_lines(mm, *job.sections[section])
+
+
+def _next_line(mm, pos, end):
+    """
+    Returns the offset of the start of the line after the line containing the byte offset `pos`,
+    `end` if it is the last line before `end`.
+    """
+    newline = mm.find(b"\n", pos, end)
+    return end if newline == -1 else newline + 1
+
+
+def _index_job(mm, number, start, end):
+    """
+    Finds the sections of the job between the byte offsets `start` and `end`.
+    """
+    job = Job(number, start, end)
+
+    # the route section starts with "#" and ends with a line of dashes
+    pos = mm.find(b"\n #", start, end)
+    if pos != -1:
+        route_end = mm.find(b"\n -", pos + 1, end)
+        route_end = end if route_end == -1 else route_end + 1
+        job.sections["route"] = (pos + 1, route_end)
+        # long routes are wrapped at a fixed width, even within words
+        route = "".join(line[1:] for line in read_lines(mm, pos + 1, route_end))
+        job.route = " ".join(route.lower().split())
+
+    # input geometry, until a blank line or the Z-matrix variables
+    pos = mm.find(b"Symbolic Z-matrix:", start, end)
+    if pos != -1:
+        geometry_end = _next_line(mm, pos, end)
+        while geometry_end < end:
+            line = mm[geometry_end : _next_line(mm, geometry_end, end)]
+            if not line.strip() or b"Variables:" in line:
+                break
+            geometry_end = _next_line(mm, geometry_end, end)
+        job.sections["geometry"] = (line_start(mm, pos), geometry_end)
+
+    # last item convergence table, the "Converged?" header and 4 items
+    pos = mm.rfind(b"Converged?", start, end)
+    if pos != -1:
+        table_end = pos
+        for i in range(5):
+            table_end = _next_line(mm, table_end, end)
+        job.sections["convergence"] = (line_start(mm, pos), table_end)
+
+    # last frequency block, the "Low frequencies" lines printed before it and the thermochemistry after it
+    pos = mm.rfind(b"Harmonic frequencies", start, end)
+    if pos != -1:
+        low_pos = mm.rfind(b"Low frequencies ---", start, pos)
+        if low_pos != -1:
+            low_end = _next_line(mm, low_pos, end)
+            low_start = line_start(mm, low_pos)
+            while low_start > start:
+                previous = line_start(mm, low_start - 1)
+                if mm.find(b"Low frequencies ---", previous, low_start) == -1:
+                    break
+                low_start = previous
+            job.sections["low frequencies"] = (low_start, low_end)
+
+        thermo_pos = mm.find(b"- Thermochemistry -", pos, end)
+        freq_end = end if thermo_pos == -1 else line_start(mm, thermo_pos)
+        job.sections["frequencies"] = (line_start(mm, pos), freq_end)
+        if thermo_pos != -1:
+            # the header is followed by a line of dashes, the thermochemistry ends at the next line of dashes
+            body = _next_line(mm, _next_line(mm, thermo_pos, end), end)
+            thermo_end = mm.find(b"\n -", body, end)
+            thermo_end = end if thermo_end == -1 else thermo_end + 1
+            job.sections["thermochemistry"] = (freq_end, thermo_end)
+    return job
+
+
+def index_log(filename):
+    """
+    Indexes the jobs of a Gaussian log file and the byte offsets of their route, input geometry, item convergence
+    table, frequency and thermochemistry sections. The sections are found with byte searches of the memory
+    mapped file, without splitting it into lines, so indexing is much faster than scanning the file.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the Gaussian log file, compressed and archived log files are read into memory - see `map_log()`
+
+    Returns:
+    --------
+    index: LogIndex
+        the jobs of the log file and their sections
+    """
+    with trace.span("index", file=filename), map_log(filename) as mm:
+        index = LogIndex(filename, len(mm))
+        # lines that may start a new job
+        bounds = set()
+        for marker in JOB_MARKERS:
+            pos = mm.find(marker.encode("ascii"))
+            while pos != -1:
+                bounds.add(line_start(mm, pos))
+                pos = mm.find(marker.encode("ascii"), pos + 1)
+
+        start = 0
+        for end in sorted(bounds - {0}) + [len(mm)]:
+            # the banner at the top of a run comes before its route, the job starts at the top of the file
+            if end < len(mm) and mm.find(b"\n #", start, end) == -1:
+                continue
+            index.jobs.append(_index_job(mm, len(index.jobs) + 1, start, end))
+            start = end
+    return index
+
+
+def scan_job(filename, job=None, index=None):
+    """
+    Scans one job of a multi-job (Link1) Gaussian log file - see `scan_log()`. Only the byte range of the job is
+    parsed, with the input geometry of the last earlier job that has one if the job reads its geometry from the
+    checkpoint file (Geom=Check). Such a job has no item convergence table of its own, so it takes the table of
+    the job immediately before it if that job is the optimisation its geometry comes from, e.g. the first job of
+    an "opt freq" input. Otherwise the convergence is unknown and `table` is None.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the Gaussian log file
+    job: int
+        number of the job, from 1, defaults to the last frequency job - see `LogIndex.job()`
+    index: LogIndex
+        index of the log file from `index_log()`, indexed if not given
+
+    Returns:
+    --------
+    record: LogRecord
+        Information extracted from the job
+    """
+    index = index or index_log(filename)
+    selected = index.job(job)
+    earlier = index.jobs[: selected.number - 1][::-1]
+    record = LogRecord(filename)
+    # bytes read and lines matched by the regex patterns, for tracing
+    read = [0, 0]
+
+    def scan(mm, start, end):
+        read[0] += end - start
+        read[1] += scan_lines(record, read_lines(mm, start, end))
+
+    with trace.span("scan job", file=filename, job=selected.number), map_log(
+        filename
+    ) as mm:
+        if "geometry" not in selected.sections:
+            for previous in earlier:
+                if "geometry" in previous.sections:
+                    scan(mm, *previous.sections["geometry"])
+                    break
+        scan(mm, selected.start, selected.end)
+        # a table of an unrelated earlier job says nothing about the geometry of this job
+        if (
+            record.table is None
+            and "geometry" not in selected.sections
+            and earlier
+            and OPT_PATTERN.search(earlier[0].route)
+            and "convergence" in earlier[0].sections
+        ):
+            scan(mm, *earlier[0].sections["convergence"])
+    trace.count(filename, "bytes", read[0])
+    trace.count(filename, "matches", read[1])
+    return record
+
+
+if __name__ == "__main__":  # only execute this if this file is run as a script
+
+    parser = argparse.ArgumentParser(
+        description="Lists the jobs of a Gaussian log file and the byte offsets of their sections."
+    )
+    parser.add_argument("filename", help="path to the Gaussian log file")
+    args = parser.parse_args()
+
+    try:
+        index = index_log(args.filename)
+    except (OSError, ValueError) as e:
+        print(e)
+        print("Exiting...")
+        raise SystemExit(1)
+
+    default = index.job().number
+    print("%s: %i bytes, %i jobs" % (args.filename, index.size, len(index.jobs)))
+    for job in index.jobs:
+        print(
+            "\nJob %i%s: bytes %i-%i"
+            % (
+                job.number,
+                " (default)" if job.number == default else "",
+                job.start,
+                job.end,
+            )
+        )
+        print("  %s" % job.route)
+        for name in SECTIONS:
+            if name in job.sections:
+                print("  %-16s %i-%i" % ((name,) + job.sections[name]))
@@ -0,0 +1,332 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from extractions.scanner import LogRecord, read_lines, scan_lines
+from extractions.sources import open_log, source_path
+from file_io import trace
+
+# log files read at the same time, enough to hide the latency of a network filesystem
+DEFAULT_READS = 16
+# bytes of log files held in memory between reading and parsing (256 MB)
+DEFAULT_BUFFER = 256 * 1024**2
+
+
+class PrefetchStats:
+    """
+    Timings of a `prefetch_logs()` run.
+
+    Attributes:
+    -----------
+    files: int
+        number of log files read
+    bytes: int
+        (decompressed) bytes read
+    wall: float
+        time of the run in s
+    io: float
+        time spent reading the log files in s, summed over the concurrent reads
+    io_wait: float
+        time in s during which no log file was being parsed, i.e. the parser waited for I/O
+    cpu: float
+        CPU time spent parsing in s, summed over the parsers
+    peak_reads: int
+        largest number of log files read at the same time
+    peak_buffer: int
+        largest number of bytes held between reading and parsing
+    peak_records: int
+        largest number of parsed records held at once, by `prefetch_logs()` or by the caller they are handed to
+    errors: dict
+        error of each log file that could not be read or parsed
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.wall = 0.0
+        self.io = 0.0
+        self.io_wait = 0.0
+        self.cpu = 0.0
+        self.peak_reads = 0
+        self.peak_buffer = 0
+        self.peak_records = 0
+        self.errors = {}
+
+    def report(self):
+        """
+        Returns a summary of the run, e.g. to print after a batch run.
+        """
+        return (
+            "Prefetched %i log files (%.1f MB) in %.3f s: reading %.3f s, parser waiting for I/O %.3f s, "
+            "parsing CPU %.3f s, at most %i reads, %.1f MB buffered and %i records held at once"
+            % (
+                self.files,
+                self.bytes / 1024**2,
+                self.wall,
+                self.io,
+                self.io_wait,
+                self.cpu,
+                self.peak_reads,
+                self.peak_buffer / 1024**2,
+                self.peak_records,
+            )
+        )
+
+
+class _ByteBudget:
+    """
+    Bounds the bytes of log files held in memory. A log file larger than the budget is let in alone.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.peak = 0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self, size):
+        async with self.condition:
+            await self.condition.wait_for(
+                lambda: self.used == 0 or self.used + size <= self.limit
+            )
+            self.charge(size)
+
+    def charge(self, size):
+        self.used += size
+        self.peak = max(self.peak, self.used)
+
+    async def release(self, size):
+        async with self.condition:
+            self.used -= size
+            self.condition.notify_all()
+
+
+def _source_size(filename):
+    """
+    Returns the size of the file holding a log file on disk, 0 if it cannot be told.
+    """
+    try:
+        return os.path.getsize(source_path(filename))
+    except (OSError, TypeError):
+        return 0
+
+
+def _read_log(filename):
+    """
+    Reads a log file into memory - see `open_log()`. Runs in an I/O thread.
+    """
+    with open_log(filename, "rb") as file:
+        return file.read()
+
+
+def parse_log(filename, data):
+    """
+    Parses the bytes of a Gaussian log file - see `scan_log()`. Runs in a parser thread or process.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the log file, kept in the record
+    data: bytes
+        contents of the log file
+
+    Returns:
+    --------
+    record: LogRecord
+        Information extracted from the log file
+    cpu: float
+        CPU time of the parser thread in s
+    """
+    start = time.thread_time()
+    record = LogRecord(filename)
+    scan_lines(record, read_lines(data, 0, len(data)))
+    return record, time.thread_time() - start
+
+
+async def prefetch_logs_async(
+    filenames,
+    reads=DEFAULT_READS,
+    buffer=DEFAULT_BUFFER,
+    executor=None,
+    stats=None,
+    on_record=None,
+):
+    """
+    Reads many log files concurrently and parses each one as soon as it has been read, so reading overlaps
+    with parsing - see `prefetch_logs()`.
+
+    Parameters:
+    -----------
+    filenames: list
+        locations of the log files, duplicates are read once
+    reads: int
+        largest number of log files read at the same time
+    buffer: int
+        largest number of bytes held between reading and parsing. Compressed log files are counted at their
+        size on disk until they have been read
+    executor: Executor
+        pool the log files are parsed in, defaults to a single thread
+    stats: PrefetchStats
+        filled in with the timings of the run
+    on_record: callable
+        if given, called in the event loop with the filename and the LogRecord of each log file as soon as it
+        is parsed, or None if it could not be read or parsed. The records are then handed on instead of kept
+
+    Returns:
+    --------
+    records: dict
+        LogRecord of each log file that was read and parsed, empty with `on_record`
+    """
+    loop = asyncio.get_running_loop()
+    stats = stats if stats is not None else PrefetchStats()
+    semaphore = asyncio.Semaphore(reads)
+    budget = _ByteBudget(buffer)
+    records = {}
+    # parses in flight and the time the parser last became idle, to measure the time it waited for I/O
+    parsing = [0, time.perf_counter()]
+    active_reads = [0]
+
+    async def fetch(filename, io_pool, parse_pool):
+        size = await loop.run_in_executor(io_pool, _source_size, filename)
+        await budget.acquire(size)
+        record = None
+        try:
+            async with semaphore:
+                active_reads[0] += 1
+                stats.peak_reads = max(stats.peak_reads, active_reads[0])
+                start = time.perf_counter()
+                try:
+                    data = await loop.run_in_executor(io_pool, _read_log, filename)
+                finally:
+                    stats.io += time.perf_counter() - start
+                    active_reads[0] -= 1
+            # decompressed log files are charged their full size once read
+            budget.charge(len(data) - size)
+            size = len(data)
+            stats.bytes += size
+
+            if parsing[0] == 0:
+                stats.io_wait += time.perf_counter() - parsing[1]
+            parsing[0] += 1
+            try:
+                record, cpu = await loop.run_in_executor(
+                    parse_pool, parse_log, filename, data
+                )
+            finally:
+                parsing[0] -= 1
+                if parsing[0] == 0:
+                    parsing[1] = time.perf_counter()
+            del data
+            stats.cpu += cpu
+            stats.files += 1
+        except Exception as e:
+            stats.errors[filename] = e
+        finally:
+            await budget.release(size)
+        if on_record is not None:
+            on_record(filename, record)
+        elif record is not None:
+            records[filename] = record
+            stats.peak_records = len(records)
+
+    start = time.perf_counter()
+    io_pool = ThreadPoolExecutor(reads)
+    parse_pool = executor or ThreadPoolExecutor(1)
+    try:
+        await asyncio.gather(
+            *(
+                fetch(filename, io_pool, parse_pool)
+                for filename in dict.fromkeys(filenames)
+            )
+        )
+    finally:
+        io_pool.shutdown()
+        # a pool given by the caller is left running
+        if executor is None:
+            parse_pool.shutdown()
+    stats.io_wait += time.perf_counter() - parsing[1]
+    stats.wall = time.perf_counter() - start
+    stats.peak_buffer = budget.peak
+    return records
+
+
+def prefetch_logs(filenames, reads=DEFAULT_READS, buffer=DEFAULT_BUFFER, workers=1):
+    """
+    Reads and parses many log files, for log files on a network filesystem (NFS, Lustre) where the latency of
+    opening and reading each file is larger than the time to parse it. Up to `reads` log files are read at the
+    same time by an asyncio event loop, and each log file is handed to the parser as soon as it has been read,
+    so reading overlaps with parsing. The bytes held in memory are bounded by `buffer`.
+
+    Parameters:
+    -----------
+    filenames: list
+        locations of the log files, plain, compressed or archived - see `open_log()`
+    reads: int
+        largest number of log files read at the same time
+    buffer: int
+        largest number of bytes held between reading and parsing
+    workers: int
+        number of parser processes, 1 parses in a thread of this process
+
+    Returns:
+    --------
+    records: dict
+        LogRecord of each log file, the log files that could not be read or parsed are in `stats.errors`
+    stats: PrefetchStats
+        timings of the run - see `PrefetchStats.report()`
+    """
+    stats = PrefetchStats()
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        with trace.span("prefetch", files=len(filenames)):
+            records = asyncio.run(
+                prefetch_logs_async(filenames, reads, buffer, executor, stats)
+            )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return records, stats
+
+
+if __name__ == "__main__":  # only execute this if this file is run as a script
+
+    parser = argparse.ArgumentParser(
+        description="Reads and parses Gaussian log files concurrently, and reports the time spent reading and parsing."
+    )
+    parser.add_argument("filenames", nargs="+", help="paths to the Gaussian log files")
+    parser.add_argument(
+        "-r",
+        "--reads",
+        type=int,
+        default=DEFAULT_READS,
+        help="number of log files read at the same time (default: %i)" % DEFAULT_READS,
+    )
+    parser.add_argument(
+        "--buffer",
+        type=float,
+        default=DEFAULT_BUFFER / 1024**2,
+        help="MB of log files held in memory between reading and parsing (default: %i)"
+        % (DEFAULT_BUFFER / 1024**2),
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=1,
+        help="number of parser processes, 1 parses in a thread (default: 1)",
+    )
+    args = parser.parse_args()
+    if args.reads < 1 or args.buffer <= 0 or args.workers < 1:
+        parser.error("--reads, --buffer and --workers must be positive")
+
+    records, stats = prefetch_logs(
+        args.filenames, args.reads, int(args.buffer * 1024**2), args.workers
+    )
+    for filename, error in stats.errors.items():
+        print("FAILED %s: %s" % (filename, error))
+    print(stats.report())
@@ -0,0 +1,391 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import mmap
+import re
+
+import numpy as np
+
+from extractions.sources import is_plain, open_log
+from file_io import trace
+
+# regex patterns used by the scanner, compiled once at import.
+# "Temperature(?:\s|=)*" - search for "Temperature" and any number of whitespace characters OR an = character
+# (\d*.\d*) - in 1st capture group, match any number of digit characters with a "." in between
+TEMP_PATTERN = re.compile(r"Temperature(?:\s|=)*(\d*.\d*)")
+# ([A-Za-z]*) - element identifier, \(Iso=(\d*)\) - mass number of the isotope
+ISO_PATTERN = re.compile(r"([A-Za-z]*)\(Iso=(\d*)\)")
+# "NAtoms=", any number of whitespace, and any number of digits after.
+NATOMS_PATTERN = re.compile(r"NAtoms=\s*(\d*)")
+# a row of a normal mode displacement table, e.g. "     1  30     0.00   0.00   0.00 ..."
+# (\d+) - atom index, (\d+) - atomic number, then the X,Y,Z displacements of every mode in the block
+DISP_ROW_PATTERN = re.compile(r"^\s+(\d+)\s+(\d+)((?:\s+-?\d+\.\d+)+)\s*$")
+# the mass of each atom printed before the thermochemistry, e.g. " Atom     1 has atomic number 30 and mass  65.92604"
+MASS_PATTERN = re.compile(
+    r"Atom\s+(\d+) has atomic number\s+(\d+) and mass\s+(\d+\.\d+)"
+)
+# lines that start a new job: the next step of a multi-step (Link1) input, or another run appended to the log file
+JOB_MARKERS = ("Link1:  Proceeding to internal job step", "Entering Link 1 ")
+
+
+class LogRecord:
+    """
+    Structured record of the information extracted from a single Gaussian log file by `scan_log()`.
+
+    Attributes:
+    -----------
+    filename: str
+        location of the Gaussian log file
+    temperature: float or None
+        Temperature value of the simulation (last value in the file)
+    element: str or None
+        Element that has isotopic information
+    isotope: int or None
+        Mass number of the isotope
+    isotope_atoms: list
+        Indices (from 1) of the atoms labelled with "(Iso=" in the input geometry
+    num_atoms: int or None
+        Number of atoms (last "NAtoms=" value in the file)
+    table: str or None
+        Last fully converged item convergence table
+    low_freq: list
+        List of low frequencies
+    frequencies: ndarray
+        1D array of every vibrational frequency in the file
+    displacements: list
+        Normal mode displacement blocks. Each block is a list of (atom index, atomic number, coordinates)
+        tuples, where coordinates holds the X,Y,Z displacements of every mode in the block.
+    masses: list
+        Mass of each atom used in the frequency calculation (last set in the file)
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.temperature = None
+        self.element = None
+        self.isotope = None
+        self.isotope_atoms = []
+        self.num_atoms = None
+        self.table = None
+        self.low_freq = []
+        self.frequencies = np.array([])
+        self.displacements = []
+        self.masses = []
+
+
+def scan_lines(record, lines):
+    """
+    Scans lines of a Gaussian log file, storing the extracted information in the given record.
+    Values found later in the lines replace earlier ones, frequencies and low frequencies are appended.
+    When a later job (e.g. a second Link1 frequency job) prints frequencies, they replace the frequencies,
+    low frequencies and displacements of the earlier jobs, so the record holds the last frequency job.
+
+    Parameters:
+    -----------
+    record: LogRecord
+        record that the extracted information is stored in
+    lines: iterable
+        lines of the log file
+
+    Returns:
+    --------
+    matches: int
+        number of lines matched by the regex patterns, for tracing
+    """
+    freq = []  # initialise list to store frequencies
+    matches = 0
+
+    # state of the item convergence table currently being read
+    # table_lines holds the table lines read so far, None if not inside a table
+    table_lines = None
+    # state of the displacement block currently being read, None if not inside a block
+    block = None
+    # number of input geometry atoms read so far, None if not inside the input geometry
+    geometry = None
+    # a new job has started and has not printed frequencies yet
+    new_job = False
+
+    for line in lines:  # searching through the lines
+        line = line.rstrip("\r\n")
+
+        # displacement rows follow the "Atom  AN  X  Y  Z" header until the first non matching line
+        if block is not None:
+            match = DISP_ROW_PATTERN.match(line)
+            if match is not None:
+                matches += 1
+                coords = list(map(float, match.group(3).split()))
+                block.append((int(match.group(1)), int(match.group(2)), coords))
+                continue
+            record.displacements.append(block)
+            block = None
+
+        # input geometry - one atom per line after the "Symbolic Z-matrix:" and "Charge =" lines,
+        # until a blank line or the Z-matrix variables
+        if geometry is not None:
+            if not line.strip() or "Variables:" in line:
+                geometry = None
+            elif "Charge =" not in line:
+                geometry += 1
+                if "(Iso=" in line:
+                    record.isotope_atoms.append(geometry)
+        if "Symbolic Z-matrix:" in line:
+            geometry = 0
+            record.isotope_atoms = []
+            continue
+
+        # item convergence table - the "Converged?" header followed by 4 lines that have converged ("YES")
+        if table_lines is not None and "Converged?" not in line:
+            if "YES" in line:
+                # keep the line up to and including the last "YES"
+                table_lines.append(line[: line.rfind("YES") + 3])
+                if len(table_lines) == 5:
+                    # ensuring last table is the one extracted
+                    record.table = "\n".join(table_lines)
+                    table_lines = None
+                continue
+            # an item has not converged, discard the table
+            table_lines = None
+        if "Converged?" in line:
+            table_lines = [line[: line.index("Converged?") + len("Converged?")]]
+            continue
+
+        if new_job and ("Low frequencies ---" in line or "Frequencies --" in line):
+            # the frequencies of a later job replace those of the earlier jobs
+            freq = []
+            record.frequencies = np.array([])
+            record.low_freq = []
+            record.displacements = []
+            new_job = False
+
+        if "Frequencies --" in line:
+            # splits the line after the label at whitespace, maps resulting strings to float
+            freq += list(map(float, line.split("Frequencies --", 1)[1].split()))
+        elif "Low frequencies ---" in line:
+            record.low_freq += list(
+                map(float, line.split("Low frequencies ---", 1)[1].split())
+            )
+        elif "Atom  AN" in line:
+            block = []
+        elif "Temperature" in line:
+            match = TEMP_PATTERN.search(line)
+            # "Temperature" without a value, e.g. at the end of a line
+            if match is not None:
+                matches += 1
+                try:
+                    record.temperature = float(match.group(1))
+                except ValueError:
+                    pass
+        elif "(Iso=" in line:
+            match = ISO_PATTERN.search(line)
+            if match is not None and match.group(2):
+                matches += 1
+                record.element = str(match.group(1))
+                record.isotope = int(match.group(2))
+        elif "has atomic number" in line:
+            match = MASS_PATTERN.search(line)
+            if match is not None:
+                matches += 1
+                # atom 1 starts a new set of masses
+                if match.group(1) == "1":
+                    record.masses = []
+                record.masses.append(float(match.group(3)))
+        elif "NAtoms=" in line:
+            match = NATOMS_PATTERN.search(line)
+            if match.group(1):
+                matches += 1
+                record.num_atoms = int(match.group(1))
+        elif JOB_MARKERS[0] in line or JOB_MARKERS[1] in line:
+            new_job = True
+
+    # a displacement block at the end of the lines
+    if block is not None:
+        record.displacements.append(block)
+
+    # concatenate the frequencies with any already in the record
+    record.frequencies = np.concatenate((record.frequencies, freq))
+    return matches
+
+
+def scan_log(filename, tail=False, job=None):
+    """
+    Reads a Gaussian log file once, line by line, and extracts everything required to calculate the
+    reduced partition function ratio: temperature, isotopic information, number of atoms, item convergence table,
+    low frequencies, frequencies and normal mode displacements.
+
+    Parameters:
+    -----------
+    filename: str
+        The location of the Gaussian log file
+    tail: bool
+        If True, only the last frequency section of the file is parsed - see `scan_tail()`
+    job: int
+        If given, only this job of a multi-job (Link1) log file is parsed, numbered from 1 - see `scan_job()`
+
+    Returns:
+    --------
+    record: LogRecord
+        Information extracted from the log file
+    """
+    if job is not None:
+        # imported here as the job index is only needed for multi-job log files
+        from extractions.jobs import scan_job
+
+        return scan_job(filename, job)
+    if tail:
+        with trace.span("scan tail", file=filename):
+            record = scan_tail(filename)
+        if record is not None:
+            return record
+
+    record = LogRecord(filename)
+    with trace.span("scan", file=filename):
+        with open_log(filename) as file:  # opening and searching through the file
+            matches = scan_lines(record, file)
+            if trace.tracing():
+                trace.count(filename, "bytes", _bytes_read(file))
+                trace.count(filename, "matches", matches)
+    return record
+
+
+def _bytes_read(file):
+    """
+    Returns the number of (decompressed) bytes read from a text file, 0 if it cannot be told, e.g. for a pipe.
+    """
+    try:
+        return file.buffer.tell()
+    except (AttributeError, OSError, ValueError):
+        return 0
+
+
+def line_start(mm, pos):
+    """
+    Returns the offset of the start of the line containing the byte offset `pos`.
+    """
+    return mm.rfind(b"\n", 0, pos) + 1
+
+
+def read_lines(mm, start, end):
+    """
+    Decodes the bytes between the offsets `start` and `end` into a list of lines.
+    """
+    return mm[start:end].decode("ascii", errors="replace").splitlines()
+
+
+def scan_tail(filename):
+    """
+    Memory maps a Gaussian log file and parses only the last frequency section, which sits at the very end of
+    optimisation + frequency log files. Searching backwards from the end of the file, the window parsed starts at
+    the "Low frequencies" lines before the last "Harmonic frequencies" block and runs through "Thermochemistry" to the
+    end of the file. The input section at the top of the file (isotopic information), the last "NAtoms=" line before
+    the window and, if the window has none, the last converged item convergence table are read separately. Log files
+    where a later job sets its own isotopes are left to the full scan.
+
+    Parameters:
+    -----------
+    filename: str
+        The location of the Gaussian log file
+
+    Returns:
+    --------
+    record: LogRecord or None
+        Information extracted from the log file, or None if the window is ambiguous and the whole file
+        needs to be scanned instead.
+    """
+    # compressed and archived log files cannot be memory mapped, they are streamed by `scan_log()` instead
+    if not is_plain(filename):
+        return None
+    record = LogRecord(filename)
+    # bytes read and lines matched by the regex patterns, for tracing
+    read = [0, 0]
+
+    def scan(mm, start, end):
+        read[0] += end - start
+        read[1] += scan_lines(record, read_lines(mm, start, end))
+
+    with open(filename, "rb") as file:
+        try:
+            mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files cannot be memory mapped
+            return None
+
+        with mm:
+            # the last frequency block and the thermochemistry that follows it
+            freq_pos = mm.rfind(b"Harmonic frequencies")
+            thermo_pos = mm.rfind(b"Thermochemistry")
+            if freq_pos == -1 or thermo_pos < freq_pos:
+                return None
+
+            # the window starts at the first of the "Low frequencies" lines printed before the frequency block
+            low_pos = mm.rfind(b"Low frequencies ---", 0, freq_pos)
+            if low_pos == -1:
+                return None
+            start = line_start(mm, low_pos)
+            while start > 0:
+                previous = line_start(mm, start - 1)
+                if mm.find(b"Low frequencies ---", previous, start) == -1:
+                    break
+                start = previous
+
+            # the input section, ending at the first "NAtoms=" line, holds the isotopic information
+            head_end = mm.find(b"NAtoms=", 0, start)
+            if head_end == -1:
+                return None
+            # a later (Link1) job with its own input section may change the isotopes
+            if mm.find(b"(Iso=", head_end, start) != -1:
+                return None
+            scan(mm, 0, line_start(mm, head_end))
+
+            # the last number of atoms before the window
+            natoms_pos = line_start(mm, mm.rfind(b"NAtoms=", 0, start))
+            scan(mm, natoms_pos, mm.find(b"\n", natoms_pos))
+
+            # parse the window
+            scan(mm, start, len(mm))
+
+            # search backwards for the last converged table if the window does not contain one
+            end = start
+            while record.table is None:
+                table_pos = mm.rfind(b"Converged?", 0, end)
+                if table_pos == -1:
+                    break
+                end = line_start(mm, table_pos)
+                # the table header and the 4 items
+                table_end = end
+                for i in range(5):
+                    table_end = mm.find(b"\n", table_end, len(mm) - 1) + 1 or len(mm)
+                scan(mm, end, table_end)
+    trace.count(filename, "bytes", read[0])
+    trace.count(filename, "matches", read[1])
+
+    # checking the window is consistent, otherwise the whole file is scanned
+    if record.temperature is None or record.num_atoms is None:
+        return None
+    num_freq = len(record.frequencies)
+    # 3N-6 frequencies for non linear, 3N-5 for linear molecules
+    if num_freq not in (3 * record.num_atoms - 6, 3 * record.num_atoms - 5):
+        return None
+    # every frequency must have a displacement column
+    num_modes = sum(len(block[0][2]) // 3 for block in record.displacements if block)
+    if num_modes != num_freq:
+        return None
+
+    return record
+
+
+def get_record(log):
+    """
+    Returns the LogRecord of a log file, scanning the file if a filename is given.
+
+    Parameters:
+    -----------
+    log: str or LogRecord
+        location of the Gaussian log file, or an already scanned record
+
+    Returns:
+    --------
+    record: LogRecord
+        Information extracted from the log file
+    """
+    if isinstance(log, LogRecord):
+        return log
+    return scan_log(log)
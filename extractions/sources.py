@@ -0,0 +1,331 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import contextlib
+import functools
+import io
+import mmap
+import os
+import sys
+
+# reads the log file from standard input
+STDIN = "-"
+# separates a tar archive from the name of a member, e.g. "zinc.tar.gz::ZnCl4/ZNCL4_B_64.LOG"
+MEMBER_SEPARATOR = "::"
+# extensions of compressed files and the module that reads them
+COMPRESSION = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "lzma",
+    ".lzma": "lzma",
+    ".zst": "zstd",
+}
+# extensions of tar archives
+TAR_EXTENSIONS = (
+    ".tar",
+    ".tar.gz",
+    ".tgz",
+    ".tar.bz2",
+    ".tbz2",
+    ".tar.xz",
+    ".txz",
+)
+
+
+class _StreamReader(io.RawIOBase):
+    """
+    Unseekable binary stream over a file object, e.g. a member of a tar archive read in stream mode,
+    whose own `seekable()` fails.
+    """
+
+    def __init__(self, file):
+        self.file = file
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.file.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def split_member(filename):
+    """
+    Splits a log file location into the location of the file on disk and the name of a tar archive member,
+    e.g. "zinc.tar.gz::ZNCL4_B_64.LOG" -> ("zinc.tar.gz", "ZNCL4_B_64.LOG"), "ZNCL4_B_64.LOG" -> ("ZNCL4_B_64.LOG", None).
+    """
+    path, separator, member = filename.partition(MEMBER_SEPARATOR)
+    return path, (member if separator else None)
+
+
+def compression(filename):
+    """
+    Returns the compression of a file from its extension ("gzip", "bz2", "lzma" or "zstd"), None if uncompressed.
+    """
+    return COMPRESSION.get(os.path.splitext(filename)[1].lower())
+
+
+def is_tar(filename):
+    """
+    Returns True if the file is a tar archive, from its extension.
+    """
+    return filename.lower().endswith(TAR_EXTENSIONS)
+
+
+def is_plain(filename):
+    """
+    Returns True if the log file is an uncompressed file on disk, which can be memory mapped.
+    """
+    return (
+        filename != STDIN
+        and split_member(filename)[1] is None
+        and compression(filename) is None
+    )
+
+
+def source_path(filename):
+    """
+    Returns the location of the file on disk holding a log file, e.g. its tar archive. None for standard input.
+    """
+    if filename == STDIN:
+        return None
+    return split_member(filename)[0]
+
+
+def source_exists(filename):
+    """
+    Checks if a log file exists - a file on disk, a member of a tar archive or standard input.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the log file
+
+    Returns:
+    --------
+    exists: bool
+        True if the log file can be read
+    """
+    if filename == STDIN:
+        return True
+    path, member = split_member(filename)
+    if not os.path.isfile(path):
+        return False
+    if member is None:
+        return True
+    return member in archive_index(path)
+
+
+def _decompress(raw, method):
+    """
+    Wraps a binary stream of compressed data in a stream of the decompressed data.
+    """
+    # imported here as each compression is only needed for its own files
+    if method == "gzip":
+        import gzip
+
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    if method == "bz2":
+        import bz2
+
+        return bz2.BZ2File(raw, "rb")
+    if method == "lzma":
+        import lzma
+
+        return lzma.LZMAFile(raw, "rb")
+    # zstd is in the standard library from Python 3.14, otherwise from the zstandard package
+    try:
+        from compression import zstd
+
+        return zstd.ZstdFile(raw, "rb")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError(
+            "Reading .zst files needs Python 3.14 or the zstandard package (pip install zstandard)."
+        ) from None
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw))
+
+
+@contextlib.contextmanager
+def open_log(filename, mode="rt"):
+    """
+    Opens a log file for streaming, without writing anything to disk. The log file can be a plain file,
+    a compressed file (.gz, .bz2, .xz, .zst), a member of a tar archive written as "<archive>::<member>"
+    (optionally compressed, e.g. .tar.gz) or standard input ("-").
+
+    Parameters:
+    -----------
+    filename: str
+        location of the log file
+    mode: str
+        "rt" for text, "rb" for bytes
+
+    Yields:
+    -------
+    file: file object
+        stream of the decompressed contents of the log file
+
+    Raises:
+    -------
+    FileNotFoundError
+        if the tar archive has no such member
+    """
+    if filename == STDIN:
+        yield sys.stdin.buffer if mode == "rb" else sys.stdin
+        return
+    path, member = split_member(filename)
+    if member is None and compression(path) is None:
+        with open(path, mode) as file:
+            yield file
+        return
+
+    with contextlib.ExitStack() as stack:
+        if member is None:
+            raw = stack.enter_context(open(path, "rb"))
+            file = stack.enter_context(_decompress(raw, compression(path)))
+        else:
+            # imported here as tar archives are optional
+            import tarfile
+
+            info = archive_index(path).get(member)
+            if info is None:
+                raise FileNotFoundError("ERROR - %s has no member %s!" % (path, member))
+            # the member is read from its indexed offset, without reading the headers of the other members.
+            # A compressed archive is still decompressed up to the member - see `iter_members()`
+            archive = stack.enter_context(tarfile.open(path, "r:*"))
+            file = stack.enter_context(archive.extractfile(info))
+            # members may be compressed too, e.g. logs/ZNCL4_B_64.LOG.gz
+            if compression(member) is not None:
+                file = stack.enter_context(_decompress(file, compression(member)))
+        if mode == "rt":
+            file = io.TextIOWrapper(file)
+        yield file
+
+
+@contextlib.contextmanager
+def map_log(filename):
+    """
+    Memory maps a plain log file, or reads a compressed / archived log file into memory - see `open_log()`.
+    Both support `find()`, `rfind()` and slicing, for random access to the log file by byte offset.
+    """
+    if is_plain(filename):
+        with open(filename, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm
+    else:
+        with open_log(filename, "rb") as file:
+            yield file.read()
+
+
+def archive_index(filename):
+    """
+    Indexes the files in a tar archive by name, reading the archive once. The index is kept until the archive
+    changes, so looking up many members reads the archive once rather than once per member.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the tar archive
+
+    Returns:
+    --------
+    index: dict
+        TarInfo of each file in the archive, with the offset of its data, in archive order
+    """
+    stat = os.stat(filename)
+    return _archive_index(os.path.abspath(filename), stat.st_size, stat.st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=64)
+def _archive_index(path, size, mtime):
+    """
+    Reads the headers of every file in a tar archive - see `archive_index()`. Cached by the size and
+    modification time of the archive.
+    """
+    # imported here as tar archives are optional
+    import tarfile
+
+    with tarfile.open(path, "r:*") as archive:
+        return {
+            member.name: member for member in archive.getmembers() if member.isfile()
+        }
+
+
+def tar_members(filename, logs_only=True):
+    """
+    Lists the files in a tar archive.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the tar archive
+    logs_only: bool
+        only list the Gaussian log files (.log or .out, optionally compressed)
+
+    Returns:
+    --------
+    members: list
+        names of the files in the archive
+    """
+    names = list(archive_index(filename))
+    if logs_only:
+        names = [name for name in names if is_log(name)]
+    return names
+
+
+def iter_members(filename, members=None, mode="rt"):
+    """
+    Streams the log files in a tar archive in one pass, decompressing the archive once. Reading many
+    members of a compressed archive with `open_log()` decompresses the archive up to each member in turn.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the tar archive
+    members: collection
+        names of the members to read, defaults to every Gaussian log file in the archive
+    mode: str
+        "rt" for text, "rb" for bytes
+
+    Yields:
+    -------
+    member: str
+        name of the member
+    file: file object
+        stream of the decompressed contents of the member, only valid until the next member is yielded
+    """
+    # imported here as tar archives are optional
+    import tarfile
+
+    with tarfile.open(filename, "r|*") as archive:
+        for info in archive:
+            if not info.isfile():
+                continue
+            if not (is_log(info.name) if members is None else info.name in members):
+                continue
+            with contextlib.ExitStack() as stack:
+                file = io.BufferedReader(
+                    _StreamReader(stack.enter_context(archive.extractfile(info)))
+                )
+                # members may be compressed too, e.g. logs/ZNCL4_B_64.LOG.gz
+                if compression(info.name) is not None:
+                    file = stack.enter_context(
+                        _decompress(file, compression(info.name))
+                    )
+                if mode == "rt":
+                    file = io.TextIOWrapper(file)
+                yield info.name, file
+
+
+def is_log(filename):
+    """
+    Returns True if the file is a Gaussian log file (.log or .out, in any case), optionally compressed.
+    """
+    name = filename.lower()
+    if compression(name) is not None:
+        name = os.path.splitext(name)[0]
+    return name.endswith((".log", ".out"))
@@ -0,0 +1,132 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import argparse
+
+from batch import FIT_GRID, fan_out, write_fit, write_results
+from calculations.calculations import temperature_grid
+from file_io import trace
+
+if __name__ == "__main__":  # only execute this if this file is run as a script
+
+    parser = argparse.ArgumentParser(
+        description="Calculates the reduced partition function ratio of many heavy isotopologues against one light isotopologue, reading the light isotope log file once."
+    )
+    parser.add_argument("light", help="path to the light isotope file")
+    parser.add_argument("heavies", nargs="+", help="paths to the heavy isotope files")
+    parser.add_argument(
+        "--linear",
+        choices=["y", "n"],
+        default="n",
+        help="'y' if the molecule is linear",
+    )
+    parser.add_argument(
+        "--output", required=True, help="path to the consolidated results CSV file"
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--unconverged",
+        choices=["continue", "fail"],
+        default="continue",
+        help="what to do with log files without a converged item convergence table",
+    )
+    parser.add_argument(
+        "--tail",
+        action="store_true",
+        help="only parse the last frequency section of each log file",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="reuse parsed log files from the on-disk cache",
+    )
+    parser.add_argument(
+        "--temperatures",
+        metavar="START:STOP:STEP",
+        help="also calculate the RPFR over a grid of temperatures in K, e.g. 273.15:1773.15:25",
+    )
+    parser.add_argument(
+        "--fit",
+        metavar="FILE",
+        help="fit 1000*lnB = a*x + b*x^2 + c*x^3 (x = 10^6/T^2), with more terms up to h*x^8 for pairs off by more than 1%%, to the RPFR of every pair over the --temperatures grid (default: 273.15:1773.15:10) and write the coefficients a-h to FILE",
+    )
+    parser.add_argument(
+        "--store",
+        metavar="DATABASE",
+        help="also add the calculated pairs to an SQLite results database (see file_io/store.py)",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="time each stage of every pair and write a Chrome trace (chrome://tracing, ui.perfetto.dev) to FILE",
+    )
+    args = parser.parse_args()
+
+    # temperature grid, one column of the results table per temperature
+    temperatures = None
+    if args.temperatures is not None:
+        try:
+            start, stop, step = map(float, args.temperatures.split(":"))
+            temperatures = temperature_grid(start, stop, step)
+        except ValueError:
+            parser.error(
+                "--temperatures must be given as START:STOP:STEP, e.g. 273.15:1773.15:25"
+            )
+    elif args.fit:
+        temperatures = temperature_grid(*FIT_GRID)
+
+    print(
+        "Calculating the RPFR of %i heavy isotopologues against %s..."
+        % (len(args.heavies), args.light)
+    )
+    if args.trace:
+        trace.enable()
+    try:
+        results = fan_out(
+            args.light,
+            args.heavies,
+            args.linear,
+            args.workers,
+            args.unconverged,
+            args.tail,
+            args.cache,
+            temperatures=temperatures,
+        )
+    except (ValueError, OSError) as e:
+        print(" ".join(str(e).split()))
+        print("Exiting...")
+        raise SystemExit(1)
+    write_results(args.output, results, temperatures)
+    if args.fit:
+        write_fit(args.fit, results, temperatures)
+    if args.store:
+        # imported here as the store is optional
+        from file_io.store import ResultStore
+
+        with ResultStore(args.store) as store:
+            store.add_rows(results)
+
+    print("Heavy isotope, 1000*lnB")
+    for result in results:
+        print(
+            "%s  %s"
+            % (
+                result["heavy"],
+                (
+                    result["beta"]
+                    if result["status"] == "ok"
+                    else "FAILED: %s" % result["reason"]
+                ),
+            )
+        )
+    print("Results written to %s" % args.output)
+    if args.trace:
+        tracer = trace.disable()
+        tracer.write(args.trace)
+        print("\n%s\nTrace written to %s" % (tracer.report(), args.trace))
@@ -1,7 +1,78 @@
 # Written by Devang Patel
 # GitHub username: acse-dp1820
 
+import csv
+import itertools
+import logging
 import os
+import sys
+
+import numpy as np
+
+from calculations.calculations import fractionation_pairs
+
+logger = logging.getLogger(__name__)
+# silent unless the application configures logging
+logger.addHandler(logging.NullHandler())
+
+# output formats, inferred from the extension of the output file if not given
+OUTPUT_FORMATS = ["text", "jsonl", "csv", "npz"]
+FORMAT_EXTENSIONS = {".jsonl": "jsonl", ".json": "jsonl", ".csv": "csv", ".npz": "npz"}
+# attributes of an RPFRResult written by the machine readable formats, in order
+RESULT_FIELDS = [
+    "light_filename",
+    "heavy_filename",
+    "element",
+    "light_isotope",
+    "heavy_isotope",
+    "temperature",
+    "beta",
+    "ratio",
+    "Q_heavy",
+    "Q_light",
+    "beta_cont",
+    "ratio_cont",
+    "Q_heavy_cont",
+    "Q_light_cont",
+    "beta_bm",
+    "beta_lower",
+    "beta_upper",
+    "screened",
+    "light_freq",
+    "heavy_freq",
+    "light_low_freq",
+    "heavy_low_freq",
+    "isotope_atoms",
+    "light_cont",
+    "heavy_cont",
+    "light_participation",
+    "heavy_participation",
+    "light_freq_cont",
+    "heavy_freq_cont",
+    "temperatures",
+    "beta_curve",
+    "ratio_curve",
+    "Q_heavy_curve",
+    "Q_light_curve",
+    "light_table",
+    "heavy_table",
+    "warnings",
+]
+# columns of the polynomial fit table written by `write_coefficients()`, the coefficients a, b, c, ...
+# of x, x^2, x^3, ... (x = 10^6/T^2) are written between t_max and rms
+COEFFICIENT_COLUMNS = [
+    "light",
+    "heavy",
+    "element",
+    "light_isotope",
+    "heavy_isotope",
+    "t_min",
+    "t_max",
+    "rms",
+    "max_residual",
+    "max_relative",
+]
+COEFFICIENT_NAMES = "abcdefgh"
 
 
 def output_file(filename):
@@ -13,11 +84,498 @@ def output_file(filename):
     filename: str
         location of output file
     """
-    # if file exists, print filepath
+    # if file exists, log filepath
     if os.path.isfile(filename):
-        print("The output filepath is: " + filename)
-    # if file doesn't exist, create the filepath even if some directories exist and print filepath
+        logger.info("The output filepath is: %s", filename)
+    # if file doesn't exist, create the filepath even if some directories exist and log filepath
     else:
-        print("Creating file + associated directories.")
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        print("The output filepath is: " + filename)
+        logger.info("Creating file + associated directories.")
+        if os.path.dirname(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+        logger.info("The output filepath is: %s", filename)
+
+
+def array_text(array):
+    """
+    Formats an array like `str(array)`, but with every element - numpy summarises arrays of more than
+    1000 elements with "...".
+    """
+    array = np.asarray(array)
+    if array.size <= 1000 or array.ndim != 1:
+        return np.array2string(array, threshold=sys.maxsize)
+    # numpy formats large arrays slowly, so they are written with the shortest exact representation
+    # of each value, 8 per line
+    values = list(map(str, array.tolist()))
+    return (
+        "["
+        + "\n ".join(" ".join(values[i : i + 8]) for i in range(0, len(values), 8))
+        + "]"
+    )
+
+
+def write_pair_output(filename, result):
+    """
+    Writes the basic information of a pair calculated in batch mode to an output file,
+    in the same layout as the output file written by `script.py`.
+
+    Parameters:
+    -----------
+    filename: str
+        location of output file
+    result: dict
+        results table row from `batch.compute_pair()`
+    """
+    with open(filename, "w") as f:
+        # what files the data comes from
+        f.write("This output file is generated from the following files: \n")
+        f.write(
+            "Light isotope file: %s\nHeavy isotope file: %s\n\n"
+            % (result["light"], result["heavy"])
+        )
+        # isotopic information
+        if result["light_isotope"] and result["heavy_isotope"]:
+            f.write(
+                "%s isotopes extracted: %s and %s\n"
+                % (result["element"], result["light_isotope"], result["heavy_isotope"])
+            )
+        f.write("Temperature = " + str(result["temperature"]) + " K\n\n")
+        f.write(
+            "Number of frequencies used in calculating FULL RPFR: %i\n"
+            % result["num_freq"]
+        )
+        f.write("ln(v/v'): %s\n" % (str(result["ratio"])))
+        f.write("lnQ: %s\n" % (str(result["Q_heavy"])))
+        f.write("lnQ': %s\n" % (str(result["Q_light"])))
+        f.write("RPFR: %s\n" % (str(result["beta"])))
+        if result["warnings"]:
+            f.write("\nWarnings: %s\n" % result["warnings"])
+
+
+def write_output(filename, result, print_var="False"):
+    """
+    Writes the result of a reduced partition function ratio calculation to an output file.
+
+    Parameters:
+    -----------
+    filename: str
+        location of output file
+    result: RPFRResult
+        result from `RPFRCalculator.calculate()`
+    print_var: str
+        "True" to also write the individual components of the RPFR, the isotope contribution arrays,
+        the item convergence tables and the low frequencies
+    """
+    # checking if file exists + creating directories
+    output_file(filename)
+
+    logger.info("\nBasic information saved to file (if print variable == False):")
+    logger.info(
+        "Input filepaths\nIsotopic information\nTemperature\nRPFR - for all frequencies\nIf applicable, RPFR for freq. with isotopic movement\nFull list of frequencies\nSubset of frequencies that have isotopic movement.\n"
+    )
+
+    logger.info("Full information saved to file (if print variable == True):")
+    logger.info(
+        "Individual components of RPFR\nFull isotopic motion arrays\nItem convergence tables\nLow frequencies\n"
+    )
+    if print_var == "True":  # write all extracted information to file
+        logger.info("Writing all extracted information to %s", filename)
+    elif print_var == "False":  # only temp, RPFR + frequency lists
+        logger.info("Writing basic information to %s", filename)
+    else:  # if variable not recognised, print basic information
+        logger.info(
+            "Print variable not recognised. Writing basic information to %s", filename
+        )
+
+    # Writing RPFR to file
+    logger.info("Writing data to file...")
+
+    with open(filename, "w") as f:
+        # write basic information to file
+        # what files the data comes from
+        f.write("This output file is generated from the following files: \n")
+        f.write(
+            "Light isotope file: %s\nHeavy isotope file: %s\n\n"
+            % (result.light_filename, result.heavy_filename)
+        )
+
+        # write isotopic information
+        light_iso_check = result.light_isotope is not None
+        heavy_iso_check = result.heavy_isotope is not None
+        if light_iso_check and heavy_iso_check:
+            f.write(
+                "%s isotopes extracted: %s and %s\n"
+                % (result.element, str(result.light_isotope), str(result.heavy_isotope))
+            )
+        elif light_iso_check or heavy_iso_check:
+            if light_iso_check:
+                f.write(
+                    "%s isotope extracted: %s\n"
+                    % (result.element, str(result.light_isotope))
+                )
+            else:
+                logger.info("Unable to write light isotopic information.")
+            if heavy_iso_check:
+                f.write(
+                    "%s isotope extracted: %s\n"
+                    % (result.element, str(result.heavy_isotope))
+                )
+            else:
+                logger.info("Unable to write heavy isotopic information.")
+        else:
+            logger.info("Unable to write isotopic information.")
+
+        # Temperature of optimisation simulation
+        if result.temperature is not None:
+            f.write("Temperature = " + str(result.temperature) + " K\n\n")
+        else:
+            logger.info("Unable to write temperature to file.")
+
+        # number of frequencies
+        if result.light_freq is not None:
+            f.write(
+                "Number of frequencies used in calculating FULL RPFR: %i\n"
+                % len(result.light_freq)
+            )
+
+        # reduced partition function ratio
+        # print components of RPFR if print variable is set to True
+        if result.beta is not None:
+            if print_var == "True":
+                f.write("ln(v/v'): %s\n" % (str(result.ratio)))
+                f.write("lnQ: %s\n" % (str(result.Q_heavy)))
+                f.write("lnQ': %s\n" % (str(result.Q_light)))
+            f.write("RPFR: %s\n\n" % (str(result.beta)))
+        else:
+            logger.info("Unable to write RPFR to file.")
+
+        # reduced partition function ratio with selected frequencies that contain isotope movement
+        if result.beta_cont is not None:
+            f.write(
+                "Number of frequencies used in calculating secondary RPFR: %i\n"
+                % len(result.light_freq_cont)
+            )
+            f.write(
+                "This is the RPFR calculated using the frequencies that contain isotope movement.\n"
+            )
+            # print components of RPFR if print variable is set to True
+            if print_var == "True":
+                f.write("ln(v/v'): %s\n" % (str(result.ratio_cont)))
+                f.write("lnQ: %s\n" % (str(result.Q_heavy_cont)))
+                f.write("lnQ': %s\n" % (str(result.Q_light_cont)))
+            f.write("RPFR: %s\n" % (str(result.beta_cont)))
+        elif result.light_freq_cont is not None:
+            logger.info(
+                "Unable to write RPFR (with selected frequencies) to file. This is due to the number of frequencies not being the same between light and heavy isotopes."
+            )
+
+        # Writing frequencies and contributions to file if frequencies exist
+        if result.light_freq is not None:
+            f.write(
+                "\nLight isotope frequencies:\n%s\n" % array_text(result.light_freq)
+            )
+            if result.light_cont is not None:
+                if (
+                    print_var == "True"
+                ):  # print full isotope frequency contribution array
+                    f.write(
+                        "\nIsotope contributions - estimation of isotope movement in each frequency:\n%s\n"
+                        % array_text(result.light_cont)
+                    )
+                    f.write(
+                        "\nMass weighted participation of the isotope in each frequency:\n%s\n"
+                        % array_text(result.light_participation)
+                    )
+                f.write(
+                    "\nThe frequencies that contain movement of the isotope:\n%s\n"
+                    % array_text(result.light_freq_cont)
+                )
+        else:
+            logger.info("Unable to write light isotope frequencies to file.")
+
+        if result.heavy_freq is not None:
+            f.write(
+                "\nHeavy isotope frequencies:\n%s\n" % array_text(result.heavy_freq)
+            )
+            if result.heavy_cont is not None:
+                if print_var == "True":
+                    f.write(
+                        "\n Isotope contributions - estimation of isotope movement in each frequency:\n%s\n"
+                        % array_text(result.heavy_cont)
+                    )
+                    f.write(
+                        "\nMass weighted participation of the isotope in each frequency:\n%s\n"
+                        % array_text(result.heavy_participation)
+                    )
+                f.write(
+                    "\nThe frequencies that contain movement of the isotope:\n%s\n"
+                    % array_text(result.heavy_freq_cont)
+                )
+        else:
+            logger.info("Unable to write heavy isotope frequencies to file.")
+
+        # write extra information to file if print_var is True
+        if print_var == "True":  # print item convergence and low frequencies
+
+            # Light Isotope
+            if result.light_table is not None:
+                f.write("\nLight isotope convergence table:\n")
+                f.write("%s\n" % (result.light_table))  # write table to file
+            else:
+                logger.info(
+                    "\nUnable to write light isotope convergence table to file."
+                )
+            if result.light_low_freq is not None:
+                f.write("\nLow frequencies: ")
+                # write low frequency list to file
+                f.write("%s\n" % (str(result.light_low_freq)))
+            else:
+                logger.info("Unable to write light isotope low frequencies to file.")
+
+            # Heavy Isotope
+            if result.heavy_table is not None:
+                f.write("\nHeavy isotope convergence table: \n")
+                f.write("%s\n" % (result.heavy_table))  # write table to file
+            else:
+                logger.info("Unable to write heavy isotope convergence table to file.")
+            if result.heavy_low_freq is not None:
+                f.write("\nLow frequencies: ")
+                # write low frequency list to file
+                f.write("%s\n" % (str(result.heavy_low_freq)))
+            else:
+                logger.info("Unable to write heavy isotope low frequencies to file.")
+
+        # write the RPFR over the temperature grid
+        if result.temperatures is not None:
+            f.write("\nRPFR over the temperature grid:\n")
+            f.write("Temperature (K), ln(v/v'), lnQ, lnQ', RPFR\n")
+            np.savetxt(
+                f,
+                np.column_stack(
+                    (
+                        result.temperatures,
+                        result.ratio_curve,
+                        result.Q_heavy_curve,
+                        result.Q_light_curve,
+                        result.beta_curve,
+                    )
+                ),
+                fmt=["%.10g"] + ["%.17g"] * 4,
+                delimiter=", ",
+            )
+
+    logger.info(
+        "Program complete. Please check command line output for any issues that may have occurred."
+    )
+
+
+def write_fractionation(filename, species, temperatures, beta):
+    """
+    Writes the fractionation between every pair of species at every temperature.
+
+    Only the upper triangle of the fractionation matrix is written, as delta[j, i] = -delta[i, j].
+    A .npz file holds the species, temperatures and the (pairs, temperatures) array of fractionations with the
+    species indices of each pair, compressed - see `read_fractionation()`. Any other file is written as a CSV
+    table with one row per pair and temperature.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the output file
+    species: list
+        names of the species
+    temperatures: ndarray
+        (T,) temperatures in K
+    beta: ndarray
+        (species, T) 1000*lnB of every species - see `beta_table()`
+    """
+    output_file(filename)
+    first, second, delta = fractionation_pairs(beta)
+    if filename.lower().endswith(".npz"):
+        np.savez_compressed(
+            filename,
+            species=np.array(species),
+            temperatures=np.asarray(temperatures, dtype=float),
+            first=first,
+            second=second,
+            delta=delta,
+        )
+        return
+
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["species_a", "species_b", "temperature", "delta"])
+        for i, j, row in zip(first, second, delta):
+            # repr keeps full float precision
+            writer.writerows(
+                [species[i], species[j], repr(float(t)), repr(float(value))]
+                for t, value in zip(temperatures, row)
+            )
+
+
+def write_coefficients(filename, rows):
+    """
+    Writes a table of the polynomial fits of 1000*lnB, one row per pair, which `read_coefficients()` and
+    `polynomial_beta()` evaluate at any temperature without the log files.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the CSV file
+    rows: list
+        fit of each pair from `fit_results()`, with `light`, `heavy`, `element`, `light_isotope`,
+        `heavy_isotope`, `t_min`, `t_max`, `coefficients`, `rms`, `max_residual` and `max_relative`
+    """
+    degree = max((len(row["coefficients"]) for row in rows), default=3)
+    columns = (
+        COEFFICIENT_COLUMNS[:7]
+        + list(COEFFICIENT_NAMES[:degree])
+        + COEFFICIENT_COLUMNS[7:]
+    )
+    output_file(filename)
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in rows:
+            # repr keeps full float precision
+            writer.writerow(
+                [row[key] for key in COEFFICIENT_COLUMNS[:5]]
+                + [repr(float(row[key])) for key in COEFFICIENT_COLUMNS[5:7]]
+                + [repr(float(a)) for a in row["coefficients"]]
+                + [repr(float(row[key])) for key in COEFFICIENT_COLUMNS[7:]]
+            )
+
+
+def result_fields(result):
+    """
+    Collects the values of a result that were calculated or extracted, as numbers, strings and arrays.
+
+    Parameters:
+    -----------
+    result: RPFRResult
+        result from `RPFRCalculator.calculate()`
+
+    Returns:
+    --------
+    fields: dict
+        values of `RESULT_FIELDS` that are not None, numpy scalars converted to Python numbers
+    """
+    fields = {}
+    for name in RESULT_FIELDS:
+        value = getattr(result, name)
+        if value is None:
+            continue
+        if isinstance(value, np.generic):
+            value = value.item()
+        elif name == "warnings":
+            value = np.asarray(value, dtype=str)
+        elif isinstance(value, list):
+            value = np.asarray(value)
+        fields[name] = value
+    return fields
+
+
+def write_jsonl(filename, result, append=False):
+    """
+    Writes a result as one line of JSON, with arrays as lists of numbers at full precision.
+
+    Parameters:
+    -----------
+    filename: str
+        location of output file
+    result: RPFRResult
+        result from `RPFRCalculator.calculate()`
+    append: bool
+        add the line to the end of the file instead of overwriting it, to collect many results in one file
+    """
+    # imported here as it is only needed for this format and slows down start up
+    import json
+
+    record = {
+        name: value.tolist() if isinstance(value, np.ndarray) else value
+        for name, value in result_fields(result).items()
+    }
+    with open(filename, "a" if append else "w") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def write_csv(filename, result):
+    """
+    Writes a result as a CSV table with the columns name, index and value: one row per number or string,
+    and one row per element of each array. Floats are written at full precision.
+
+    Parameters:
+    -----------
+    filename: str
+        location of output file
+    result: RPFRResult
+        result from `RPFRCalculator.calculate()`
+    """
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "index", "value"])
+        for name, value in result_fields(result).items():
+            if isinstance(value, np.ndarray):
+                # tolist converts to Python numbers, whose str is the shortest exact representation
+                writer.writerows(
+                    zip(itertools.repeat(name), itertools.count(), value.tolist())
+                )
+            else:
+                writer.writerow([name, "", value])
+
+
+def write_npz(filename, result):
+    """
+    Writes a result as a compressed .npz file with one array per value, which can be read with
+    `np.load(filename)`.
+
+    Parameters:
+    -----------
+    filename: str
+        location of output file
+    result: RPFRResult
+        result from `RPFRCalculator.calculate()`
+    """
+    np.savez_compressed(
+        filename,
+        **{name: np.asarray(value) for name, value in result_fields(result).items()}
+    )
+
+
+def output_format(filename):
+    """
+    Returns the output format for the extension of a file: "jsonl" (.jsonl, .json), "csv", "npz" or "text".
+    """
+    return FORMAT_EXTENSIONS.get(os.path.splitext(filename)[1].lower(), "text")
+
+
+def write_result(filename, result, fmt=None, print_var="False"):
+    """
+    Writes the result of a reduced partition function ratio calculation in one of `OUTPUT_FORMATS`.
+
+    Parameters:
+    -----------
+    filename: str
+        location of output file
+    result: RPFRResult
+        result from `RPFRCalculator.calculate()`
+    fmt: str
+        "text" for the output file of `write_output()`, "jsonl", "csv" or "npz" for every value at full
+        precision. Inferred from the extension of the filename if None - see `output_format()`.
+    print_var: str
+        "True" to write all extracted information in the text format, the other formats always do
+    """
+    fmt = fmt or output_format(filename)
+    if fmt == "text":
+        write_output(filename, result, print_var)
+        return
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(
+            "Output format %s not recognised, please use one of: %s"
+            % (fmt, ", ".join(OUTPUT_FORMATS))
+        )
+
+    # checking if file exists + creating directories
+    output_file(filename)
+    logger.info("Writing all extracted information to %s as %s", filename, fmt)
+    {"jsonl": write_jsonl, "csv": write_csv, "npz": write_npz}[fmt](filename, result)
+    logger.info("Program complete.")
@@ -0,0 +1,313 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import collections
+import csv
+import logging
+import os
+import re
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+# silent unless the application configures logging
+logger.addHandler(logging.NullHandler())
+
+# lines of the output files written by `write_output()`
+ISOTOPES_PATTERN = re.compile(r"^(\w+) isotopes extracted: (\d+) and (\d+)")
+TEMPERATURE_PATTERN = re.compile(r"^Temperature = (\S+) K")
+RPFR_PATTERN = re.compile(r"^RPFR: (\S+)")
+GRID_HEADER = "RPFR over the temperature grid:"
+# results table columns of the RPFR over a temperature grid, e.g. "beta_298.15" but not "beta_bm"
+GRID_COLUMN_PATTERN = re.compile(r"^beta_([\d.]+)$")
+# coefficient columns of a polynomial fit table, "a", "b", "c", ...
+COEFFICIENT_PATTERN = re.compile(r"^[a-h]$")
+
+
+class BetaCurve:
+    """
+    RPFR of one species over one or more temperatures, read from a calculated result.
+
+    Attributes:
+    -----------
+    species: str
+        name of the species, e.g. "ZnCl4"
+    filename: str
+        location of the file the result was read from
+    element: str or None
+        Element that has isotopic information
+    light_isotope, heavy_isotope: int or None
+        Mass numbers of the light / heavy isotopes
+    temperatures: ndarray
+        (T,) temperatures in K
+    beta: ndarray
+        (T,) 1000*lnB at each temperature
+    """
+
+    def __init__(self, species, filename, temperatures, beta):
+        self.species = species
+        self.filename = filename
+        self.element = None
+        self.light_isotope = None
+        self.heavy_isotope = None
+        self.temperatures = np.asarray(temperatures, dtype=float)
+        self.beta = np.asarray(beta, dtype=float)
+
+
+def species_name(filename):
+    """
+    Returns the name of a species from the location of its file, e.g. "output_files/ZnCl4.txt" -> "ZnCl4".
+    """
+    # output files written on Windows hold backslash separated paths
+    return os.path.splitext(os.path.basename(filename.replace("\\", "/")))[0]
+
+
+def read_output(filename):
+    """
+    Reads the RPFR from an output file written by `script.py`. The RPFR over the temperature grid is used
+    if the file has one, otherwise the full RPFR at the temperature of the log files.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the output file
+
+    Returns:
+    --------
+    curve: BetaCurve
+        RPFR of the species named after the output file
+
+    Raises:
+    -------
+    ValueError
+        if the file holds no RPFR
+    """
+    temperature = None
+    beta = None
+    isotopes = None
+    grid = []
+    with open(filename, "rt") as file:
+        lines = iter(file)
+        for line in lines:
+            if isotopes is None and ISOTOPES_PATTERN.match(line):
+                isotopes = ISOTOPES_PATTERN.match(line).groups()
+            elif temperature is None and TEMPERATURE_PATTERN.match(line):
+                temperature = float(TEMPERATURE_PATTERN.match(line).group(1))
+            # the first RPFR is calculated with every frequency, the second with the selected frequencies
+            elif beta is None and RPFR_PATTERN.match(line):
+                beta = float(RPFR_PATTERN.match(line).group(1))
+            elif line.startswith(GRID_HEADER):
+                next(lines)  # column names
+                for row in lines:
+                    if not row.strip():
+                        break
+                    grid.append([float(x) for x in row.split(",")])
+
+    if grid:
+        grid = np.array(grid)
+        curve = BetaCurve(species_name(filename), filename, grid[:, 0], grid[:, -1])
+    elif temperature is not None and beta is not None:
+        curve = BetaCurve(species_name(filename), filename, [temperature], [beta])
+    else:
+        raise ValueError("No RPFR found in %s." % filename)
+    if isotopes is not None:
+        curve.element = isotopes[0]
+        curve.light_isotope, curve.heavy_isotope = int(isotopes[1]), int(isotopes[2])
+    return curve
+
+
+def read_results_table(filename):
+    """
+    Reads the RPFR of every calculated pair in a results table written by `batch.py` or `fanout.py`.
+    The `beta_<T>` columns are used if the table has them, otherwise the RPFR at the temperature of the log files.
+
+    Each species is named after the `output` file of its row, or else its heavy isotope log file.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the results CSV file
+
+    Returns:
+    --------
+    curves: list
+        one BetaCurve per row with the status "ok"
+    """
+    curves = []
+    with open(filename, "rt", newline="") as file:
+        reader = csv.DictReader(file)
+        grid = [name for name in reader.fieldnames if GRID_COLUMN_PATTERN.match(name)]
+        for row in reader:
+            if row["status"] != "ok":
+                continue
+            if grid:
+                temperatures = [float(name[len("beta_") :]) for name in grid]
+                beta = [float(row[name]) for name in grid]
+            else:
+                temperatures = [float(row["temperature"])]
+                beta = [float(row["beta"])]
+            curve = BetaCurve(
+                species_name(row["output"] or row["heavy"]),
+                filename,
+                temperatures,
+                beta,
+            )
+            curve.element = row["element"] or None
+            if row["light_isotope"] and row["heavy_isotope"]:
+                curve.light_isotope = int(row["light_isotope"])
+                curve.heavy_isotope = int(row["heavy_isotope"])
+            curves.append(curve)
+    return curves
+
+
+def read_results(filenames):
+    """
+    Reads the RPFR of every species from output files and results tables (.csv).
+
+    Parameters:
+    -----------
+    filenames: list
+        locations of the output files / results tables
+
+    Returns:
+    --------
+    curves: list
+        one BetaCurve per species
+    """
+    curves = []
+    for filename in filenames:
+        if filename.lower().endswith(".csv"):
+            curves += read_results_table(filename)
+        else:
+            curves.append(read_output(filename))
+    return curves
+
+
+def beta_table(curves, decimals=6):
+    """
+    Aligns the RPFRs of many species on the temperatures they all share.
+
+    Parameters:
+    -----------
+    curves: list
+        BetaCurve of each species - see `read_results()`
+    decimals: int
+        temperatures are matched after rounding to this many decimal places
+
+    Returns:
+    --------
+    species: list
+        names of the species
+    temperatures: ndarray
+        (T,) temperatures shared by every species, in K
+    beta: ndarray
+        (species, T) 1000*lnB of every species at each temperature
+
+    Raises:
+    -------
+    ValueError
+        if the species have no temperature in common, share a name or are different isotope pairs
+    """
+    if not curves:
+        raise ValueError("No results to tabulate.")
+    species = [curve.species for curve in curves]
+    duplicates = sorted(
+        name for name, count in collections.Counter(species).items() if count > 1
+    )
+    if duplicates:
+        raise ValueError("Species found more than once: %s" % ", ".join(duplicates))
+
+    # the fractionation between species is only meaningful for the same isotope pair
+    pairs = {
+        (curve.element, curve.light_isotope, curve.heavy_isotope)
+        for curve in curves
+        if curve.light_isotope is not None
+    }
+    if len(pairs) > 1:
+        raise ValueError(
+            "The results are for different isotope pairs: %s"
+            % ", ".join(
+                "%s %s/%s" % (element, heavy, light)
+                for element, light, heavy in sorted(pairs)
+            )
+        )
+
+    rounded = [np.round(curve.temperatures, decimals) for curve in curves]
+    temperatures = rounded[0]
+    for temps in rounded[1:]:
+        temperatures = np.intersect1d(temperatures, temps)
+    if len(temperatures) == 0:
+        raise ValueError("The results have no temperature in common.")
+    for curve, temps in zip(curves, rounded):
+        if len(temps) != len(temperatures):
+            logger.info(
+                "%s: using %i of %i temperatures.",
+                curve.species,
+                len(temperatures),
+                len(temps),
+            )
+
+    beta = np.empty((len(curves), len(temperatures)))
+    for i, (curve, temps) in enumerate(zip(curves, rounded)):
+        order = np.argsort(temps)
+        beta[i] = curve.beta[order][np.searchsorted(temps[order], temperatures)]
+    return species, temperatures, beta
+
+
+def read_fractionation(filename):
+    """
+    Reads a fractionation matrix written by `write_fractionation()` as a .npz file.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the .npz file
+
+    Returns:
+    --------
+    species: list
+        names of the species
+    temperatures: ndarray
+        (T,) temperatures in K
+    delta: ndarray
+        (species, species, T) fractionation, delta[i, j] = 1000*lnB(i) - 1000*lnB(j)
+    """
+    with np.load(filename) as data:
+        species = [str(name) for name in data["species"]]
+        temperatures = data["temperatures"]
+        first, second, pairs = data["first"], data["second"], data["delta"]
+    delta = np.zeros((len(species), len(species), len(temperatures)))
+    delta[first, second] = pairs
+    delta[second, first] = -pairs
+    return species, temperatures, delta
+
+
+def read_coefficients(filename):
+    """
+    Reads a table of polynomial fits of 1000*lnB written by `write_coefficients()`, to evaluate with
+    `polynomial_beta()`.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the CSV file
+
+    Returns:
+    --------
+    rows: list
+        one dictionary per pair with `light`, `heavy`, `element`, the isotopes, the fitted temperature range
+        `t_min` - `t_max` in K and the residuals `rms`, `max_residual` and `max_relative` (relative to 1000*lnB)
+    coefficients: ndarray
+        (pairs, degree) coefficients of x, x^2, ... (x = 10^6/T^2) of each pair
+    """
+    with open(filename, "rt", newline="") as file:
+        reader = csv.DictReader(file)
+        names = [name for name in reader.fieldnames if COEFFICIENT_PATTERN.match(name)]
+        rows = list(reader)
+    coefficients = np.array(
+        [[float(row.pop(name)) for name in names] for row in rows], dtype=float
+    ).reshape(len(rows), len(names))
+    for row in rows:
+        for key in ("t_min", "t_max", "rms", "max_residual", "max_relative"):
+            row[key] = float(row[key])
+    return rows, coefficients
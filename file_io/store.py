@@ -0,0 +1,403 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import argparse
+import datetime
+import sqlite3
+
+import numpy as np
+
+from extractions.cache import file_hash
+from file_io.results import GRID_COLUMN_PATTERN, species_name
+
+# one row per calculated pair, and one row per temperature of the RPFR over a temperature grid
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    created TEXT NOT NULL,
+    species TEXT NOT NULL,
+    light TEXT NOT NULL,
+    heavy TEXT NOT NULL,
+    light_hash TEXT,
+    heavy_hash TEXT,
+    element TEXT,
+    light_isotope INTEGER,
+    heavy_isotope INTEGER,
+    temperature REAL,
+    num_freq INTEGER,
+    ratio REAL,
+    Q_heavy REAL,
+    Q_light REAL,
+    beta REAL,
+    warnings TEXT,
+    light_freq BLOB,
+    heavy_freq BLOB
+);
+CREATE TABLE IF NOT EXISTS curves (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    temperature REAL NOT NULL,
+    ratio REAL,
+    Q_heavy REAL,
+    Q_light REAL,
+    beta REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_element ON runs (element, temperature);
+CREATE INDEX IF NOT EXISTS runs_species ON runs (species);
+CREATE INDEX IF NOT EXISTS runs_temperature ON runs (temperature);
+CREATE INDEX IF NOT EXISTS curves_temperature ON curves (temperature, run_id);
+CREATE INDEX IF NOT EXISTS curves_run ON curves (run_id);
+"""
+
+RUN_COLUMNS = [
+    "created",
+    "species",
+    "light",
+    "heavy",
+    "light_hash",
+    "heavy_hash",
+    "element",
+    "light_isotope",
+    "heavy_isotope",
+    "temperature",
+    "num_freq",
+    "ratio",
+    "Q_heavy",
+    "Q_light",
+    "beta",
+    "warnings",
+    "light_freq",
+    "heavy_freq",
+]
+# columns returned by `ResultStore.query()`
+QUERY_COLUMNS = [
+    "id",
+    "species",
+    "element",
+    "light_isotope",
+    "heavy_isotope",
+    "temperature",
+    "beta",
+    "ratio",
+    "Q_heavy",
+    "Q_light",
+    "light",
+    "heavy",
+]
+
+
+def _blob(freq):
+    """
+    Converts a frequency array to little endian float64 bytes, None stays None.
+    """
+    if freq is None:
+        return None
+    return sqlite3.Binary(np.asarray(freq, dtype="<f8").tobytes())
+
+
+def _float(value):
+    """
+    Converts a number to a float, None and empty strings to None.
+    """
+    if value is None or value == "":
+        return None
+    return float(value)
+
+
+def _int(value):
+    """
+    Converts a number to an int, None and empty strings to None.
+    """
+    if value is None or value == "":
+        return None
+    return int(value)
+
+
+def result_run(result, species=None):
+    """
+    Converts a result from `RPFRCalculator.calculate()` to a run of the store.
+
+    Parameters:
+    -----------
+    result: RPFRResult
+        calculated result
+    species: str
+        name of the species, defaults to the name of the heavy isotope log file
+
+    Returns:
+    --------
+    run: dict
+        run with the keys of `RUN_COLUMNS` and `curve`, a list of (temperature, ratio, lnQ, lnQ', beta)
+    """
+    run = dict(
+        species=species or species_name(result.heavy_filename),
+        light=result.light_filename,
+        heavy=result.heavy_filename,
+        element=result.element,
+        light_isotope=_int(result.light_isotope),
+        heavy_isotope=_int(result.heavy_isotope),
+        temperature=_float(result.temperature),
+        num_freq=None if result.light_freq is None else len(result.light_freq),
+        ratio=_float(result.ratio),
+        Q_heavy=_float(result.Q_heavy),
+        Q_light=_float(result.Q_light),
+        beta=_float(result.beta),
+        warnings="; ".join(result.warnings),
+        light_freq=result.light_freq,
+        heavy_freq=result.heavy_freq,
+        curve=[],
+    )
+    if result.temperatures is not None and result.beta_curve is not None:
+        run["curve"] = list(
+            zip(
+                map(float, result.temperatures),
+                map(float, result.ratio_curve),
+                map(float, result.Q_heavy_curve),
+                map(float, result.Q_light_curve),
+                map(float, result.beta_curve),
+            )
+        )
+    return run
+
+
+def row_run(row):
+    """
+    Converts a results table row from `batch.compute_pair()` to a run of the store.
+
+    Parameters:
+    -----------
+    row: dict
+        results table row with the status "ok"
+
+    Returns:
+    --------
+    run: dict
+        run with the keys of `RUN_COLUMNS` and `curve` - see `result_run()`. The file hashes are taken from
+        the row if it has them, e.g. from `batch.update_batch()`
+    """
+    run = dict(
+        species=species_name(row["output"] or row["heavy"]),
+        light=row["light"],
+        heavy=row["heavy"],
+        light_hash=row.get("light_hash"),
+        heavy_hash=row.get("heavy_hash"),
+        element=row["element"] or None,
+        light_isotope=_int(row["light_isotope"]),
+        heavy_isotope=_int(row["heavy_isotope"]),
+        temperature=_float(row["temperature"]),
+        num_freq=_int(row["num_freq"]),
+        ratio=_float(row["ratio"]),
+        Q_heavy=_float(row["Q_heavy"]),
+        Q_light=_float(row["Q_light"]),
+        beta=_float(row["beta"]),
+        warnings=row["warnings"],
+        light_freq=row.get("light_freq"),
+        heavy_freq=row.get("heavy_freq"),
+        curve=[],
+    )
+    # the RPFR over the temperature grid, in the beta_<T> columns
+    for key, value in row.items():
+        match = GRID_COLUMN_PATTERN.match(key)
+        if match is not None and value != "":
+            run["curve"].append((float(match.group(1)), None, None, None, float(value)))
+    return run
+
+
+class ResultStore:
+    """
+    SQLite database of calculated reduced partition function ratios, with the input files and their hashes,
+    the isotopic information, the RPFR and its components, the frequencies and the RPFR over a temperature grid.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the database, created if it does not exist
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Closes the database.
+        """
+        self.connection.close()
+
+    def add(self, runs):
+        """
+        Inserts runs in a single transaction. Input files without a `light_hash` or `heavy_hash` in their run
+        are hashed, each once.
+
+        Parameters:
+        -----------
+        runs: list
+            runs from `result_run()` or `row_run()`
+
+        Returns:
+        --------
+        ids: list
+            id of each inserted run
+        """
+        created = datetime.datetime.now().isoformat(timespec="seconds")
+        hashes = {}
+        ids = []
+        with self.connection:
+            for run in runs:
+                for key in ("light", "heavy"):
+                    if run.get(key + "_hash"):
+                        hashes[run[key]] = run[key + "_hash"]
+                    elif run[key] not in hashes:
+                        try:
+                            hashes[run[key]] = file_hash(run[key])
+                        except OSError:
+                            hashes[run[key]] = None
+                values = dict(
+                    run,
+                    created=created,
+                    light_hash=hashes[run["light"]],
+                    heavy_hash=hashes[run["heavy"]],
+                    light_freq=_blob(run["light_freq"]),
+                    heavy_freq=_blob(run["heavy_freq"]),
+                )
+                cursor = self.connection.execute(
+                    "INSERT INTO runs (%s) VALUES (%s)"
+                    % (", ".join(RUN_COLUMNS), ", ".join("?" * len(RUN_COLUMNS))),
+                    [values[column] for column in RUN_COLUMNS],
+                )
+                ids.append(cursor.lastrowid)
+                self.connection.executemany(
+                    "INSERT INTO curves (run_id, temperature, ratio, Q_heavy, Q_light, beta) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(cursor.lastrowid,) + tuple(point) for point in run["curve"]],
+                )
+        return ids
+
+    def add_results(self, results, species=None):
+        """
+        Inserts results from `RPFRCalculator.calculate()` - see `result_run()`.
+        """
+        return self.add([result_run(result, species) for result in results])
+
+    def add_rows(self, rows):
+        """
+        Inserts the calculated rows of a results table from `batch.run_batch()` or `batch.fan_out()`,
+        rows that failed or were screened out are skipped - see `row_run()`.
+        """
+        return self.add([row_run(row) for row in rows if row["status"] == "ok"])
+
+    def query(self, element=None, species=None, temperature=None, tolerance=1e-6):
+        """
+        Finds the RPFR of the stored runs, at the temperature of their log files and over their temperature grids.
+
+        Parameters:
+        -----------
+        element: str
+            only runs of this element
+        species: str
+            only runs of this species
+        temperature: float
+            only RPFRs at this temperature in K
+        tolerance: float
+            temperatures within this tolerance in K are matched
+
+        Returns:
+        --------
+        rows: list
+            dictionaries with the keys of `QUERY_COLUMNS`, ordered by species, temperature and id
+        """
+        conditions = []
+        parameters = []
+        if element is not None:
+            conditions.append("runs.element = ?")
+            parameters.append(element)
+        if species is not None:
+            conditions.append("runs.species = ?")
+            parameters.append(species)
+        run_conditions = conditions + ["runs.beta IS NOT NULL"]
+        run_parameters = list(parameters)
+        # the point of a temperature grid at the temperature of the log files is the RPFR of the run itself
+        curve_conditions = conditions + [
+            "(runs.temperature IS NULL OR ABS(curves.temperature - runs.temperature) > ?)"
+        ]
+        curve_parameters = parameters + [tolerance]
+        if temperature is not None:
+            run_conditions.append("runs.temperature BETWEEN ? AND ?")
+            run_parameters += [temperature - tolerance, temperature + tolerance]
+            curve_conditions.append("curves.temperature BETWEEN ? AND ?")
+            curve_parameters += [temperature - tolerance, temperature + tolerance]
+
+        sql = (
+            "SELECT runs.id, runs.species, runs.element, runs.light_isotope, runs.heavy_isotope, "
+            "runs.temperature, runs.beta, runs.ratio, runs.Q_heavy, runs.Q_light, runs.light, runs.heavy "
+            "FROM runs WHERE %s "
+            "UNION ALL "
+            "SELECT runs.id, runs.species, runs.element, runs.light_isotope, runs.heavy_isotope, "
+            "curves.temperature, curves.beta, curves.ratio, curves.Q_heavy, curves.Q_light, runs.light, runs.heavy "
+            "FROM curves JOIN runs ON runs.id = curves.run_id WHERE %s "
+            "ORDER BY 2, 6, 1"
+            % (" AND ".join(run_conditions), " AND ".join(curve_conditions))
+        )
+        cursor = self.connection.execute(sql, run_parameters + curve_parameters)
+        return [dict(zip(QUERY_COLUMNS, row)) for row in cursor]
+
+    def frequencies(self, run_id):
+        """
+        Reads the frequencies of a stored run.
+
+        Parameters:
+        -----------
+        run_id: int
+            id of the run
+
+        Returns:
+        --------
+        light_freq, heavy_freq: ndarray or None
+            frequencies of the light / heavy isotopologue
+        """
+        row = self.connection.execute(
+            "SELECT light_freq, heavy_freq FROM runs WHERE id = ?", (run_id,)
+        ).fetchone()
+        if row is None:
+            raise ValueError("No run %i in %s." % (run_id, self.filename))
+        return tuple(
+            None if blob is None else np.frombuffer(blob, dtype="<f8") for blob in row
+        )
+
+
+if __name__ == "__main__":  # only execute this if this file is run as a script
+
+    parser = argparse.ArgumentParser(
+        description="Queries a database of calculated reduced partition function ratios."
+    )
+    parser.add_argument("database", help="SQLite database written with --store")
+    parser.add_argument("--element", help="only runs of this element, e.g. Zn")
+    parser.add_argument("--species", help="only runs of this species")
+    parser.add_argument(
+        "--temperature", type=float, help="only RPFRs at this temperature in K"
+    )
+    args = parser.parse_args()
+
+    with ResultStore(args.database) as store:
+        rows = store.query(args.element, args.species, args.temperature)
+    print("%i results" % len(rows))
+    print(
+        "%6s  %-20s  %-8s  %10s  %s"
+        % ("run", "species", "isotopes", "T (K)", "1000*lnB")
+    )
+    for row in rows:
+        isotopes = (
+            "%s %s/%s" % (row["element"], row["heavy_isotope"], row["light_isotope"])
+            if row["light_isotope"] is not None
+            else row["element"] or ""
+        )
+        print(
+            "%6i  %-20s  %-8s  %10s  %s"
+            % (row["id"], row["species"], isotopes, row["temperature"], row["beta"])
+        )
@@ -0,0 +1,257 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import contextlib
+import os
+import threading
+import time
+
+# tracer that records the spans and counters of this process, None when tracing is disabled
+_tracer = None
+# returned by `span()` when tracing is disabled, so a disabled span costs one function call
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Tracer:
+    """
+    Records the time spent in each stage of the calculation as Chrome trace events, and counters
+    (bytes read, regex matches) per log file.
+
+    Attributes:
+    -----------
+    pid: int
+        id of the process the tracer was created in
+    events: list
+        Chrome trace "complete" events, with the start time and duration in us
+    counters: dict
+        counters of each log file, e.g. {"ZnCl4_64.LOG": {"bytes": 2954016, "matches": 512}}
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.events = []
+        self.counters = {}
+
+    def add(self, name, start, end, args):
+        """
+        Records a span from `start` to `end` (ns, `time.perf_counter_ns()`).
+        """
+        self.events.append(
+            dict(
+                name=name,
+                ph="X",
+                ts=start / 1000,
+                dur=(end - start) / 1000,
+                pid=os.getpid(),
+                tid=threading.get_ident(),
+                args=args,
+            )
+        )
+
+    def count(self, key, name, value=1):
+        """
+        Adds `value` to the counter `name` of `key`, e.g. a log file.
+        """
+        counters = self.counters.setdefault(key, {})
+        counters[name] = counters.get(name, 0) + value
+
+    def export(self):
+        """
+        Returns the events and counters, to send them from a worker process to the tracing process.
+        """
+        return dict(events=self.events, counters=self.counters)
+
+    def merge(self, exported):
+        """
+        Adds the events and counters exported by the tracer of a worker process.
+        """
+        self.events += exported["events"]
+        for key, counters in exported["counters"].items():
+            for name, value in counters.items():
+                self.count(key, name, value)
+
+    def summary(self):
+        """
+        Returns the number of spans and the total time in s of each stage, longest first.
+
+        Returns:
+        --------
+        stages: list
+            (stage, number of spans, total time in s)
+        """
+        stages = {}
+        for event in self.events:
+            count, total = stages.get(event["name"], (0, 0.0))
+            stages[event["name"]] = (count + 1, total + event["dur"] / 1e6)
+        return sorted(
+            ((name, n, total) for name, (n, total) in stages.items()),
+            key=lambda stage: -stage[2],
+        )
+
+    def report(self):
+        """
+        Returns a table of the time spent in each stage, and the bytes read and regex matches of every log file.
+        """
+        lines = ["%-14s  %6s  %12s" % ("stage", "spans", "total (ms)")]
+        lines += [
+            "%-14s  %6i  %12.3f" % (name, n, total * 1000)
+            for name, n, total in self.summary()
+        ]
+        if self.counters:
+            lines.append("")
+            lines.append("%12s  %8s  %s" % ("bytes read", "matches", "log file"))
+            lines += [
+                "%12i  %8i  %s"
+                % (counters.get("bytes", 0), counters.get("matches", 0), key)
+                for key, counters in sorted(self.counters.items())
+            ]
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """
+        Returns the trace in the Chrome trace event format, which can be opened in chrome://tracing or
+        https://ui.perfetto.dev. The counters of each log file are in `otherData`.
+        """
+        # the processes are named, so batch worker processes are told apart
+        names = [
+            dict(
+                name="process_name",
+                ph="M",
+                pid=pid,
+                args=dict(name="main" if pid == self.pid else "worker %i" % pid),
+            )
+            for pid in sorted({event["pid"] for event in self.events})
+        ]
+        return dict(
+            traceEvents=names + sorted(self.events, key=lambda event: event["ts"]),
+            displayTimeUnit="ms",
+            otherData=dict(counters=self.counters),
+        )
+
+    def write(self, filename):
+        """
+        Writes the trace to a JSON file in the Chrome trace event format - see `chrome_trace()`.
+        """
+        # imported here as tracing is optional
+        import json
+
+        with open(filename, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+class _Span:
+    """
+    Context manager that records the time spent in a block as a span of a tracer.
+    """
+
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.add(self.name, self.start, time.perf_counter_ns(), self.args)
+
+
+def enable(tracer=None):
+    """
+    Starts tracing this process.
+
+    Parameters:
+    -----------
+    tracer: Tracer
+        tracer to record to, defaults to a new tracer
+
+    Returns:
+    --------
+    tracer: Tracer
+        the tracer recording this process
+    """
+    global _tracer
+    _tracer = tracer or Tracer()
+    return _tracer
+
+
+def disable():
+    """
+    Stops tracing this process, returning the tracer that was recording it (None if tracing was disabled).
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def tracing():
+    """
+    Returns True if tracing is enabled in this process.
+    """
+    return _tracer is not None
+
+
+def span(name, **args):
+    """
+    Times a block as a stage of the trace, e.g. `with span("scan", file=filename):`. Does nothing when
+    tracing is disabled.
+
+    Parameters:
+    -----------
+    name: str
+        name of the stage
+    args: dict
+        information shown with the span, e.g. the log file
+    """
+    if _tracer is None:
+        return _NULL_SPAN
+    return _Span(_tracer, name, args)
+
+
+def count(key, name, value=1):
+    """
+    Adds `value` to the counter `name` of `key` (e.g. a log file). Does nothing when tracing is disabled.
+    """
+    if _tracer is not None:
+        _tracer.count(key, name, value)
+
+
+def merge(exported):
+    """
+    Adds the events and counters exported by the tracer of a worker process - see `collect()`.
+    Does nothing when tracing is disabled.
+    """
+    if _tracer is not None:
+        _tracer.merge(exported)
+
+
+@contextlib.contextmanager
+def collect(enabled):
+    """
+    Traces a block of a worker process into a new tracer, whose events and counters are returned to the
+    tracing process with `Tracer.export()` and added with `Tracer.merge()`.
+
+    Parameters:
+    -----------
+    enabled: bool
+        True if the tracing process is tracing
+
+    Yields:
+    -------
+    tracer: Tracer or None
+        new tracer, None if tracing is disabled or the block runs in the tracing process itself
+    """
+    global _tracer
+    # worker processes started by fork inherit the tracer of the tracing process
+    if not enabled or (_tracer is not None and _tracer.pid == os.getpid()):
+        yield None
+        return
+    previous = _tracer
+    _tracer = Tracer()
+    try:
+        yield _tracer
+    finally:
+        _tracer = previous
@@ -0,0 +1,58 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import argparse
+
+import numpy as np
+
+from calculations.calculations import fractionation_matrix
+from file_io.output import write_fractionation
+from file_io.results import beta_table, read_results
+
+if __name__ == "__main__":  # only execute this if this file is run as a script
+
+    parser = argparse.ArgumentParser(
+        description="Calculates the fractionation 1000*lnB(A) - 1000*lnB(B) between every pair of species from their calculated RPFRs."
+    )
+    parser.add_argument(
+        "results",
+        nargs="+",
+        help="output files written by script.py and/or results tables written by batch.py or fanout.py",
+    )
+    parser.add_argument(
+        "--output",
+        help="path to the fractionation file, .npz for a compressed array or otherwise a CSV table",
+    )
+    parser.add_argument(
+        "--temperature",
+        type=float,
+        default=None,
+        help="temperature in K of the matrix to print (default: the first shared temperature)",
+    )
+    args = parser.parse_args()
+
+    try:
+        species, temperatures, beta = beta_table(read_results(args.results))
+    except (ValueError, OSError) as e:
+        print(e)
+        print("Exiting...")
+        raise SystemExit(1)
+    print(
+        "%i species at %i shared temperatures (%s to %s K)."
+        % (len(species), len(temperatures), temperatures[0], temperatures[-1])
+    )
+
+    # matrix at a single temperature, delta[i, j] = 1000*lnB(i) - 1000*lnB(j)
+    t = 0
+    if args.temperature is not None:
+        t = int(np.argmin(np.abs(temperatures - args.temperature)))
+    delta = fractionation_matrix(beta[:, t : t + 1])[:, :, 0]
+    print("\nFractionation (row - column) at %s K:" % temperatures[t])
+    width = max(10, max(len(name) for name in species))
+    print(" " * width + "".join("%*s" % (width + 1, name) for name in species))
+    for name, row in zip(species, delta):
+        print("%*s" % (width, name) + "".join("%*.4f" % (width + 1, x) for x in row))
+
+    if args.output:
+        write_fractionation(args.output, species, temperatures, beta)
+        print("\nFractionation of every pair of species written to %s" % args.output)
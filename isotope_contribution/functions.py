@@ -1,7 +1,70 @@
-import re
+import csv
+import functools
+import logging
+import os
 
 import numpy as np
-import pandas as pd
+
+from extractions.scanner import get_record
+
+logger = logging.getLogger(__name__)
+# silent unless the application configures logging
+logger.addHandler(logging.NullHandler())
+
+# lookup tables bundled with the package, found relative to this file so they load from any working directory
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@functools.lru_cache(maxsize=None)
+def periodic_table():
+    """
+    Reads the atomic numbers of the elements from atomic_number.csv, once per process.
+
+    Returns:
+    --------
+    table: dict
+        atomic number of each element symbol
+    """
+    with open(os.path.join(DATA_DIR, "atomic_number.csv"), "rt", newline="") as file:
+        return {
+            row["Element"]: int(row["Atomic Number"]) for row in csv.DictReader(file)
+        }
+
+
+@functools.lru_cache(maxsize=None)
+def default_isotopes():
+    """
+    Reads the default, most abundant, isotope of the elements from atomic_number.csv, once per process.
+    Gaussian uses these masses for atoms without an "(Iso=" label.
+
+    Returns:
+    --------
+    table: dict
+        mass number of the default isotope of each element symbol, for the elements with stable isotopes
+    """
+    with open(os.path.join(DATA_DIR, "atomic_number.csv"), "rt", newline="") as file:
+        return {
+            row["Element"]: int(row["Default Isotope"])
+            for row in csv.DictReader(file)
+            if row["Default Isotope"]
+        }
+
+
+@functools.lru_cache(maxsize=None)
+def isotope_masses():
+    """
+    Reads the isotope masses from isotope_mass.csv, once per process.
+
+    Returns:
+    --------
+    masses: dict
+        mass in u of each (element symbol, mass number)
+    """
+    with open(os.path.join(DATA_DIR, "isotope_mass.csv"), "rt", newline="") as file:
+        return {
+            (row["Element"], int(row["Mass Number"])): float(row["Isotope Mass"])
+            for row in csv.DictReader(file)
+        }
 
 
 def get_atomic_number(element):
@@ -17,87 +80,212 @@ def get_atomic_number(element):
     --------
     atomic_number: int
         atomic number of the extracted element
-    """
 
-    # read in csv file as dataframe
-    df = pd.read_csv("isotope_contribution/atomic_number.csv", header=0)
-    # select the row that has the element in the log file in the Element column of the dataframe
-    # only if the element exists.
-    if element in df.values:
-        result = df.loc[df["Element"] == element]
-        # extract the atomic number by indexing the Atomic Number column
-        atomic_number = result.iloc[0]["Atomic Number"]
-        print("The atomic number of %s is %i" % (element, atomic_number))
-    else:  # if the element does not exist in the csv file, print a warning and exit.
-        print(
-            "The element extracted from the log file does not exist in atomic_number.csv. Please add it to the csv file. Exiting."
+    Raises:
+    -------
+    ValueError
+        if the element is not in atomic_number.csv
+    """
+    # element symbols are case insensitive, e.g. ZN or zn for Zn
+    atomic_number = periodic_table().get(element.capitalize())
+    if atomic_number is None:
+        raise ValueError(
+            "The element extracted from the log file (%s) does not exist in atomic_number.csv."
+            % element
         )
-        exit()
+    logger.info("The atomic number of %s is %i", element, atomic_number)
 
     return atomic_number
 
 
+def get_isotope_mass(element, mass_number):
+    """
+    Gets the mass of an isotope from isotope_mass.csv.
+
+    Parameters:
+    -----------
+    element: str
+        Element symbol
+    mass_number: int
+        Mass number of the isotope
+
+    Returns:
+    --------
+    mass: float
+        isotope mass in u
+
+    Raises:
+    -------
+    ValueError
+        if the isotope is not in isotope_mass.csv
+    """
+    mass = isotope_masses().get((element.capitalize(), int(mass_number)))
+    if mass is None:
+        raise ValueError(
+            "The mass of %s-%i does not exist in isotope_mass.csv. Please add it to the csv file."
+            % (element, int(mass_number))
+        )
+    return mass
+
+
+def displacement_tensor(filename):
+    """
+    Assembles the normal mode displacement blocks of a log file into a single array.
+
+    Parameters:
+    -----------
+    filename: str or LogRecord
+        path to log file, or its record from `scan_log()`
+
+    Returns:
+    --------
+    modes: ndarray
+        (n_modes, n_atoms, 3) array of the X,Y,Z displacements of every atom in every normal mode
+    atomic_numbers: ndarray
+        (n_atoms,) array of the atomic number of each atom
+    """
+    blocks = [block for block in get_record(filename).displacements if block]
+    if not blocks:
+        return np.zeros((0, 0, 3)), np.zeros(0, dtype=int)
+
+    atomic_numbers = np.array([row[1] for row in blocks[0]], dtype=int)
+    # each row of a block holds the X,Y,Z displacements of one atom in every mode of the block,
+    # (n_atoms, modes in block * 3) -> (modes in block, n_atoms, 3)
+    modes = np.concatenate(
+        [
+            np.array([row[2] for row in block], dtype=float)
+            .reshape(len(block), -1, 3)
+            .transpose(1, 0, 2)
+            for block in blocks
+        ]
+    )
+    return modes, atomic_numbers
+
+
+def isotope_atoms(records, atomic_number):
+    """
+    Finds the atoms that carry the isotope substitution.
+
+    The atoms labelled with "(Iso=" in the input geometry of any of the log files are used. If no atom is
+    labelled, every atom of the isotope's element is used.
+
+    Parameters:
+    -----------
+    records: list
+        LogRecords of the light and heavy isotope log files
+    atomic_number: int
+        atomic number of element
+
+    Returns:
+    --------
+    atoms: ndarray
+        indices (from 0) of the atoms
+    """
+    labelled = sorted({i - 1 for record in records for i in record.isotope_atoms})
+    if labelled:
+        return np.array(labelled, dtype=int)
+    _, atomic_numbers = displacement_tensor(records[0])
+    return np.flatnonzero(atomic_numbers == atomic_number)
+
+
+def displacement_norms(modes, atoms=None):
+    """
+    Calculates the length of the displacement of a subset of atoms in every normal mode.
+
+    Parameters:
+    -----------
+    modes: ndarray
+        (n_modes, n_atoms, 3) displacements from `displacement_tensor()`
+    atoms: array-like
+        indices (from 0) of the atoms, all atoms if None
+
+    Returns:
+    --------
+    norms: ndarray
+        (n_modes,) array, the square root of the summed squared X,Y,Z displacements of the atoms
+    """
+    if atoms is not None:
+        modes = modes[:, atoms]
+    return np.sqrt(np.sum(modes**2, axis=(1, 2)))
+
+
+def participation(modes, atoms, masses=None):
+    """
+    Calculates the mass weighted participation of a subset of atoms in every normal mode,
+    i.e. the fraction of the kinetic energy of the mode carried by the atoms.
+
+    Parameters:
+    -----------
+    modes: ndarray
+        (n_modes, n_atoms, 3) displacements from `displacement_tensor()`
+    atoms: array-like
+        indices (from 0) of the atoms
+    masses: array-like
+        (n_atoms,) mass of each atom, equal masses if None
+
+    Returns:
+    --------
+    fraction: ndarray
+        (n_modes,) array of values between 0 and 1
+    """
+    weights = np.sum(modes**2, axis=2)
+    if masses is not None and len(masses) == modes.shape[1]:
+        weights = weights * np.asarray(masses, dtype=float)
+    total = np.sum(weights, axis=1)
+    # modes without any displacement have no participation
+    return np.divide(
+        np.sum(weights[:, atoms], axis=1),
+        total,
+        out=np.zeros(len(total)),
+        where=total > 0,
+    )
+
+
+def moving_modes(modes, atoms, masses=None, threshold=0.0, min_participation=0.0):
+    """
+    Selects the normal modes in which a subset of atoms moves.
+
+    Parameters:
+    -----------
+    modes: ndarray
+        (n_modes, n_atoms, 3) displacements from `displacement_tensor()`
+    atoms: array-like
+        indices (from 0) of the atoms
+    masses: array-like
+        (n_atoms,) mass of each atom, equal masses if None
+    threshold: float
+        the displacement norm of the atoms must be larger than this value
+    min_participation: float
+        the mass weighted participation of the atoms must be larger than this value
+
+    Returns:
+    --------
+    moving: ndarray
+        (n_modes,) boolean array, True for the modes in which the atoms move
+    """
+    moving = displacement_norms(modes, atoms) > threshold
+    if min_participation > 0:
+        moving &= participation(modes, atoms, masses) > min_participation
+    return moving
+
+
 def sum_coord(filename, atomic_number):
     """
-    Extracts the isotope's XYZ coordinates for each individual frequency and sums them together,
+    Sums the isotope's XYZ coordinates for each individual frequency,
     returning an array that represents approximately how much the isotope moves for each frequency.
+    N.B. signed coordinates can cancel, `displacement_norms()` is a better measure of movement.
 
     Parameters:
     -----------
-    filename: str
-        path to log file
+    filename: str or LogRecord
+        path to log file, or its record from `scan_log()`
     atomic_number: int
         atomic number of element
 
     Returns:
     --------
-    coord_sum: list
-        sum of isotope's XYZ coordinates for each frequency
-    """
-    # opening file
-    with open(filename, "rt") as file:
-
-        text = file.read()  # reading file into string
-        # regex pattern to find atomic coordinate matrices:
-        # "^.*?" - at the beginning of the string, match as few of any character (aside from new lines) as possible
-        # "Z(?:\n.*(\d\.\d+)){1,}" - match "Z", and then in a non capturing group "(?:"
-        # match a new line and any character (aside from new lines) as many times as possible "\n.*"
-        # then in a capture group, match the format 0.00 "(\d\.\d+)"
-        # then match the entire non capture group at least 1 time
-        result = re.finditer(r"^.*?Z(?:\n.*(\d\.\d+)){1,}", text, re.MULTILINE)
-        coord_list = []  # initialise list to store coordinates
-        for m in result:
-            x = m.group()  # x is a string of the entire atomic coordinate table
-            # regex pattern to get lines of coordinate matrices
-            # "\s+\d*\s+" search for at least 1 whitespace, as many digits as possible, and at least one whitespace.
-            # (\d+) - in 1st capture group, match at least 1 digit - this is the atomic number of all the atoms.
-            # "((?:(?:\s*)(?:\s|-)\d\.\d\d){1,})" - ((?:){1,}) - match the non capture group at least once
-            # "(?:\s*)(?:\s|-)\d\.\d\d" - in a non capture group, look for any number of whitespace
-            # in a second non capture group, look for either a whitespace or a "-" - this is to account for negative coordinates
-            # "\d\.\d\d" - then look for 0.00
-            atom_line = re.finditer(
-                r"\s+\d*\s+(\d+)((?:(?:\s*)(?:\s|-)\d\.\d\d){1,})", x
-            )
-
-            for match in atom_line:  # for each match in the iterator
-                if (
-                    int(match.group(1)) == atomic_number
-                ):  # if the first capture group (atomic number) equals the desired atomic number
-                    x = (
-                        match.group()
-                    )  # x is the string of the coordinate line of the desired atomic number
-                    x = x.lstrip()  # strips leading whitespace
-                    x = list(
-                        map(float, x.split())
-                    )  # splits the line at whitespace, maps the resulting strings to a float, and then converts the floats to a list
-                    x = x[
-                        2:
-                    ]  # removing the atom index number and the atomic number from the list to get the coordinates
-                    coord_list += x  # appends sublist - coordinates of one row of frequencies to the full coordinate list
-        # list comprehension to get a list for the coordinate sum
-        # for x in the range from 0 to the length of the coordinate list, with a step of 3 (x coord, y coord, z coord)
-        # add the coordinates from x to x+3 (x,y,z), and round the value to 3 decimal places
-        coord_sum = np.asarray(
-            [round(sum(coord_list[x : x + 3]), 3) for x in range(0, len(coord_list), 3)]
-        )
-    return coord_sum
+    coord_sum: ndarray
+        sum of the XYZ coordinates of the atoms of the element for each frequency, rounded to 3 decimal places
+    """
+    modes, atomic_numbers = displacement_tensor(filename)
+    return np.round(np.sum(modes[:, atomic_numbers == atomic_number], axis=(1, 2)), 3)
@@ -0,0 +1,131 @@
+# Written by Devang Patel
+# GitHub username: acse-dp1820
+
+import argparse
+import csv
+
+from calculations.calculations import temperature_grid
+from calculations.isotopologues import isotopologue_rpfrs
+from extractions.archive import read_hessian
+from file_io.output import output_file
+
+# columns of the results table, one row per substitution and temperature
+RESULT_COLUMNS = [
+    "site",
+    "light_isotope",
+    "heavy_isotope",
+    "temperature",
+    "ratio",
+    "Q_heavy",
+    "Q_light",
+    "beta",
+]
+
+
+def write_results(filename, result):
+    """
+    Writes the RPFR of every substitution and temperature to a CSV file.
+
+    Parameters:
+    -----------
+    filename: str
+        location of the results file
+    result: IsotopologueResult
+        result from `isotopologue_rpfrs()`
+    """
+    output_file(filename)
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(RESULT_COLUMNS)
+        for i in range(len(result.sites)):
+            for j, temperature in enumerate(result.temperatures):
+                # repr keeps full float precision
+                writer.writerow(
+                    [
+                        result.sites[i],
+                        result.light_isotopes[i] or "",
+                        result.heavy_isotopes[i],
+                        repr(float(temperature)),
+                        repr(float(result.ratio[i])),
+                        repr(float(result.Q_heavy[i, j])),
+                        repr(float(result.Q_light[i, j])),
+                        repr(float(result.beta[i, j])),
+                    ]
+                )
+
+
+if __name__ == "__main__":  # only execute this if this file is run as a script
+
+    parser = argparse.ArgumentParser(
+        description="Calculates the reduced partition function ratio of every single isotope substitution of an element from the Hessian of one Gaussian frequency job."
+    )
+    parser.add_argument(
+        "filename", help="Gaussian frequency log file or formatted checkpoint file"
+    )
+    parser.add_argument("element", help="element to substitute, e.g. Zn")
+    parser.add_argument(
+        "isotopes",
+        help="comma separated mass numbers of the heavy isotopes, e.g. 66,67,68",
+    )
+    parser.add_argument(
+        "--light",
+        type=int,
+        default=None,
+        help="mass number of the light isotope (default: the masses used in the file)",
+    )
+    parser.add_argument(
+        "--sites",
+        default=None,
+        help="comma separated indices (from 1) of the atoms to substitute (default: every atom of the element)",
+    )
+    parser.add_argument(
+        "--temperatures",
+        metavar="T or START:STOP:STEP",
+        default="298.15",
+        help="temperature, or grid of temperatures, in K (default: 298.15)",
+    )
+    parser.add_argument("--output", help="path to a CSV file for the results")
+    args = parser.parse_args()
+
+    try:
+        if ":" in args.temperatures:
+            temperatures = temperature_grid(*map(float, args.temperatures.split(":")))
+        else:
+            temperatures = [float(args.temperatures)]
+        isotopes = [int(isotope) for isotope in args.isotopes.split(",")]
+        sites = (
+            [int(site) for site in args.sites.split(",")]
+            if args.sites is not None
+            else None
+        )
+    except (TypeError, ValueError):
+        parser.error("please check the isotopes, --sites and --temperatures arguments")
+
+    try:
+        record = read_hessian(args.filename)
+        result = isotopologue_rpfrs(
+            record, args.element, isotopes, temperatures, args.light, sites
+        )
+    except (ValueError, OSError) as e:
+        print(e)
+        print("Exiting...")
+        raise SystemExit(1)
+
+    print(
+        "%i substitutions of %s in %s, at %i temperatures."
+        % (len(result.sites), args.element, args.filename, len(result.temperatures))
+    )
+    print("Atom, isotope, 1000*lnB at %s K" % result.temperatures[0])
+    for i in range(len(result.sites)):
+        print(
+            "%4i  %i%s  %s"
+            % (
+                result.sites[i],
+                result.heavy_isotopes[i],
+                args.element,
+                result.beta[i, 0],
+            )
+        )
+    if args.output:
+        write_results(args.output, result)
+        print("Results written to %s" % args.output)
@@ -1,10 +1,92 @@
 # Written by Devang Patel
 # GitHub username: acse-dp1820
 
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import tracemalloc
+
 import numpy as np
 
-from calculations.calculations import reduced_partition_function_ratio
+from batch import (
+    compute_pair,
+    fan_out,
+    fit_results,
+    prefetch_batch,
+    run_batch,
+    temperature_columns,
+    update_batch,
+)
+from benchmark import BENCHMARK_CASES, compare, run_benchmarks
+from calculations.calculations import (
+    bigeleisen_mayer,
+    fractionation_matrix,
+    pad_frequencies,
+    polynomial_beta,
+    polynomial_fit,
+    reduced_partition_function_ratio,
+    reduced_partition_function_ratios,
+    temperature_grid,
+    teller_redlich,
+)
+from calculations.calculator import RPFRCalculator
+from calculations.isotopologues import isotopologue_rpfrs
+from calculations.uncertainty import Distribution, rpfr_uncertainty
+from extractions import cache
+from extractions.archive import read_hessian
+from extractions.cache import (
+    cache_entries,
+    cached_scan_log,
+    evict,
+    file_hash,
+    prune_stamps,
+)
+from extractions.discover import (
+    find_logs,
+    isotopologue_pairs,
+    read_header,
+    read_headers,
+)
 from extractions.extract import extract_frequencies, extract_temp
+from extractions.jobs import index_log
+from extractions.prefetch import prefetch_logs
+from extractions.scanner import LogRecord, scan_lines, scan_log, scan_tail
+from extractions.sources import source_exists
+from file_io import trace
+from file_io.check import CONVERGENCE_PATTERN, inspect_file
+from file_io.output import (
+    array_text,
+    write_coefficients,
+    write_fractionation,
+    write_result,
+)
+from file_io.results import (
+    beta_table,
+    read_coefficients,
+    read_fractionation,
+    read_results,
+)
+from file_io.store import ResultStore
+from isotope_contribution.functions import (
+    displacement_norms,
+    displacement_tensor,
+    get_atomic_number,
+    isotope_atoms,
+    moving_modes,
+    participation,
+    sum_coord,
+)
 
 
 def test_extraction(l_filename, h_filename, linear_check, m_light_freq, m_heavy_freq):
@@ -56,6 +138,91 @@ def test_extraction(l_filename, h_filename, linear_check, m_light_freq, m_heavy_
     print("Manually extracted values: ", m_heavy_freq)
     print("Computationally extracted values: ", heavy_freq)
 
+    # "Temperature" without a value, e.g. a truncated log file, is skipped
+    record = LogRecord(l_filename)
+    scan_lines(
+        record,
+        [" Temperature\n", " Temperature", " Temperature   298.150 Kelvin.  Pressure"],
+    )
+    if record.temperature == 298.15:
+        print("Temperature lines without a value are skipped.\n")
+    else:
+        print("Temperature lines without a value are NOT skipped!\n")
+
+
+def same_record(a, b):
+    """
+    Returns True if two LogRecords hold the same information.
+    """
+    return (
+        a.temperature == b.temperature
+        and (a.element, a.isotope, a.isotope_atoms)
+        == (b.element, b.isotope, b.isotope_atoms)
+        and a.num_atoms == b.num_atoms
+        and a.table == b.table
+        and a.low_freq == b.low_freq
+        and np.array_equal(a.frequencies, b.frequencies)
+        and a.masses == b.masses
+        and a.displacements == b.displacements
+    )
+
+
+def test_tail(filenames, l_filename, h_filename):
+    """
+    Tests that parsing only the last frequency section of a log file gives the same record as the full scan, on
+    the bundled log files and on synthetic log files where the last section is ambiguous, for which `scan_tail()`
+    must give up and leave the log file to the full scan.
+
+    Parameters:
+    -----------
+    filenames: list
+        locations of the log files to compare
+    l_filename: str
+        location of the light isotope log file of an "opt freq" run, the ambiguous log files are made from it
+    h_filename: str
+        location of the heavy isotope log file of an "opt freq" run, appended to the light one as later jobs
+    """
+    different = [
+        f for f in filenames if not same_record(scan_log(f, tail=True), scan_log(f))
+    ]
+    print("Log files compared: ", len(filenames))
+    print("Tail scan differs from the full scan: ", different)
+
+    with open(l_filename, "rb") as f:
+        data = f.read()
+    with open(h_filename, "rb") as f:
+        heavy = f.read()
+    harmonic = data.rindex(b" Harmonic frequencies")
+    thermo = data.rindex(b" - Thermochemistry -")
+    ambiguous = {
+        # the frequency block printed twice
+        "two_blocks.log": data[:thermo] + data[harmonic:thermo] + data[thermo:],
+        # cut off before the temperature
+        "truncated.log": data[: data.index(b"\n", thermo) + 1],
+        # the optimisation and frequency jobs of the heavy isotope run as later Link1 jobs
+        "link1.log": data + heavy,
+    }
+    fallback = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, contents in ambiguous.items():
+            filename = os.path.join(directory, name)
+            with open(filename, "wb") as f:
+                f.write(contents)
+            fallback[name] = scan_tail(filename) is None and same_record(
+                scan_log(filename, tail=True), scan_log(filename)
+            )
+        isotope = scan_log(os.path.join(directory, "link1.log"), tail=True).isotope
+    print("Ambiguous log files left to the full scan: ", fallback)
+
+    if (
+        not different
+        and all(fallback.values())
+        and isotope == scan_log(h_filename).isotope
+    ):
+        print("\nThe tail scan matches the full scan.\n")
+    else:
+        print("\nThe tail scan does NOT match the full scan!\n")
+
 
 def test_calculation(
     l_filename, h_filename, linear_check, m_beta, m_ratio, m_Qlight, m_Qheavy
@@ -117,6 +284,1227 @@ def test_calculation(
         print("The calculated values do not agree.")
 
 
+def test_kernel(pairs, linear_check, temps):
+    """
+    Tests the batched calculation function, `reduced_partition_function_ratios()`, by comparing it to
+    `reduced_partition_function_ratio()` for each pair over a temperature grid.
+
+    Parameters:
+    -----------
+    pairs: list
+        list of (light isotope log file, heavy isotope log file) tuples
+    linear_check: str
+        Variable that states if the molecules in the log files are linear
+    temps: ndarray
+        temperatures to compare at
+    """
+    light_freq = [
+        extract_frequencies(l_filename, linear_check) for l_filename, _ in pairs
+    ]
+    heavy_freq = [
+        extract_frequencies(h_filename, linear_check) for _, h_filename in pairs
+    ]
+
+    # all pairs and temperatures in one call
+    print(
+        "Calculating the RPFR of %i pairs at %i temperatures in one call."
+        % (len(pairs), len(temps))
+    )
+    light_matrix, mask = pad_frequencies(light_freq)
+    heavy_matrix, _ = pad_frequencies(heavy_freq)
+    beta, ratio, Q_heavy, Q_light = reduced_partition_function_ratios(
+        light_matrix, heavy_matrix, temps, mask
+    )
+
+    # one pair at a time
+    for i, (l_filename, h_filename) in enumerate(pairs):
+        print("Comparing %s and %s." % (l_filename, h_filename))
+        calc_values = reduced_partition_function_ratio(
+            light_freq[i], heavy_freq[i], temps
+        )
+        batch_values = [beta[i], ratio[i], Q_heavy[i], Q_light[i]]
+
+        if all(
+            np.allclose(x, y, rtol=0, atol=1e-10)
+            for x, y in zip(calc_values, batch_values)
+        ):
+            print(
+                "\nThe batched values agree within an absolute tolerance of: 1e-10.\n"
+            )
+        else:
+            print("\nThe batched values do not agree.\n")
+
+    # an imaginary mode, and a high frequency at a low temperature, which overflowed the single pair path
+    edge_cases = [
+        ([-50.0, 300.0, 1000.0], [-49.5, 295.0, 990.0], 298.15),
+        ([400.0, 4000.0], [395.0, 3990.0], 2.0),
+    ]
+    for light, heavy, temp in edge_cases:
+        single = reduced_partition_function_ratio(light, heavy, temp)[0]
+        batched = reduced_partition_function_ratios(light, heavy, temp)[0][0, 0]
+        print(
+            "Frequencies %s / %s at %s K - single pair, batched: %s, %s"
+            % (light, heavy, temp, single, batched)
+        )
+        if np.isfinite(single) and np.isclose(single, batched, rtol=1e-12, atol=0):
+            print("\nThe single pair and batched values agree.\n")
+        else:
+            print("\nThe single pair and batched values do not agree.\n")
+
+
+def test_hessian(l_filename, h_filename, linear_check, element, heavy_isotope):
+    """
+    Tests the Hessian isotopologue engine by deriving the heavy isotope frequencies from the light isotope
+    log file, and comparing them and the RPFR to the heavy isotope log file.
+
+    Parameters:
+    -----------
+    l_filename: str
+        location of the light isotope log file
+    h_filename: str
+        location of the heavy isotope log file
+    linear_check: str
+        Variable that states if the molecules in the log files are linear
+    element: str
+        substituted element
+    heavy_isotope: int
+        mass number of the heavy isotope
+    """
+    light_freq = extract_frequencies(l_filename, linear_check)
+    heavy_freq = extract_frequencies(h_filename, linear_check)
+    temp = extract_temp(l_filename)
+
+    result = isotopologue_rpfrs(
+        read_hessian(l_filename), element, [heavy_isotope], temp
+    )
+    beta = reduced_partition_function_ratio(light_freq, heavy_freq, temp)[0]
+
+    # Gaussian prints frequencies to 4 decimal places and the archive Hessian to 8
+    if np.allclose(result.light_freq[0], light_freq, rtol=0, atol=0.1) and np.allclose(
+        result.heavy_freq[0], heavy_freq, rtol=0, atol=0.1
+    ):
+        print("\nThe derived frequencies agree within 0.1 cm-1.")
+    else:
+        print("\nThe derived frequencies do not agree.")
+    print("1000*lnB from the Hessian: ", result.beta[0, 0])
+    print("1000*lnB from both log files: ", beta)
+    if np.isclose(result.beta[0, 0], beta, rtol=0, atol=1e-3):
+        print("\nThe RPFR agrees within an absolute tolerance of: 1e-3.\n")
+    else:
+        print("\nThe RPFR does not agree.\n")
+
+
+def test_moving_modes(
+    l_filename,
+    h_filename,
+    linear_check,
+    m_modes,
+    m_participating,
+    min_participation,
+    m_beta_cont,
+    cancelling,
+):
+    """
+    Tests the normal modes in which the isotope moves and the secondary RPFR calculated from them by `script.py`,
+    against values pinned from a previous run.
+
+    Parameters:
+    -----------
+    l_filename: str
+        location of light isotope log file
+    h_filename: str
+        location of heavy isotope log file
+    linear_check: str
+        Variable that states if the molecule in the log file(s) is linear
+    m_modes: list
+        indices (from 0) of the modes in which the isotope moves
+    m_participating: list
+        indices (from 0) of the modes with a mass weighted participation above `min_participation`
+    min_participation: float
+        participation threshold of `moving_modes()`
+    m_beta_cont: float
+        1000*lnB calculated with the frequencies of the modes in which the isotope moves
+    cancelling: int
+        index (from 0) of a mode in which the isotope moves, but whose signed X+Y+Z displacements cancel
+    """
+    light, heavy = scan_log(l_filename), scan_log(h_filename)
+    atomic_number = get_atomic_number(light.element)
+    atoms = isotope_atoms([light, heavy], atomic_number)
+    modes, _ = displacement_tensor(light)
+    norms = displacement_norms(modes, atoms)
+    moving = np.flatnonzero(moving_modes(modes, atoms, light.masses)).tolist()
+    participating = np.flatnonzero(
+        moving_modes(modes, atoms, light.masses, 0.0, min_participation)
+    ).tolist()
+    fractions = participation(modes, atoms, light.masses)
+
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "result.jsonl")
+        subprocess.run(
+            [sys.executable, "script.py", l_filename, h_filename, linear_check]
+            + [output, "False", "--format", "jsonl", "--quiet"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        with open(output, "rt") as file:
+            result = json.loads(file.readline())
+
+    print("Modes in which the isotope moves: ", moving)
+    print("Modes with a participation above %s: " % min_participation, participating)
+    print(
+        "Mode %i - signed X+Y+Z: %s, displacement norm: %.4f"
+        % (cancelling, sum_coord(light, atomic_number)[cancelling], norms[cancelling])
+    )
+    print("Secondary 1000*lnB - script.py, pinned: ", result["beta_cont"], m_beta_cont)
+    if (
+        moving == m_modes
+        and participating == m_participating
+        and all(fractions[participating] > min_participation)
+        and sum_coord(light, atomic_number)[cancelling] == 0
+        and norms[cancelling] > 0
+        and cancelling in moving
+        and len(result["light_freq_cont"]) == len(m_modes)
+        and np.isclose(result["beta_cont"], m_beta_cont, rtol=1e-9)
+    ):
+        print("\nThe modes selected and the secondary RPFR are unchanged.\n")
+    else:
+        print("\nThe modes selected or the secondary RPFR have changed!\n")
+
+
+def test_screening(l_filename, h_filename, linear_check, temps):
+    """
+    Tests the Bigeleisen-Mayer screening by checking its bounds contain the exact RPFR over a temperature grid,
+    and the Teller-Redlich product rule against the ln(v/v') of the frequencies.
+
+    Parameters:
+    -----------
+    l_filename: str
+        location of the light isotope log file
+    h_filename: str
+        location of the heavy isotope log file
+    linear_check: str
+        Variable that states if the molecules in the log files are linear
+    temps: ndarray
+        temperatures to compare at
+    """
+    light_freq = extract_frequencies(l_filename, linear_check)
+    heavy_freq = extract_frequencies(h_filename, linear_check)
+    beta, ratio = reduced_partition_function_ratios(light_freq, heavy_freq, temps)[:2]
+    beta_bm, lower, upper = bigeleisen_mayer(light_freq, heavy_freq, temps)
+
+    print(
+        "Largest error of the Bigeleisen-Mayer approximation: %.6f"
+        % np.max(np.abs(beta_bm - beta))
+    )
+    if np.all((lower <= beta) & (beta <= upper)):
+        print("The exact RPFR lies within the Bigeleisen-Mayer bounds.")
+    else:
+        print("The exact RPFR does not lie within the Bigeleisen-Mayer bounds.")
+
+    # a batch run without screening fills the Bigeleisen-Mayer columns of every row, screening only skips
+    # the exact RPFR
+    row = dict(light=l_filename, heavy=h_filename, linear=linear_check)
+    results = run_batch([row] * 2, workers=2)
+    screened = run_batch([row], workers=1, screen=1e6)[0]
+    print(
+        "Batch run without screening - 1000*lnB, Bigeleisen-Mayer and bounds: ",
+        [(r["beta"], r["beta_bm"], r["beta_lower"], r["beta_upper"]) for r in results],
+    )
+    if all(
+        r["status"] == "ok" and r["beta_lower"] <= r["beta"] <= r["beta_upper"]
+        for r in results
+    ) and (screened["status"], screened["beta"]) == ("screened", ""):
+        print("Every batch row holds the Bigeleisen-Mayer approximation and bounds.")
+    else:
+        print(
+            "The batch rows do NOT hold the Bigeleisen-Mayer approximation and bounds!"
+        )
+
+    # masses and geometry from the archive entries of the log files
+    light = read_hessian(l_filename)
+    heavy = read_hessian(h_filename)
+    expected = teller_redlich(light.masses, heavy.masses, light.coordinates)[0]
+    print("ln(v/v') from the frequencies: ", ratio[0])
+    print("ln(v/v') from the Teller-Redlich product rule: ", expected)
+    # Gaussian prints frequencies to 4 decimal places
+    if np.isclose(ratio[0], expected, rtol=0, atol=1e-4):
+        print(
+            "\nThe product rule is satisfied within an absolute tolerance of: 1e-4.\n"
+        )
+    else:
+        print("\nThe product rule is not satisfied.\n")
+
+
+def test_fan_out(l_filename, h_filenames, linear_check, temps):
+    """
+    Tests the one-to-many fan-out by comparing it with calculating every light / heavy pair separately.
+
+    Parameters:
+    -----------
+    l_filename: str
+        location of the light isotope log file
+    h_filenames: list
+        locations of the heavy isotope log files
+    linear_check: str
+        Variable that states if the molecules in the log files are linear
+    temps: ndarray
+        temperature grid to also compare over
+    """
+    results = fan_out(l_filename, h_filenames, linear_check, 2, temperatures=temps)
+    expected = [
+        compute_pair(
+            dict(light=l_filename, heavy=h_filename, linear=linear_check),
+            temperatures=temps,
+        )
+        for h_filename in h_filenames
+    ]
+    for result, pair in zip(results, expected):
+        print(
+            "%s: %s, 1000*lnB = %s"
+            % (result["heavy"], result["status"], result["beta"])
+        )
+    # the same light isotope information and lnQ' are used, so the results are identical
+    if all(
+        result.keys() == pair.keys()
+        and all(np.array_equal(result[key], pair[key]) for key in result)
+        for result, pair in zip(results, expected)
+    ):
+        print("\nThe fan-out results are identical to calculating each pair.\n")
+    else:
+        print("\nThe fan-out results are not identical to calculating each pair.\n")
+
+
+def test_fractionation(filenames):
+    """
+    Tests the fractionation matrix of the output files, and that it is unchanged when written to and read
+    from a .npz file.
+
+    Parameters:
+    -----------
+    filenames: list
+        locations of output files written by `script.py`
+    """
+    species, temperatures, beta = beta_table(read_results(filenames))
+    delta = fractionation_matrix(beta)
+    print("Species: ", species)
+    print("Fractionation at %s K:\n%s" % (temperatures[0], delta[:, :, 0]))
+    if np.allclose(delta, -np.swapaxes(delta, 0, 1)) and np.allclose(
+        delta[0, 1], beta[0] - beta[1]
+    ):
+        print("\nThe fractionation matrix is antisymmetric and matches the RPFRs.")
+    else:
+        print("\nThe fractionation matrix does not match the RPFRs.")
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "fractionation.npz")
+        write_fractionation(filename, species, temperatures, beta)
+        read_species, read_temperatures, read_delta = read_fractionation(filename)
+    if (
+        read_species == species
+        and np.array_equal(read_temperatures, temperatures)
+        and np.array_equal(read_delta, delta)
+    ):
+        print("The .npz file holds the same fractionation matrix.\n")
+    else:
+        print("The .npz file does not hold the same fractionation matrix.\n")
+
+
+def test_store(l_filename, h_filename, linear_check, temps):
+    """
+    Tests the SQLite results store by adding a calculated result to a new database and querying it back, and
+    that the log file hashes of an incremental batch run are stored without hashing the log files again.
+
+    Parameters:
+    -----------
+    l_filename: str
+        location of the light isotope log file
+    h_filename: str
+        location of the heavy isotope log file
+    linear_check: str
+        Variable that states if the molecules in the log files are linear
+    temps: ndarray
+        temperature grid to also store
+    """
+    calculator = RPFRCalculator(linear=linear_check == "y", contributions=False)
+    result = calculator.calculate(l_filename, h_filename, temps)
+
+    with tempfile.TemporaryDirectory() as directory:
+        with ResultStore(os.path.join(directory, "results.db")) as store:
+            (run_id,) = store.add_results([result], "test")
+            at_log_temp = store.query(result.element, temperature=result.temperature)
+            curve = store.query(species="test")
+            light_freq, heavy_freq = store.frequencies(run_id)
+
+        row = dict(light=l_filename, heavy=h_filename, linear=linear_check, output="")
+        _, calculated = update_batch(
+            [row], os.path.join(directory, "results.csv"), workers=1
+        )
+        # a hash carried by the row is stored as it is, not calculated again
+        carried = dict(calculated[0], light_hash="0" * 64)
+        with ResultStore(os.path.join(directory, "hashes.db")) as store:
+            store.add_rows(calculated + [carried])
+            hashes = store.connection.execute(
+                "SELECT light_hash, heavy_hash FROM runs ORDER BY id"
+            ).fetchall()
+
+    print("Stored 1000*lnB at %s K: " % result.temperature, at_log_temp[0]["beta"])
+    if len(at_log_temp) == 1 and at_log_temp[0]["beta"] == result.beta:
+        print("The RPFR at the temperature of the log files is stored.")
+    else:
+        print("The RPFR at the temperature of the log files is not stored.")
+    # 298.15 K is on the grid, so its grid point is given by the RPFR of the run itself
+    if len(curve) == len(temps) and np.allclose(
+        [row["beta"] for row in curve], result.beta_curve
+    ):
+        print("The RPFR over the temperature grid is stored.")
+    else:
+        print("The RPFR over the temperature grid is not stored.")
+    if np.array_equal(light_freq, result.light_freq) and np.array_equal(
+        heavy_freq, result.heavy_freq
+    ):
+        print("The frequencies are stored.")
+    else:
+        print("The frequencies are not stored.")
+    heavy_hash = file_hash(h_filename)
+    if hashes == [(file_hash(l_filename), heavy_hash), ("0" * 64, heavy_hash)]:
+        print("The log file hashes of the batch rows are stored.\n")
+    else:
+        print("The log file hashes of the batch rows are not stored.\n")
+
+
+def test_output_formats(l_filename, h_filename, linear_check):
+    """
+    Tests the JSON-lines, CSV and .npz output files hold the RPFR and frequencies at full precision,
+    and that the text output file holds every element of large arrays.
+
+    Parameters:
+    -----------
+    l_filename: str
+        location of the light isotope log file
+    h_filename: str
+        location of the heavy isotope log file
+    linear_check: str
+        Variable that states if the molecules in the log files are linear
+    """
+    calculator = RPFRCalculator(linear=linear_check == "y")
+    result = calculator.calculate(l_filename, h_filename)
+
+    read = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for fmt in ("jsonl", "csv", "npz"):
+            filename = os.path.join(directory, "output." + fmt)
+            write_result(filename, result)
+            if fmt == "jsonl":
+                with open(filename) as f:
+                    record = json.loads(f.readline())
+                read[fmt] = record["beta"], np.array(record["light_freq"])
+            elif fmt == "csv":
+                with open(filename, newline="") as f:
+                    rows = list(csv.DictReader(f))
+                beta = [float(row["value"]) for row in rows if row["name"] == "beta"]
+                freq = [
+                    float(row["value"]) for row in rows if row["name"] == "light_freq"
+                ]
+                read[fmt] = beta[0], np.array(freq)
+            else:
+                with np.load(filename) as data:
+                    read[fmt] = float(data["beta"]), data["light_freq"]
+
+    for fmt, (beta, freq) in read.items():
+        if beta == result.beta and np.array_equal(freq, result.light_freq):
+            print("The %s output file holds the exact RPFR and frequencies." % fmt)
+        else:
+            print(
+                "The %s output file does not hold the exact RPFR and frequencies." % fmt
+            )
+
+    large = np.linspace(0, 4000, 5000)
+    if "..." not in array_text(large) and np.array_equal(
+        np.array(array_text(large)[1:-1].split(), dtype=float), large
+    ):
+        print("The text output holds every element of large arrays.\n")
+    else:
+        print("The text output does not hold every element of large arrays.\n")
+
+
+def test_incremental(pairs, linear_check):
+    """
+    Tests that incremental batch runs only calculate the pairs whose log files changed, using copies of
+    the log files in a temporary directory.
+
+    Parameters:
+    -----------
+    pairs: list
+        (light, heavy) log file locations
+    linear_check: str
+        Variable that states if the molecules in the log files are linear
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        rows = []
+        for l_filename, h_filename in pairs:
+            row = dict(linear=linear_check, output="")
+            for key, filename in (("light", l_filename), ("heavy", h_filename)):
+                row[key] = shutil.copy(filename, directory)
+            rows.append(row)
+        results_file = os.path.join(directory, "results.csv")
+
+        counts = []
+        counts.append(len(update_batch(rows, results_file, workers=1)[1]))
+        # unchanged
+        counts.append(len(update_batch(rows, results_file, workers=1)[1]))
+        # touched, but the contents are the same
+        os.utime(rows[0]["heavy"])
+        counts.append(len(update_batch(rows, results_file, workers=1)[1]))
+        # changed
+        with open(rows[0]["heavy"], "a") as f:
+            f.write("\n")
+        results, calculated = update_batch(rows, results_file, workers=1)
+        counts.append(len(calculated))
+
+    print("Pairs calculated - first run, unchanged, touched, changed: ", counts)
+    if counts == [len(pairs), 0, 0, 1] and all(
+        result["status"] == "ok" for result in results
+    ):
+        print("\nOnly the pairs with new or changed log files were calculated.\n")
+    else:
+        print("\nThe incremental runs did not calculate the expected pairs.\n")
+
+
+def test_cache(l_filename, h_filename):
+    """
+    Tests the parsed log file cache with copies of the log files in a temporary directory: hits on unchanged,
+    touched and copied log files, misses on changed log files and a new cache version, pruning of stale stamps
+    and eviction of the least recently used entries.
+
+    Parameters:
+    -----------
+    l_filename: str
+        location of the light isotope log file
+    h_filename: str
+        location of the heavy isotope log file
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        cache_dir = os.path.join(directory, "cache")
+        filename = shutil.copy(l_filename, os.path.join(directory, "a.log"))
+
+        def scan(filename, **kwargs):
+            # the number of log files scanned tells a cache miss from a hit
+            tracer = trace.enable()
+            try:
+                record = cached_scan_log(filename, cache_dir=cache_dir, **kwargs)
+            finally:
+                trace.disable()
+            return record, sum(event["name"] == "scan" for event in tracer.events)
+
+        def bump(filename, seconds):
+            stat = os.stat(filename)
+            mtime = stat.st_mtime_ns + int(seconds * 1e9)
+            os.utime(filename, ns=(stat.st_atime_ns, mtime))
+
+        scans = {}
+        first, scans["first run"] = scan(filename)
+        record, scans["unchanged"] = scan(filename)
+        same = np.allclose(record.frequencies, first.frequencies)
+        # changed contents with the same size
+        with open(filename, "r+b") as f:
+            data = f.read()
+            f.seek(0)
+            f.write(data.replace(b"Temperature   298.150", b"Temperature   299.150"))
+        bump(filename, 1)
+        changed, scans["changed"] = scan(filename)
+        bump(filename, 1)
+        touched, scans["touched"] = scan(filename)
+        copied, scans["copied"] = scan(shutil.copy(filename, directory + "/b.log"))
+        version = cache.CACHE_VERSION
+        cache.CACHE_VERSION += 1
+        try:
+            _, scans["new version"] = scan(filename)
+        finally:
+            cache.CACHE_VERSION = version
+        # stamps of the first two versions of a.log and of the other cache version
+        pruned = prune_stamps(cache_dir)
+
+        # the least recently used entry is evicted first
+        entries = cache_entries(cache_dir)
+        for i, (path, size, used) in enumerate(entries):
+            os.utime(path, (i, i))
+        removed = evict(cache_dir, sum(entry[1] for entry in entries[1:]))
+        kept = [entry[0] for entry in cache_entries(cache_dir)]
+        # writing an entry above the size cap evicts down to the cap, keeping the new entry
+        max_size = sum(entry[1] for entry in entries[1:])
+        _, scans["over the cap"] = scan(
+            shutil.copy(h_filename, directory), max_size=max_size
+        )
+        after = cache_entries(cache_dir)
+        # eviction also removed the stamps of the evicted entries
+        stale = prune_stamps(cache_dir)
+
+    print("Log files scanned: ", scans)
+    print("Stamps pruned: %i, entries evicted: %i" % (pruned, removed))
+    print(
+        "Cache size after writing over the cap: %i of %i bytes"
+        % (sum(entry[1] for entry in after), max_size)
+    )
+    if (
+        scans
+        == {
+            "first run": 1,
+            "unchanged": 0,
+            "changed": 1,
+            "touched": 0,
+            "copied": 0,
+            "new version": 1,
+            "over the cap": 1,
+        }
+        and same
+        and first.temperature == 298.15
+        and changed.temperature == touched.temperature == copied.temperature == 299.15
+        and pruned == 3
+        and removed == 1
+        and kept == [entry[0] for entry in entries[1:]]
+        and sum(entry[1] for entry in after) <= max_size
+        and after[-1][0] not in kept
+        and stale == 0
+    ):
+        print("\nThe cache was hit and invalidated as expected.\n")
+    else:
+        print("\nThe cache did not behave as expected.\n")
+
+
+def test_discovery(pairs):
+    """
+    Tests that isotopologue pairs are found by the contents of their log files, using copies of the log files
+    with uninformative names in a temporary directory.
+
+    Parameters:
+    -----------
+    pairs: list
+        (light, heavy) log file locations of the expected pairs
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        names = {}
+        for i, filename in enumerate(sorted(set(sum(pairs, ())))):
+            names[shutil.copy(filename, os.path.join(directory, "%i.log" % i))] = (
+                filename
+            )
+        found = [
+            (names[light.filename], names[heavy.filename])
+            for light, heavy in isotopologue_pairs(read_headers(sorted(names)))
+        ]
+
+    print("Pairs found: ", len(found))
+    if sorted(found) == sorted(pairs):
+        print("\nThe isotopologue pairs were found.\n")
+    else:
+        print("\nThe isotopologue pairs found are not the expected pairs.\n")
+
+
+def test_default_isotope(filename, label):
+    """
+    Tests that a file labelling one atom is paired with an unlabelled copy by comparing the label with the
+    default, most abundant, isotope: an unlabelled file is the light isotopologue of a 66Zn label, the heavy
+    isotopologue of a 54Fe or 6Li label, and has no pair with a 64Zn label.
+
+    Parameters:
+    -----------
+    filename: str
+        location of a log file labelling a single atom
+    label: str
+        label of that atom in the log file, e.g. "Zn(Iso=64)"
+    """
+    with open(filename, "rt") as file:
+        text = file.read()
+    cases = [
+        ("Zn", "Zn(Iso=66)", "unlabelled"),
+        ("Fe", "Fe(Iso=54)", "labelled"),
+        ("Li", "Li(Iso=6)", "labelled"),
+        ("Zn", "Zn(Iso=64)", None),
+    ]
+    passed = True
+    for unlabelled, labelled, light in cases:
+        with tempfile.TemporaryDirectory() as directory:
+            names = {}
+            for name, atom in [("unlabelled", unlabelled), ("labelled", labelled)]:
+                path = os.path.join(directory, name + ".log")
+                with open(path, "wt") as file:
+                    file.write(text.replace(label, atom.ljust(len(label)), 1))
+                names[path] = name
+            found = [
+                (names[pair[0].filename], names[pair[1].filename])
+                for pair in isotopologue_pairs(read_headers(sorted(names)))
+            ]
+        expected = (
+            [] if light is None else [(light, ({*names.values()} - {light}).pop())]
+        )
+        print("%-10s and %-4s (light, heavy): %s" % (labelled, unlabelled, found))
+        passed = passed and found == expected
+
+    if passed:
+        print("\nThe light and heavy files were found by the default isotopes.\n")
+    else:
+        print("\nThe light and heavy files do not match the default isotopes.\n")
+
+
+def test_sources(l_filename, h_filename, linear_check):
+    """
+    Tests that log files compressed with gzip, bz2 and xz, and members of a tar archive, give the same RPFR
+    as the plain log files.
+
+    Parameters:
+    -----------
+    l_filename: str
+        location of the light isotope log file
+    h_filename: str
+        location of the heavy isotope log file
+    linear_check: str
+        Variable that states if the molecules in the log files are linear
+    """
+    calculator = RPFRCalculator(linear=linear_check == "y", unconverged="continue")
+    expected = calculator.calculate(l_filename, h_filename).beta
+    with tempfile.TemporaryDirectory() as directory:
+        sources = []
+        for module, extension in ((gzip, ".gz"), (bz2, ".bz2"), (lzma, ".xz")):
+            names = []
+            for filename in (l_filename, h_filename):
+                name = os.path.join(directory, os.path.basename(filename) + extension)
+                with open(filename, "rb") as f, module.open(name, "wb") as out:
+                    shutil.copyfileobj(f, out)
+                names.append(name)
+            sources.append(names)
+        archive = os.path.join(directory, "logs.tar.gz")
+        with tarfile.open(archive, "w:gz") as tar:
+            for filename in (l_filename, h_filename):
+                tar.add(filename, arcname=os.path.basename(filename))
+        sources.append(
+            [archive + "::" + os.path.basename(f) for f in (l_filename, h_filename)]
+        )
+        beta = [calculator.calculate(light, heavy).beta for light, heavy in sources]
+
+    print(
+        "RPFR - plain, gzip, bz2, xz, tar.gz: ",
+        [float(b) for b in [expected] + beta],
+    )
+    if all(b == expected for b in beta):
+        print("\nThe compressed and archived log files give the same RPFR.\n")
+    else:
+        print("\nThe compressed and archived log files give a different RPFR.\n")
+
+
+def test_archive_scaling(filename, counts):
+    """
+    Tests that reading the input sections of the members of a .tar.gz archive takes time linear in the number
+    of members, i.e. the archive is not decompressed again for each member, and that the headers and
+    `source_exists()` of the members match the plain log file.
+
+    Parameters:
+    -----------
+    filename: str
+        location of a Gaussian log file, the input section of which is copied into the archives
+    counts: list
+        numbers of members of the archives
+    """
+    with open(filename, "rb") as f:
+        # the input section, without the rest of the log file
+        head = b"".join(f.readlines()[:200])
+    expected = read_header(filename).fingerprint()
+    times, same = [], True
+    with tempfile.TemporaryDirectory() as directory:
+        for count in counts:
+            archive = os.path.join(directory, "logs_%i.tar.gz" % count)
+            with tarfile.open(archive, "w:gz") as tar:
+                for i in range(count):
+                    info = tarfile.TarInfo("logs/member_%05i.log" % i)
+                    info.size = len(head)
+                    tar.addfile(info, io.BytesIO(head))
+            start = time.perf_counter()
+            filenames = find_logs(directory)
+            filenames = [name for name in filenames if name.startswith(archive)]
+            headers = read_headers(filenames)
+            exists = all(source_exists(name) for name in filenames)
+            times.append(time.perf_counter() - start)
+            same &= (
+                len(headers) == count
+                and exists
+                and all(header.fingerprint() == expected for header in headers)
+                and [header.filename for header in headers] == filenames
+            )
+
+    slope = np.polyfit(np.log(counts), np.log(times), 1)[0]
+    for count, elapsed in zip(counts, times):
+        print("%6i members: %8.3f s" % (count, elapsed))
+    print("Exponent of time ~ members^b: %.2f" % slope)
+    if same and slope <= 1.2:
+        print("\nThe archive members are read in one pass.\n")
+    else:
+        print("\nThe archive members are not read in one pass.\n")
+
+
+def test_jobs(l_filename, h_filename, linear_check):
+    """
+    Tests that a log file with 3 jobs - the optimisation and frequency jobs of the light isotope log file, and
+    the frequency job of the heavy isotope log file appended as a third Link1 job - is indexed, that the last
+    frequency job is parsed by default, and that the second job can be selected. The third job is appended
+    without its item convergence table, and does not follow its optimisation, so its convergence is unknown.
+
+    Parameters:
+    -----------
+    l_filename: str
+        location of the light isotope log file, an "opt freq" log file with 2 jobs
+    h_filename: str
+        location of the heavy isotope log file, an "opt freq" log file with 2 jobs
+    linear_check: str
+        Variable that states if the molecules in the log files are linear
+    """
+    light, heavy = scan_log(l_filename), scan_log(h_filename)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "three_jobs.log")
+        with open(l_filename, "rb") as f, open(filename, "wb") as out:
+            out.write(f.read())
+        with open(h_filename, "rb") as f, open(filename, "ab") as out:
+            f.seek(index_log(h_filename).jobs[1].start)
+            out.write(f.read().replace(b"Converged?", b"Removed"))
+        index = index_log(filename)
+        last = scan_log(filename)
+        second = scan_log(filename, job=2)
+        third = scan_log(filename, job=3)
+        temperature = index.read("thermochemistry", 2)[2]
+        calculator = RPFRCalculator(linear=linear_check == "y", unconverged="continue")
+        expected = calculator.calculate(l_filename, h_filename).beta
+        calculator.job = 2
+        beta = calculator.calculate(filename, h_filename).beta
+
+    print("Jobs: ", [(job.number, job.route) for job in index.jobs])
+    print("Default job: ", index.job().number)
+    print(
+        "RPFR - separate files, job 2 of the 3 job file: ", float(expected), float(beta)
+    )
+    if (
+        len(index.jobs) == 3
+        and index.job().number == 3
+        and not index.jobs[0].has_frequencies()
+        and np.array_equal(last.frequencies, heavy.frequencies)
+        and last.masses == heavy.masses
+        and np.array_equal(second.frequencies, light.frequencies)
+        and second.masses == light.masses
+        and (second.element, second.isotope) == (light.element, light.isotope)
+        and second.table == light.table
+        and third.table is None
+        and "Temperature" in temperature
+        and beta == expected
+    ):
+        print("\nThe jobs of the multi-job log file are parsed separately.\n")
+    else:
+        print("\nThe jobs of the multi-job log file are mixed up.\n")
+
+
+def test_uncertainty(l_filename, h_filename, linear_check, realisations):
+    """
+    Tests that the Monte Carlo uncertainty of 1000*lnB is reproducible with a seed, does not depend on the number
+    of worker processes, has no spread when the frequencies are not perturbed, and that its peak memory does not
+    grow with the number of realisations.
+
+    Parameters:
+    -----------
+    l_filename: str
+        location of the light isotope log file
+    h_filename: str
+        location of the heavy isotope log file
+    linear_check: str
+        Variable that states if the molecules in the log files are linear
+    realisations: int
+        number of realisations
+    """
+    calculator = RPFRCalculator(linear=linear_check == "y", unconverged="continue")
+    result = calculator.calculate(l_filename, h_filename)
+    temps = [result.temperature, 500.0, 1000.0]
+    scale = Distribution("normal", 0.97, 0.01)
+    mode_error = Distribution("normal", 0.0, 0.02)
+    runs = [
+        rpfr_uncertainty(
+            result.light_freq,
+            result.heavy_freq,
+            temps,
+            realisations,
+            scale,
+            mode_error,
+            seed=2021,
+            workers=workers,
+        )
+        for workers in (None, None, 2)
+    ]
+    fixed = rpfr_uncertainty(result.light_freq, result.heavy_freq, temps, 1000)
+    print(runs[0].report())
+
+    # peak memory over 40 temperatures, many chunks of realisations
+    grid = temperature_grid(250.0, 1225.0, 25.0)
+    peaks = []
+    for n, workers in (
+        (realisations // 10, None),
+        (realisations, None),
+        (realisations, 2),
+    ):
+        tracemalloc.start()
+        try:
+            rpfr_uncertainty(
+                result.light_freq,
+                result.heavy_freq,
+                grid,
+                n,
+                scale,
+                mode_error,
+                workers=workers,
+            )
+            peaks.append(tracemalloc.get_traced_memory()[1] / 1024**2)
+        finally:
+            tracemalloc.stop()
+    print(
+        "Peak memory (MB) - %i realisations, %i realisations, %i with 2 workers: %s"
+        % (realisations // 10, realisations, realisations, ["%.1f" % p for p in peaks])
+    )
+
+    same = all(
+        np.array_equal(run.mean, runs[0].mean)
+        and np.array_equal(run.std, runs[0].std)
+        and all(
+            np.array_equal(run.percentiles[p], runs[0].percentiles[p])
+            for p in run.percentiles
+        )
+        for run in runs[1:]
+    )
+    percentiles = np.array(list(runs[0].percentiles.values()))
+    if (
+        same
+        and np.isclose(runs[0].nominal[0], result.beta)
+        and np.all(np.diff(percentiles, axis=0) > 0)
+        and np.all(runs[0].std > 0)
+        and np.allclose(fixed.std, 0)
+        and all(np.allclose(v, fixed.nominal) for v in fixed.percentiles.values())
+        and max(peaks) < 1.5 * peaks[0]
+    ):
+        print(
+            "\nThe uncertainty is reproducible and independent of the worker processes.\n"
+        )
+    else:
+        print("\nThe uncertainty is not reproducible.\n")
+
+
+def test_fit(pairs, temperatures):
+    """
+    Tests that the polynomial fits of 1000*lnB over a temperature grid are within 1% of the RPFR at every
+    temperature, that pairs a 3 coefficient fit cannot describe (C-H stretches) are given more coefficients,
+    that fitting all pairs at once gives the same coefficients as fitting each pair, and that the coefficient
+    table is read back unchanged.
+
+    Parameters:
+    -----------
+    pairs: list
+        (light, heavy, linear) of each pair, linear is "y" or "n", the first pair needs 3 coefficients and
+        the last pair more
+    temperatures: ndarray
+        temperature grid in K
+    """
+    rows = [
+        dict(light=light, heavy=heavy, linear=linear) for light, heavy, linear in pairs
+    ]
+    results = run_batch(rows, workers=1, temperatures=temperatures)
+    fits = fit_results(results, temperatures)
+    beta = np.array(
+        [
+            [result[column] for column in temperature_columns(temperatures)]
+            for result in results
+        ]
+    )
+    coefficients = np.array([fit["coefficients"] for fit in fits])
+    relative = np.abs(polynomial_beta(coefficients, temperatures) / beta - 1)
+    cubic = polynomial_fit(temperatures, beta)
+    single = np.array([polynomial_fit(temperatures, b)[0][0] for b in beta])
+    print(
+        "Coefficients of each fit: ",
+        [int(np.count_nonzero(fit["coefficients"])) for fit in fits],
+    )
+    print("Largest relative residual of each fit: ", np.max(relative, axis=1))
+    print("Largest relative residual of 3 coefficient fits: ", cubic[3])
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "coefficients.csv")
+        write_coefficients(filename, fits)
+        table, read = read_coefficients(filename)
+
+    if (
+        len(fits) == len(pairs)
+        and np.all(relative < 0.01)
+        and np.allclose([fit["max_relative"] for fit in fits], np.max(relative, axis=1))
+        and np.count_nonzero(coefficients[0]) == 3
+        and cubic[3][-1] > 0.01
+        and np.count_nonzero(coefficients[-1]) > 3
+        and np.allclose(cubic[0], single, rtol=1e-10, atol=0)
+        and np.array_equal(read, coefficients)
+        and [row["light"] for row in table] == [pair[0] for pair in pairs]
+    ):
+        print("\nThe polynomial fits match the RPFR and the coefficient table.\n")
+    else:
+        print("\nThe polynomial fits do not match the RPFR.\n")
+
+
+def test_prefetch(filenames, reads, buffer):
+    """
+    Tests that log files read concurrently and parsed as they arrive give the same records as `scan_log()`,
+    and that the concurrent reads and the bytes held in memory stay within their bounds.
+
+    Parameters:
+    -----------
+    filenames: list
+        locations of the log files, a gzip copy of the first one is also read
+    reads: int
+        largest number of log files read at the same time
+    buffer: int
+        largest number of bytes held between reading and parsing, smaller than the log files together
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        compressed = os.path.join(directory, os.path.basename(filenames[0]) + ".gz")
+        with open(filenames[0], "rb") as f, gzip.open(compressed, "wb") as out:
+            shutil.copyfileobj(f, out)
+        logs = filenames + [compressed, os.path.join(directory, "missing.LOG")]
+        records, stats = prefetch_logs(logs, reads, buffer)
+        expected = [scan_log(filename) for filename in filenames + [compressed]]
+    print(stats.report())
+
+    largest = max(os.path.getsize(filename) for filename in filenames)
+    same = all(
+        np.array_equal(records[record.filename].frequencies, record.frequencies)
+        and records[record.filename].table == record.table
+        and records[record.filename].temperature == record.temperature
+        and records[record.filename].masses == record.masses
+        and records[record.filename].low_freq == record.low_freq
+        and (records[record.filename].element, records[record.filename].isotope)
+        == (record.element, record.isotope)
+        for record in expected
+    )
+    if (
+        same
+        and stats.files == len(filenames) + 1
+        and list(stats.errors) == [logs[-1]]
+        and stats.peak_reads <= reads
+        # the gzip copy is let in at its compressed size, and charged its full size once read
+        and stats.peak_buffer <= max(buffer, largest) + os.path.getsize(filenames[0])
+    ):
+        print("\nThe prefetched log files match and stay within the bounds.\n")
+    else:
+        print("\nThe prefetched log files do not match.\n")
+
+
+def test_prefetch_batch(pairs, reads, buffer, workers):
+    """
+    Tests that a batch run calculating each pair as soon as its log files are prefetched gives the same results
+    as `run_batch()`, calculates the pairs in the worker processes and drops every record after its last pair.
+
+    Parameters:
+    -----------
+    pairs: list
+        (light, heavy) log file locations, a pair with a missing log file is added
+    reads: int
+        largest number of log files read at the same time
+    buffer: int
+        largest number of bytes held between reading and parsing
+    workers: int
+        number of worker processes
+    """
+    rows = [dict(light=light, heavy=heavy, linear="n") for light, heavy in pairs]
+    rows.append(dict(light="missing.LOG", heavy=pairs[0][1], linear="n"))
+    tracer = trace.enable()
+    try:
+        results, stats = prefetch_batch(rows, reads, buffer, workers)
+    finally:
+        trace.disable()
+    expected = run_batch(rows, workers=1)
+    print(stats.report())
+
+    processes = {event["pid"] for event in tracer.events if event["name"] == "pair"}
+    files = len({filename for pair in pairs for filename in pair})
+    if (
+        [(r["status"], r["reason"], r["beta"]) for r in results]
+        == [(r["status"], r["reason"], r["beta"]) for r in expected]
+        and results[-1]["status"] == "failed"
+        and processes
+        and os.getpid() not in processes
+        and stats.files == files
+        and list(stats.errors) == ["missing.LOG"]
+        and stats.peak_records <= files
+    ):
+        print("\nThe prefetched batch matches the batch run.\n")
+    else:
+        print("\nThe prefetched batch does NOT match the batch run!\n")
+
+
+def test_benchmark(case):
+    """
+    Tests that the benchmark measures every stage of a case, and that the comparison with a baseline finds
+    a regression only when the stages are slower than the baseline.
+
+    Parameters:
+    -----------
+    case: str
+        name of the benchmark case, e.g. "C_1"
+    """
+    report = run_benchmarks([c for c in BENCHMARK_CASES if c[0] == case], repeats=1)
+    # a baseline 10 times faster than this run
+    baseline = json.loads(json.dumps(report))
+    for stage in baseline["cases"][case].values():
+        if isinstance(stage, dict):
+            stage["time"] /= 10
+    regressions = {stage for _, stage, _, _ in compare(report, baseline)}
+
+    print("Stages regressed against the same run: ", compare(report, report))
+    print("Stages regressed against a 10 times faster baseline: ", sorted(regressions))
+    if not compare(report, report) and {"parse", "total"} <= regressions:
+        print("\nThe regressions were found.\n")
+    else:
+        print("\nThe regressions were not found as expected.\n")
+
+
+def test_trace(l_filename, h_filename, linear_check):
+    """
+    Tests that tracing a batch run in worker processes records every stage in the workers and the bytes read
+    from each log file.
+
+    Parameters:
+    -----------
+    l_filename: str
+        location of the light isotope log file
+    h_filename: str
+        location of the heavy isotope log file
+    linear_check: str
+        Variable that states if the molecules in the log files are linear
+    """
+    rows = [dict(light=l_filename, heavy=h_filename, linear=linear_check)] * 2
+    tracer = trace.enable()
+    try:
+        results = run_batch(rows, workers=2)
+    finally:
+        trace.disable()
+    stages = {name for name, _, _ in tracer.summary()}
+    processes = {event["pid"] for event in tracer.events}
+    expected = {"pair", "file check", "scan", "extract", "inspect", "calculation"}
+
+    print("Stages traced: ", sorted(stages))
+    print("Bytes read: ", {k: c["bytes"] for k, c in tracer.counters.items()})
+    if (
+        expected <= stages
+        and processes
+        and os.getpid() not in processes
+        and all(
+            tracer.counters[f]["bytes"] == 2 * os.path.getsize(f)
+            for f in (l_filename, h_filename)
+        )
+        and all("trace" not in result for result in results)
+        and not trace.tracing()
+    ):
+        print("\nEvery stage of the worker processes was traced.\n")
+    else:
+        print("\nThe trace is not complete.\n")
+
+
+def test_convergence_scaling(filename, steps):
+    """
+    Tests that the time to find the item convergence table and the frequencies in synthetic log files with
+    thousands of optimisation steps grows linearly with the size of the file, and that the converged table of
+    a real log file is found.
+
+    Parameters:
+    -----------
+    filename: str
+        location of a Gaussian log file of a converged optimisation
+    steps: list
+        number of optimisation steps of each synthetic log file
+    """
+    step = (
+        " Step number %6i out of a maximum of  20000\n"
+        "         Item               Value     Threshold  Converged?\n"
+        " Maximum Force            0.005444     0.000450     NO \n"
+        " RMS     Force            0.002910     0.000300     YES\n"
+        " Maximum Displacement     0.036132     0.001800     YES\n"
+        " RMS     Displacement     0.033452     0.001200     YES\n"
+        " Predicted change in Energy=-6.920682D-04\n"
+    ) + "                          Input orientation:\n" * 40
+    final = (
+        "         Item               Value     Threshold  Converged?\n"
+        " Maximum Force            0.000014     0.000450     YES\n"
+        " RMS     Force            0.000009     0.000300     YES\n"
+        " Maximum Displacement     0.000132     0.001800     YES\n"
+        " RMS     Displacement     0.000092     0.001200     YES\n"
+        " Low frequencies ---    0.0091    0.0091    0.0097   10.8841\n"
+        " Frequencies --     78.5452                78.5452               126.6746\n"
+    )
+    checks = [CONVERGENCE_PATTERN, "Low frequencies ---", "Frequencies --"]
+    sizes, costs = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in steps:
+            path = os.path.join(tmp, "steps_%i.log" % n)
+            with open(path, "wt") as file:
+                file.writelines(step % i for i in range(n))
+                file.write(final)
+            sizes.append(os.path.getsize(path))
+            # best of 3 runs
+            times = []
+            for _ in range(3):
+                start = time.perf_counter()
+                found = [inspect_file(path, check) for check in checks]
+                times.append(time.perf_counter() - start)
+            costs.append(min(times))
+            print(
+                "%6i steps, %6.2f MB: %7.2f ms, found %s"
+                % (n, sizes[-1] / 1024**2, costs[-1] * 1000, found)
+            )
+        table = scan_log(path).table
+
+    # exponent of the time against the file size, 1 for a linear check
+    exponent = np.polyfit(np.log(sizes), np.log(costs), 1)[0]
+    print("Fitted exponent of the time against the file size: %.2f" % exponent)
+    if (
+        all(found)
+        and table.endswith("0.000092     0.001200     YES")
+        and inspect_file(filename, CONVERGENCE_PATTERN)
+        and exponent <= 1.1
+    ):
+        print("\nThe convergence checks are linear in the file size.\n")
+    else:
+        print("\nThe convergence checks are not linear in the file size.\n")
+
+
+def test_import_time(modules, budget):
+    """
+    Tests that the modules imported by `script.py` load within a time budget, measured in a fresh interpreter
+    with `python -X importtime`.
+
+    Parameters:
+    -----------
+    modules: list
+        names of the modules to import
+    budget: float
+        maximum import time in ms
+    """
+    # best of 3 runs, as the first run may be slowed down by a cold file system cache
+    times = []
+    for _ in range(3):
+        output = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+            capture_output=True,
+            text=True,
+        ).stderr
+        # cumulative time in us of each module imported at the top level, e.g. "import time: 5 | 135 | numpy"
+        times.append(
+            sum(int(t) for t in re.findall(r"\|\s+(\d+) \| \S+$", output, re.MULTILINE))
+            / 1000
+        )
+    total = min(times)
+    print("Import time: %.1f ms, budget: %.1f ms." % (total, budget))
+    if total <= budget:
+        print("\nThe modules are imported within the budget.\n")
+    else:
+        print("\nThe modules are not imported within the budget.\n")
+
+
 if __name__ == "__main__":  # only execute this if this file is run as a script
 
     print("----------------------- TESTING ------------------------\n")
@@ -174,6 +1562,27 @@ if __name__ == "__main__":  # only execute this if this file is run as a script
         print("Unknown input. Exiting")
         exit()
 
+    # run tail scan tests
+    tail = input("Would you like to run the tail scan tests? [y/n]: ")
+    if tail == "y":
+        print("--------------- TAIL SCAN ------------------------------\n")
+        print(
+            "Testing every bundled log file and ambiguous copies of the ZnCl4 log files."
+        )
+        test_tail(
+            sorted(
+                os.path.join(root, name)
+                for directory in ("tests/log_files", "input_files")
+                for root, _, names in os.walk(directory)
+                for name in names
+                if name.lower().endswith(".log")
+            ),
+            "tests/log_files/zinc/ZNCL4_B_64.LOG",
+            "tests/log_files/zinc/ZNCL4_B_66.LOG",
+        )
+    else:
+        print("Not running tail scan tests.")
+
     # run calculation tests
     calc = input("Would you like to run calculation tests? [y/n]: ")
     if calc == "y":
@@ -240,3 +1649,390 @@ if __name__ == "__main__":  # only execute this if this file is run as a script
     else:
         print("Unknown input. Exiting.")
         exit()
+
+    # run batched calculation tests
+    kernel = input("Would you like to run batched calculation tests? [y/n]: ")
+    if kernel == "y":
+        print("--------------- BATCHED CALCULATION --------------------\n")
+        print(
+            "Testing the batched calculation on ZnCl4 and ZnH2O from 273.15 to 1773.15 K."
+        )
+        pairs = [
+            (
+                "tests/log_files/zinc/ZNCL4_B_64.LOG",
+                "tests/log_files/zinc/ZNCL4_B_66.LOG",
+            ),
+            (
+                "tests/log_files/zinc/ZnH2O_A_Freq_64_Th.log",
+                "tests/log_files/zinc/ZnH2O_A_Freq_66_Th.log",
+            ),
+        ]
+        test_kernel(pairs, "n", temperature_grid(273.15, 1773.15, 25))
+    else:
+        print("Not running batched calculation tests.")
+
+    # run Hessian isotopologue engine tests
+    hessian = input("Would you like to run the Hessian isotopologue tests? [y/n]: ")
+    if hessian == "y":
+        print("--------------- HESSIAN ISOTOPOLOGUES ------------------\n")
+        print("Testing the 66Zn frequencies of ZnCl4 derived from the 64Zn Hessian.")
+        test_hessian(
+            "tests/log_files/zinc/ZNCL4_B_64.LOG",
+            "tests/log_files/zinc/ZNCL4_B_66.LOG",
+            "n",
+            "Zn",
+            66,
+        )
+        print(
+            "Testing the 66Zn frequencies of ZnDMA derived from the 64Zn Hessian, whose archive entry wraps NImag=."
+        )
+        test_hessian(
+            "input_files/ZnDMA_1_Freq_64.log",
+            "input_files/ZnDMA_1_Freq_66.log",
+            "n",
+            "Zn",
+            66,
+        )
+        print("Testing the 13C frequencies of CO2 derived from the 12C Hessian.")
+        test_hessian(
+            "tests/log_files/linear/CO2_12.LOG",
+            "tests/log_files/linear/CO2_13.LOG",
+            "y",
+            "C",
+            13,
+        )
+    else:
+        print("Not running Hessian isotopologue tests.")
+
+    # run moving mode tests
+    moving = input("Would you like to run the moving mode tests? [y/n]: ")
+    if moving == "y":
+        print("--------------- MOVING MODES ---------------------------\n")
+        print("Testing the modes in which Zn moves in the ZnOxa log files.")
+        test_moving_modes(
+            "input_files/ZnOxa_A_Freq_64_1.log",
+            "input_files/ZnOxa_A_Freq_66_1.log",
+            "n",
+            list(range(28)) + [29, 30],
+            [0, 4, 5, 6, 7, 8, 9, 10, 11, 13, 14, 17, 20, 21, 24],
+            0.05,
+            4.71206511845601,
+            # Zn displacements 0.04, 0.02, -0.06
+            2,
+        )
+    else:
+        print("Not running moving mode tests.")
+
+    # run screening tests
+    screening = input("Would you like to run the screening tests? [y/n]: ")
+    if screening == "y":
+        print("--------------- SCREENING ------------------------------\n")
+        for l_filename, h_filename, linear_check in (
+            (
+                "tests/log_files/zinc/ZNCL4_B_64.LOG",
+                "tests/log_files/zinc/ZNCL4_B_66.LOG",
+                "n",
+            ),
+            (
+                "tests/log_files/linear/CO2_12.LOG",
+                "tests/log_files/linear/CO2_13.LOG",
+                "y",
+            ),
+        ):
+            print(
+                "Testing %s and %s from 273.15 to 1773.15 K." % (l_filename, h_filename)
+            )
+            test_screening(
+                l_filename,
+                h_filename,
+                linear_check,
+                temperature_grid(273.15, 1773.15, 25),
+            )
+    else:
+        print("Not running screening tests.")
+
+    # run fan-out tests
+    fan = input("Would you like to run the fan-out tests? [y/n]: ")
+    if fan == "y":
+        print("--------------- FAN-OUT --------------------------------\n")
+        print(
+            "Testing ZnCl4 (66Zn) and ZnH2O (66Zn, different molecule) against 64Zn ZnCl4."
+        )
+        test_fan_out(
+            "tests/log_files/zinc/ZNCL4_B_64.LOG",
+            [
+                "tests/log_files/zinc/ZNCL4_B_66.LOG",
+                "tests/log_files/zinc/ZnH2O_A_Freq_66_Th.log",
+                "tests/log_files/zinc/ZNCL4_B_66.LOG",
+            ],
+            "n",
+            temperature_grid(273.15, 1773.15, 25),
+        )
+    else:
+        print("Not running fan-out tests.")
+
+    # run fractionation matrix tests
+    fractionation = input(
+        "Would you like to run the fractionation matrix tests? [y/n]: "
+    )
+    if fractionation == "y":
+        print("--------------- FRACTIONATION MATRIX -------------------\n")
+        print("Testing the Zn species in output_files.")
+        test_fractionation(
+            [
+                "output_files/ZnCl4.txt",
+                "output_files/ZnDMA_1.txt",
+                "output_files/ZnH2O_ATh.txt",
+                "output_files/ZnOxa.txt",
+                "output_files/ZnSO4.txt",
+            ]
+        )
+    else:
+        print("Not running fractionation matrix tests.")
+
+    # run results store tests
+    results_store = input("Would you like to run the results store tests? [y/n]: ")
+    if results_store == "y":
+        print("--------------- RESULTS STORE --------------------------\n")
+        print("Testing ZnCl4 from 273.15 to 1773.15 K.")
+        test_store(
+            "tests/log_files/zinc/ZNCL4_B_64.LOG",
+            "tests/log_files/zinc/ZNCL4_B_66.LOG",
+            "n",
+            temperature_grid(273.15, 1773.15, 25),
+        )
+    else:
+        print("Not running results store tests.")
+
+    # run output format tests
+    formats = input("Would you like to run the output format tests? [y/n]: ")
+    if formats == "y":
+        print("--------------- OUTPUT FORMATS -------------------------\n")
+        print("Testing ZnCl4.")
+        test_output_formats(
+            "tests/log_files/zinc/ZNCL4_B_64.LOG",
+            "tests/log_files/zinc/ZNCL4_B_66.LOG",
+            "n",
+        )
+    else:
+        print("Not running output format tests.")
+
+    # run incremental batch tests
+    incremental = input("Would you like to run the incremental batch tests? [y/n]: ")
+    if incremental == "y":
+        print("--------------- INCREMENTAL BATCH ----------------------\n")
+        print("Testing copies of the ZnCl4 and ZnH2O log files.")
+        test_incremental(
+            [
+                (
+                    "tests/log_files/zinc/ZNCL4_B_64.LOG",
+                    "tests/log_files/zinc/ZNCL4_B_66.LOG",
+                ),
+                (
+                    "tests/log_files/zinc/ZnH2O_A_Freq_64_Th.log",
+                    "tests/log_files/zinc/ZnH2O_A_Freq_66_Th.log",
+                ),
+            ],
+            "n",
+        )
+    else:
+        print("Not running incremental batch tests.")
+
+    # run parsed log file cache tests
+    cached = input("Would you like to run the log file cache tests? [y/n]: ")
+    if cached == "y":
+        print("--------------- LOG FILE CACHE -------------------------\n")
+        print("Testing copies of the ZnH2O log files.")
+        test_cache(
+            "tests/log_files/zinc/ZnH2O_A_Freq_64_Th.log",
+            "tests/log_files/zinc/ZnH2O_A_Freq_66_Th.log",
+        )
+    else:
+        print("Not running log file cache tests.")
+
+    # run pair discovery tests
+    discovery = input("Would you like to run the pair discovery tests? [y/n]: ")
+    if discovery == "y":
+        print("--------------- PAIR DISCOVERY -------------------------\n")
+        print("Testing renamed copies of the zinc, alkane and CO2 log files.")
+        test_discovery(
+            [
+                (
+                    "tests/log_files/zinc/ZNCL4_B_64.LOG",
+                    "tests/log_files/zinc/ZNCL4_B_66.LOG",
+                ),
+                (
+                    "tests/log_files/zinc/ZnH2O_A_Freq_64_Th.log",
+                    "tests/log_files/zinc/ZnH2O_A_Freq_66_Th.log",
+                ),
+                ("input_files/alkanes/C_4_12.LOG", "input_files/alkanes/C_4_13.LOG"),
+                (
+                    "tests/log_files/linear/CO2_12.LOG",
+                    "tests/log_files/linear/CO2_13.LOG",
+                ),
+            ]
+        )
+        print("Testing single labels lighter and heavier than the default isotopes.")
+        test_default_isotope("tests/log_files/zinc/ZNCL4_B_64.LOG", "Zn(Iso=64)")
+    else:
+        print("Not running pair discovery tests.")
+
+    # run compressed log file tests
+    sources = input("Would you like to run the compressed log file tests? [y/n]: ")
+    if sources == "y":
+        print("--------------- COMPRESSED LOG FILES -------------------\n")
+        print("Testing compressed and archived copies of the ZnCl4 log files.")
+        test_sources(
+            "tests/log_files/zinc/ZNCL4_B_64.LOG",
+            "tests/log_files/zinc/ZNCL4_B_66.LOG",
+            "n",
+        )
+        print("Testing the input sections of .tar.gz archives of 250 to 2000 members.")
+        test_archive_scaling(
+            "tests/log_files/zinc/ZNCL4_B_64.LOG", [250, 500, 1000, 2000]
+        )
+    else:
+        print("Not running compressed log file tests.")
+
+    # run multi-job log file tests
+    jobs = input("Would you like to run the multi-job log file tests? [y/n]: ")
+    if jobs == "y":
+        print("--------------- MULTI-JOB LOG FILES --------------------\n")
+        print("Testing a log file with the jobs of both ZnCl4 log files.")
+        test_jobs(
+            "tests/log_files/zinc/ZNCL4_B_64.LOG",
+            "tests/log_files/zinc/ZNCL4_B_66.LOG",
+            "n",
+        )
+    else:
+        print("Not running multi-job log file tests.")
+
+    # run uncertainty tests
+    uncertainty = input("Would you like to run the uncertainty tests? [y/n]: ")
+    if uncertainty == "y":
+        print("--------------- UNCERTAINTY ----------------------------\n")
+        print("Testing 200000 Monte Carlo realisations of the ZnCl4 RPFR.")
+        test_uncertainty(
+            "tests/log_files/zinc/ZNCL4_B_64.LOG",
+            "tests/log_files/zinc/ZNCL4_B_66.LOG",
+            "n",
+            200000,
+        )
+    else:
+        print("Not running uncertainty tests.")
+
+    # run polynomial fit tests
+    fit = input("Would you like to run the polynomial fit tests? [y/n]: ")
+    if fit == "y":
+        print("--------------- POLYNOMIAL FIT -------------------------\n")
+        print("Testing fits of the ZnCl4 and alkane RPFRs over 273.15 - 1773.15 K.")
+        test_fit(
+            [
+                (
+                    "tests/log_files/zinc/ZNCL4_B_64.LOG",
+                    "tests/log_files/zinc/ZNCL4_B_66.LOG",
+                    "n",
+                ),
+                (
+                    "input_files/alkanes/C_1_12.LOG",
+                    "input_files/alkanes/C_1_13.LOG",
+                    "n",
+                ),
+                (
+                    "input_files/alkanes/C_2_12.LOG",
+                    "input_files/alkanes/C_2_13.LOG",
+                    "n",
+                ),
+            ],
+            temperature_grid(273.15, 1773.15, 10),
+        )
+    else:
+        print("Not running polynomial fit tests.")
+
+    # run prefetch tests
+    prefetch = input("Would you like to run the prefetch tests? [y/n]: ")
+    if prefetch == "y":
+        print("--------------- PREFETCH -------------------------------\n")
+        print("Testing 2 concurrent reads of the zinc log files with a 1 MB buffer.")
+        test_prefetch(
+            [
+                "tests/log_files/zinc/ZNCL4_B_64.LOG",
+                "tests/log_files/zinc/ZNCL4_B_66.LOG",
+                "tests/log_files/zinc/ZnH2O_A_Freq_64_Th.log",
+                "tests/log_files/zinc/ZnH2O_A_Freq_66_Th.log",
+            ],
+            2,
+            1024**2,
+        )
+        print(
+            "Testing a batch of the zinc and alkane pairs calculated as they are prefetched."
+        )
+        test_prefetch_batch(
+            [
+                (
+                    "tests/log_files/zinc/ZNCL4_B_64.LOG",
+                    "tests/log_files/zinc/ZNCL4_B_66.LOG",
+                ),
+                (
+                    "tests/log_files/zinc/ZnH2O_A_Freq_64_Th.log",
+                    "tests/log_files/zinc/ZnH2O_A_Freq_66_Th.log",
+                ),
+                ("input_files/alkanes/C_1_12.LOG", "input_files/alkanes/C_1_13.LOG"),
+                ("input_files/alkanes/C_2_12.LOG", "input_files/alkanes/C_2_13.LOG"),
+                ("input_files/alkanes/C_4_12.LOG", "input_files/alkanes/C_4_13.LOG"),
+            ],
+            2,
+            1024**2,
+            2,
+        )
+    else:
+        print("Not running prefetch tests.")
+
+    # run benchmark tests
+    bench = input("Would you like to run the benchmark tests? [y/n]: ")
+    if bench == "y":
+        print("--------------- BENCHMARK ------------------------------\n")
+        print(
+            "Testing the benchmark and baseline comparison on the C_1 alkane log files."
+        )
+        test_benchmark("C_1")
+    else:
+        print("Not running benchmark tests.")
+
+    # run tracing tests
+    tracing = input("Would you like to run the tracing tests? [y/n]: ")
+    if tracing == "y":
+        print("--------------- TRACING --------------------------------\n")
+        print("Testing a traced batch run of the ZnCl4 log files.")
+        test_trace(
+            "tests/log_files/zinc/ZNCL4_B_64.LOG",
+            "tests/log_files/zinc/ZNCL4_B_66.LOG",
+            "n",
+        )
+    else:
+        print("Not running tracing tests.")
+
+    # run convergence check scaling tests
+    scaling = input(
+        "Would you like to run the convergence check scaling tests? [y/n]: "
+    )
+    if scaling == "y":
+        print("--------------- CONVERGENCE SCALING --------------------\n")
+        print("Testing the convergence checks on log files with 1000 to 8000 steps.")
+        test_convergence_scaling(
+            "tests/log_files/zinc/ZNCL4_B_64.LOG", [1000, 2000, 4000, 8000]
+        )
+    else:
+        print("Not running convergence check scaling tests.")
+
+    # run start up time test
+    startup = input("Would you like to run the start up time test? [y/n]: ")
+    if startup == "y":
+        print("--------------- START UP TIME --------------------------\n")
+        print("Testing the modules imported by script.py load within 150 ms.")
+        test_import_time(
+            ["calculations.calculator", "calculations.calculations", "file_io.output"],
+            150,
+        )
+    else:
+        print("Not running start up time test.")